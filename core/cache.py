@@ -0,0 +1,230 @@
+"""Persistent content-addressed file cache shared by the pipeline stages."""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: index updates are only serialized within a process
+    fcntl = None
+
+
+INDEX_FILENAME = "index.json"
+LOCK_FILENAME = "index.lock"
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Return a SHA-256 hex digest identifying ``parts``.
+
+    Parts are serialized as JSON so that ``("a", "bc")`` and ``("ab", "c")``
+    produce different keys.
+    """
+    blob = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ContentCache:
+    """Directory of files addressed by key, with an index and LRU eviction.
+
+    Each entry is stored as ``<folder>/<key><suffix>``. ``index.json`` keeps
+    the size and creation time of every entry, and a hit touches the entry
+    file's mtime, so that the cache can be trimmed to ``max_bytes`` (least
+    recently used first) and entries older than ``max_age_seconds`` can be
+    dropped. Hits neither lock nor rewrite the index. Hit and miss counters
+    are kept per instance.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        suffix: str = "",
+        max_bytes: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+    ):
+        self.folder = folder
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Dict[str, float]]] = None
+
+    # -- index handling -----------------------------------------------------
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.folder, INDEX_FILENAME)
+
+    def _load_index(self) -> Dict[str, Dict[str, float]]:
+        if self._index is None:
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Serialize index updates across threads and processes.
+
+        Other processes sharing the folder rewrite ``index.json`` too, so
+        the index is re-read under the lock before every change.
+        """
+        with self._lock:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(os.path.join(self.folder, LOCK_FILENAME), "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._index = None
+                yield
+
+    def _save_index(self) -> None:
+        os.makedirs(self.folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._load_index(), f)
+        os.replace(tmp_path, self.index_path)
+
+    # -- public API ---------------------------------------------------------
+
+    def path_for(self, key: str) -> str:
+        """Return the on-disk location of ``key`` (whether or not it exists)."""
+        return os.path.join(self.folder, f"{key}{self.suffix}")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the path of a cached entry, or ``None`` on a miss."""
+        path = self.path_for(key)
+        now = time.time()
+        # Fast path: the index is replaced atomically, so this process's copy
+        # can be read without the file lock; a hit only touches the file
+        with self._lock:
+            entry = self._load_index().get(key)
+        if entry is not None and not self._expired(entry, now):
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass  # removed by another process; confirm under the lock
+            else:
+                with self._lock:
+                    self.hits += 1
+                return path
+
+        with self._locked():
+            index = self._load_index()
+            entry = index.get(key)
+            if (entry is not None and self._expired(entry, now)) or not os.path.exists(path):
+                if entry is not None:
+                    self._remove(key)
+                    self._save_index()
+                self.misses += 1
+                return None
+            if entry is None:
+                # File written by another process before its index update
+                size = os.path.getsize(path)
+                index[key] = {"size": size, "created": now, "accessed": now}
+                self._save_index()
+            os.utime(path, (now, now))
+            self.hits += 1
+            return path
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """Return the cached content for ``key``, or ``None`` on a miss."""
+        path = self.get(key)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def put_bytes(self, key: str, data: bytes) -> str:
+        """Store ``data`` under ``key`` and return the cached file path."""
+        os.makedirs(self.folder, exist_ok=True)
+        path = self.path_for(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        self._register(key, len(data))
+        return path
+
+    def put_file(self, key: str, source_path: str) -> str:
+        """Move ``source_path`` into the cache under ``key``; returns the cached path.
+
+        ``source_path`` should be in :attr:`folder` (e.g. a temp file made
+        there) so the move is an atomic rename.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        path = self.path_for(key)
+        size = os.path.getsize(source_path)
+        os.replace(source_path, path)
+        self._register(key, size)
+        return path
+
+    def evict(self) -> None:
+        """Drop expired entries, then trim the cache to ``max_bytes``."""
+        with self._locked():
+            self._evict()
+            self._save_index()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current size of the cache."""
+        with self._locked():
+            index = self._load_index()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "entries": len(index),
+                "bytes": sum(int(e["size"]) for e in index.values()),
+            }
+
+    # -- internals ----------------------------------------------------------
+
+    def _register(self, key: str, size: int) -> None:
+        now = time.time()
+        with self._locked():
+            self._load_index()[key] = {"size": size, "created": now, "accessed": now}
+            self._evict(protect=key)
+            self._save_index()
+
+    def _expired(self, entry: Dict[str, float], now: float) -> bool:
+        return self.max_age_seconds is not None and now - entry["created"] > self.max_age_seconds
+
+    def _last_access(self, key: str) -> float:
+        """The entry file's mtime (touched on every hit), else the indexed time."""
+        try:
+            return os.path.getmtime(self.path_for(key))
+        except OSError:
+            return self._load_index()[key]["accessed"]
+
+    def _remove(self, key: str) -> None:
+        self._load_index().pop(key, None)
+        try:
+            os.remove(self.path_for(key))
+        except OSError:
+            pass
+
+    def _evict(self, protect: Optional[str] = None) -> None:
+        index = self._load_index()
+        if self.max_age_seconds is not None:
+            cutoff = time.time() - self.max_age_seconds
+            for key in [k for k, e in index.items() if e["created"] < cutoff and k != protect]:
+                self._remove(key)
+        if self.max_bytes is not None:
+            total = sum(int(e["size"]) for e in index.values())
+            for key in sorted(index, key=self._last_access):
+                if total <= self.max_bytes:
+                    break
+                if key == protect:
+                    continue
+                total -= int(index[key]["size"])
+                self._remove(key)
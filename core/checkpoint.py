@@ -0,0 +1,144 @@
+"""Per-job checkpoints so a rerun resumes at the first unfinished unit.
+
+A job's units are the LLM script, the audio of each paragraph, the video
+segment of each paragraph and the final video. Each one is recorded in
+``<script json>.checkpoint.json`` as soon as it completes. The file is
+replaced atomically (temporary file + rename), so a crash leaves the
+previous or the new state and never a torn file.
+
+A record is only trusted while it still describes the same work. The
+script is tied to a key of the prompt and attachment contents, an audio file to
+the text it speaks and a segment to its content hash, and every recorded
+file must still exist. ``JOB_CHECKPOINTS=0`` disables checkpoints.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+from core.cache import make_cache_key
+from core.generate_script_json import read_attachment
+
+JOB_CHECKPOINTS = os.getenv("JOB_CHECKPOINTS", "1") != "0"
+# Bump when the layout changes so old checkpoints are ignored
+CHECKPOINT_VERSION = 1
+
+
+def checkpoint_path(output_file: str) -> str:
+    """Checkpoint file of the job whose script JSON is ``output_file``."""
+    return os.path.splitext(output_file)[0] + ".checkpoint.json"
+
+
+def job_key(prompt: str, *attachments: Optional[str]) -> str:
+    """Key of the LLM inputs: the prompt and the content hash of each attachment.
+
+    Content rather than mtime, because attachments such as the sheet PDF are
+    written again on every run even when nothing changed. The hashes come
+    from the same memoized reads the LLM call uses.
+    """
+    parts: List[Any] = [prompt]
+    for path in attachments:
+        if path and os.path.exists(path):
+            parts.append(read_attachment(path)[0])
+        else:
+            parts.append(path)
+    return make_cache_key(*parts)
+
+
+def _empty_state(key: Optional[str]) -> Dict[str, Any]:
+    return {"version": CHECKPOINT_VERSION, "key": key, "script": None, "audio": {}, "segments": {}, "video": None}
+
+
+class Checkpoint:
+    """Completed units of one job, saved after every update.
+
+    Opening with ``key`` starts over when the stored checkpoint was written
+    for other LLM inputs; without ``key`` any stored state is used (later
+    stages, after the LLM stage has checked it). Safe to update from
+    several threads.
+    """
+
+    def __init__(self, path: str, key: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self.state = self._load(key)
+
+    def _load(self, key: Optional[str]) -> Dict[str, Any]:
+        if not JOB_CHECKPOINTS:
+            return _empty_state(key)
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return _empty_state(key)
+        if state.get("version") != CHECKPOINT_VERSION or (key is not None and state.get("key") != key):
+            return _empty_state(key)
+        return state
+
+    def _save(self) -> None:
+        if not JOB_CHECKPOINTS:
+            return
+        folder = os.path.dirname(self.path) or "."
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    # -- LLM ------------------------------------------------------------------
+
+    def script(self) -> Optional[Dict[str, Any]]:
+        """The recorded LLM script (a fresh copy), or ``None``."""
+        with self._lock:
+            script = self.state["script"]
+        return json.loads(json.dumps(script)) if script is not None else None
+
+    def record_script(self, script_data: Dict[str, Any]) -> None:
+        with self._lock:
+            self.state["script"] = json.loads(json.dumps(script_data, ensure_ascii=False))
+            self._save()
+
+    # -- audio ----------------------------------------------------------------
+
+    def audio(self, index: int, text: str) -> Optional[str]:
+        """Audio file recorded for paragraph ``index`` if it speaks ``text`` and still exists."""
+        with self._lock:
+            entry = self.state["audio"].get(str(index))
+        if entry and entry["text"] == make_cache_key(text) and os.path.exists(entry["path"]):
+            return entry["path"]
+        return None
+
+    def record_audio(self, index: int, text: str, path: str) -> None:
+        with self._lock:
+            self.state["audio"][str(index)] = {"text": make_cache_key(text), "path": path}
+            self._save()
+
+    # -- video ----------------------------------------------------------------
+
+    def record_segment(self, spec: Dict[str, Any]) -> None:
+        """Record an encoded segment (a ``SegmentPlan.spec`` dict)."""
+        with self._lock:
+            self.state["segments"][str(spec["index"])] = {"hash": spec["hash"], "path": spec["output_path"]}
+            self._save()
+
+    def record_video(self, path: str) -> None:
+        with self._lock:
+            self.state["video"] = path
+            self._save()
+
+    def progress(self) -> Dict[str, Any]:
+        """Counts of the recorded units, for logs and status reports."""
+        with self._lock:
+            return {
+                "script": self.state["script"] is not None,
+                "audio": len(self.state["audio"]),
+                "segments": len(self.state["segments"]),
+                "video": self.state["video"],
+            }
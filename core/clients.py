@@ -0,0 +1,219 @@
+"""Shared HTTP session and LLM clients reused across the whole pipeline.
+
+Creating a client per request pays for a fresh TLS handshake and SDK setup
+each time. The helpers here build one keep-alive ``requests`` session and
+one OpenAI client per credential set, and hand the same instances to every
+caller in the process.
+
+The async counterparts are bound to an event loop, so they are shared per
+running loop instead, together with one semaphore per backend that caps the
+requests in flight from that loop.
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+if TYPE_CHECKING:  # requests is imported on first use
+    import requests
+
+
+# Timeouts (seconds) and pool size for raw HTTP calls
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "120"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+
+# Timeout and retry policy handed to the OpenAI SDK client
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "300"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+
+# Requests in flight per event loop, by backend
+ASYNC_LLM_CONCURRENCY = int(os.getenv("ASYNC_LLM_CONCURRENCY", "16"))
+ASYNC_TTS_CONCURRENCY = int(os.getenv("ASYNC_TTS_CONCURRENCY", "8"))
+
+_lock = threading.Lock()
+_http_session: "Optional[requests.Session]" = None
+_openai_clients: Dict[Tuple[Any, ...], Any] = {}
+# Per event loop: {"http": AsyncClient, "openai": {key: client}, "semaphores": {name: Semaphore}}
+_loop_state: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+
+def http_timeout() -> Tuple[float, float]:
+    """Return the ``(connect, read)`` timeout tuple for ``requests`` calls."""
+    return (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+
+def get_http_session() -> "requests.Session":
+    """Return the process-wide pooled ``requests`` session.
+
+    Nothing is retried here: callers such as the TTS loop own the retry
+    policy for connection failures and 429/5xx alike, so a request is never
+    retried at two layers.
+    """
+    global _http_session
+    with _lock:
+        if _http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE,
+                pool_maxsize=HTTP_POOL_SIZE,
+                max_retries=0,
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
+
+
+def get_openai_client(
+    api_key: str,
+    api_base: str,
+    api_version: str,
+    factory: Optional[Callable[..., Any]] = None,
+):
+    """Return a cached Azure OpenAI client for the given credentials.
+
+    ``factory`` defaults to :class:`openai.AzureOpenAI`; it is part of the
+    cache key so callers constructing different client types never share an
+    instance.
+    """
+    if factory is None:
+        from openai import AzureOpenAI
+
+        factory = AzureOpenAI
+
+    key = (factory, api_key, api_base, api_version)
+    with _lock:
+        client = _openai_clients.get(key)
+        if client is None:
+            client = factory(
+                api_key=api_key,
+                api_version=api_version,
+                azure_endpoint=api_base,
+                timeout=OPENAI_TIMEOUT,
+                max_retries=OPENAI_MAX_RETRIES,
+            )
+            _openai_clients[key] = client
+        return client
+
+
+def reset_clients() -> None:
+    """Close and forget all shared clients (e.g. after credentials change)."""
+    global _http_session
+    with _lock:
+        if _http_session is not None:
+            _http_session.close()
+            _http_session = None
+        for client in _openai_clients.values():
+            close = getattr(client, "close", None)
+            if callable(close):
+                close()
+        _openai_clients.clear()
+
+
+# ---------------------------------------------------------------------------
+# Async clients (one set per running event loop)
+# ---------------------------------------------------------------------------
+
+def httpx_module():
+    """The httpx module the OpenAI SDK is built on (``httpx`` or ``httpx2``)."""
+    try:
+        import httpx
+    except ImportError:
+        import httpx2 as httpx
+    return httpx
+
+
+def _current_loop_state() -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    with _lock:
+        state = _loop_state.get(loop)
+        if state is None:
+            state = {"http": None, "openai": {}, "semaphores": {}}
+            _loop_state[loop] = state
+        return state
+
+
+def get_async_http_client():
+    """Return the pooled async HTTP client of the running event loop.
+
+    As with the ``requests`` session, nothing is retried here; callers handle
+    connection errors and status codes themselves.
+    """
+    state = _current_loop_state()
+    if state["http"] is None:
+        httpx = httpx_module()
+        state["http"] = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+        )
+    return state["http"]
+
+
+def get_async_openai_client(
+    api_key: str,
+    api_base: str,
+    api_version: str,
+    factory: Optional[Callable[..., Any]] = None,
+):
+    """Async :func:`get_openai_client`, shared per running event loop.
+
+    ``factory`` defaults to :class:`openai.AsyncAzureOpenAI`.
+    """
+    if factory is None:
+        from openai import AsyncAzureOpenAI
+
+        factory = AsyncAzureOpenAI
+
+    clients = _current_loop_state()["openai"]
+    key = (factory, api_key, api_base, api_version)
+    client = clients.get(key)
+    if client is None:
+        client = factory(
+            api_key=api_key,
+            api_version=api_version,
+            azure_endpoint=api_base,
+            timeout=OPENAI_TIMEOUT,
+            max_retries=OPENAI_MAX_RETRIES,
+        )
+        clients[key] = client
+    return client
+
+
+def backend_semaphore(name: str, limit: Optional[int] = None) -> asyncio.Semaphore:
+    """Semaphore limiting work on backend ``name`` within the running loop.
+
+    "llm" and "tts" default to ``ASYNC_LLM_CONCURRENCY`` and
+    ``ASYNC_TTS_CONCURRENCY``; other names use ``limit`` (default 1). The
+    limit only applies when the loop first creates the semaphore.
+    """
+    semaphores = _current_loop_state()["semaphores"]
+    semaphore = semaphores.get(name)
+    if semaphore is None:
+        if limit is None:
+            limit = {"llm": ASYNC_LLM_CONCURRENCY, "tts": ASYNC_TTS_CONCURRENCY}.get(name, 1)
+        semaphore = asyncio.Semaphore(max(1, limit))
+        semaphores[name] = semaphore
+    return semaphore
+
+
+async def aclose_clients() -> None:
+    """Close and forget the async clients of the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        state = _loop_state.pop(loop, None)
+    if not state:
+        return
+    if state["http"] is not None:
+        await state["http"].aclose()
+    for client in state["openai"].values():
+        close = getattr(client, "close", None)
+        if callable(close):
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
@@ -4,6 +4,8 @@ from pathlib import Path
 import os
 from datetime import datetime
 
+from core import log_writer
+
 
 def get_project_root() -> Path:
     """Return the root directory of the repository."""
@@ -21,31 +23,37 @@ VIDEO_OUTPUT_FOLDER = os.path.join(
 VOICE_OUTPUT_FOLDER = os.path.join(
     PROJECT_ROOT, "output", "media", "voie", today_date_folder
 )
+# Content-addressed TTS cache; not dated so audio is reused across runs
+VOICE_CACHE_FOLDER = os.path.join(PROJECT_ROOT, "output", "media", "voie", "cache")
 IMAGES_OUTPUT_FOLDER = os.path.join(
     PROJECT_ROOT, "output", "media", "images", today_date_folder
 )
 TEMPLATE_LIBRARY_FOLDER = os.path.join(PROJECT_ROOT, "prompt_library")
 SCRIPT_OUTPUT_FOLDER = os.path.join(PROJECT_ROOT, "output", "script_json")
+LLM_CACHE_FOLDER = os.path.join(SCRIPT_OUTPUT_FOLDER, "cache")
+# Content-addressed sheet PDFs, reused across runs and output names
+PDF_CACHE_FOLDER = os.path.join(PROJECT_ROOT, "output", "pdf_cache")
 BACKGROUND_IMAGE_FOLDER = os.path.join(PROJECT_ROOT, "resources", "background")
 
 
-def debug_print(*args, **kwargs):
-    """Print debug information with a timestamp and store it in a log file."""
-    from datetime import datetime
-    import sys
-    import os
+LOG_FILE_PATH = os.path.join(PROJECT_ROOT, "logs", today_date_folder, "debug_log.txt")
 
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    message = f"[{timestamp}] " + " ".join(map(str, args))
 
-    # Print to console
-    print(message, **kwargs)
-    sys.stdout.flush()
+def debug_print(*args, level: str = "DEBUG", sep: str = " ", end: str = "\n", flush: bool = False):
+    """Print debug information with a timestamp and store it in a log file.
 
-    # Append to log file
-    log_file_path = os.path.join(
-        PROJECT_ROOT, "logs", today_date_folder, "debug_log.txt"
-    )
-    os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
-    with open(log_file_path, "a", encoding="utf-8") as log_file:
-        log_file.write(message + "\n")
+    The line is queued for the background writer in ``core.log_writer``,
+    which batches console and ``logs/<date>/debug_log.txt`` output.
+    ``level`` is one of DEBUG, INFO, WARNING or ERROR (see ``LOG_LEVEL``).
+    ``sep`` and ``end`` work as for ``print``, except that every call is
+    still written as one line; ``flush=True`` waits until the line is
+    written. Other ``print`` arguments such as ``file`` raise ``TypeError``.
+    """
+    sep = " " if sep is None else sep
+    end = "\n" if end is None else end
+    message = sep.join(map(str, args))
+    if end.endswith("\n"):
+        end = end[:-1]
+    log_writer.log(LOG_FILE_PATH, message + end, level)
+    if flush:
+        log_writer.flush()
@@ -0,0 +1,215 @@
+"""Fit extracted Excel data into a token budget for the prompt.
+
+The Excel context is the ``flat_text`` JSON plus the Markdown table of the
+sheet. When both fit ``EXCEL_CONTEXT_TOKEN_BUDGET`` they are used as they
+are. Otherwise the packer shrinks them in order of increasing information
+loss:
+
+1. drop columns that are empty or repeat an earlier column,
+2. render the table without column padding (wide tables are mostly spaces),
+3. keep only the first rows, cutting ``flat_text`` at the same row so both
+   views describe the same part of the sheet.
+
+Tokens are counted with tiktoken for the target model when it is installed,
+otherwise estimated as one token per four characters.
+"""
+
+import json
+import math
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from core.common import debug_print
+from core.excel_utils import markdown_table, stringify_cell
+
+# Tokens allowed for the Excel JSON and Markdown together (0 disables packing)
+EXCEL_CONTEXT_TOKEN_BUDGET = int(os.getenv("EXCEL_CONTEXT_TOKEN_BUDGET", "12000"))
+# Encoding used when tiktoken does not know the deployment name
+TOKENIZER_FALLBACK_ENCODING = os.getenv("TOKENIZER_FALLBACK_ENCODING", "o200k_base")
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: Optional[str]):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    if model:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            pass
+    try:
+        return tiktoken.get_encoding(TOKENIZER_FALLBACK_ENCODING)
+    except Exception:
+        return None
+
+
+def tokenizer_name(model: Optional[str] = None) -> str:
+    """Name of the tokenizer ``count_tokens`` uses for ``model``."""
+    encoding = _encoding(model)
+    return f"tiktoken:{encoding.name}" if encoding is not None else "chars/4"
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Number of tokens in ``text`` for ``model`` (estimated without tiktoken)."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+class PackedContext(NamedTuple):
+    """Excel context that fits the budget and a report of what was removed.
+
+    ``sheet`` holds the columns and rows that were kept, for renderers that
+    need the grid rather than the Markdown (e.g. the PDF attachment).
+    """
+
+    excel_data_json: str
+    markdown: str
+    report: Dict[str, Any]
+    sheet: Dict[str, Any]
+
+
+def _payload_json(sheet_name: str, flat_text: List[str]) -> str:
+    return json.dumps({"sheet_name": sheet_name, "flat_text": flat_text}, ensure_ascii=False, indent=2)
+
+
+def _compact_table(columns: List[List[str]], aligns: List[str]) -> str:
+    """Markdown table without padding; same structure as ``markdown_table``."""
+    header_row = "|" + "|".join(" " for _ in columns) + "|"
+    sep_row = "|" + "|".join("--:" if a == "right" else "---" for a in aligns) + "|"
+    body_rows = ["|" + "|".join(cells) + "|" for cells in zip(*columns)]
+    return "\n".join([header_row, sep_row] + body_rows)
+
+
+def _flat_counts(grid: List[List[Any]]) -> List[int]:
+    """Entries of ``flat_text`` contributed by the first ``r + 1`` rows, per row ``r``."""
+    counts: List[int] = []
+    seen = set()
+    for row in grid:
+        for value in row:
+            if value is None:
+                continue
+            text = (value if isinstance(value, str) else str(value)).strip()
+            if text:
+                seen.add(text)
+        counts.append(len(seen))
+    return counts
+
+
+def pack_excel_context(
+    sheet_data: Dict[str, Any],
+    budget: Optional[int] = None,
+    model: Optional[str] = None,
+) -> PackedContext:
+    """Return the JSON and Markdown of ``sheet_data`` fitted to ``budget`` tokens.
+
+    ``sheet_data`` is a dict from ``extract_sheet_text`` (or the streaming
+    variant). ``budget`` defaults to ``EXCEL_CONTEXT_TOKEN_BUDGET`` and
+    ``model`` to ``OPENAI_DEPLOYMENT_NAME``. The report lists the token count,
+    the dropped columns and how many rows and ``flat_text`` entries were cut.
+    """
+    if budget is None:
+        budget = EXCEL_CONTEXT_TOKEN_BUDGET
+    if model is None:
+        model = os.getenv("OPENAI_DEPLOYMENT_NAME")
+    sheet_name = sheet_data.get("sheet_name", "")
+    flat_text: List[str] = list(sheet_data.get("flat_text", []))
+    markdown: str = sheet_data.get("markdown", "")
+
+    def measure(payload: str, table: str) -> int:
+        return count_tokens(payload, model) + count_tokens(table, model)
+
+    payload = _payload_json(sheet_name, flat_text)
+    report: Dict[str, Any] = {
+        "budget": budget,
+        "tokenizer": tokenizer_name(model),
+        "original_tokens": measure(payload, markdown),
+        "dropped_columns": [],
+        "compact_table": False,
+        "dropped_rows": 0,
+        "dropped_flat_text": 0,
+    }
+    report["tokens"] = report["original_tokens"]
+    if budget <= 0 or report["tokens"] <= budget:
+        return PackedContext(payload, markdown, report, sheet_data)
+
+    labels: List[str] = list(sheet_data.get("columns", []))
+    rows: List[Dict[str, Any]] = list(sheet_data.get("rows", []))
+    grid = [[row.get(label) for label in labels] for row in rows]
+
+    # 1. Empty and duplicate columns carry nothing the model needs
+    columns = [[stringify_cell(v) for v in col] for col in zip(*grid)] if grid else []
+    keep: List[int] = []
+    seen_columns = set()
+    for i, col in enumerate(columns):
+        key = tuple(col)
+        if not any(col) or key in seen_columns:
+            report["dropped_columns"].append(labels[i])
+            continue
+        seen_columns.add(key)
+        keep.append(i)
+    aligns = [
+        "right" if all(isinstance(row[i], (int, float)) for row in grid if row[i] is not None) else "left"
+        for i in keep
+    ]
+    kept_columns = [columns[i] for i in keep]
+
+    def render(n: int) -> str:
+        table = _compact_table if report["compact_table"] else markdown_table
+        return table([c[:n] for c in kept_columns], aligns)
+
+    n_rows = len(grid)
+    if report["dropped_columns"]:
+        markdown = render(n_rows)
+        report["tokens"] = measure(payload, markdown)
+
+    # 2. Unpadded cells
+    if report["tokens"] > budget and kept_columns:
+        report["compact_table"] = True
+        markdown = render(n_rows)
+        report["tokens"] = measure(payload, markdown)
+
+    # 3. Keep the longest prefix of rows that fits
+    if report["tokens"] > budget:
+        counts = _flat_counts(grid)
+
+        def fitted(n: int) -> Tuple[str, str]:
+            if not grid:
+                # Nothing to cut by rows; shorten flat_text alone
+                return _payload_json(sheet_name, flat_text[:n]), markdown
+            limit = counts[n - 1] if n else 0
+            return _payload_json(sheet_name, flat_text[:limit]), render(n)
+
+        lo, hi = 0, n_rows if grid else len(flat_text)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if measure(*fitted(mid)) <= budget:
+                lo = mid
+            else:
+                hi = mid - 1
+        payload, markdown = fitted(lo)
+        if grid:
+            n_rows = lo
+        report["dropped_rows"] = len(grid) - n_rows
+        report["dropped_flat_text"] = len(flat_text) - len(json.loads(payload)["flat_text"])
+        report["tokens"] = measure(payload, markdown)
+
+    debug_print(
+        f"Packed Excel context for {sheet_name}: {report['original_tokens']} -> {report['tokens']} tokens "
+        f"(budget {budget}, {report['tokenizer']}); dropped columns {report['dropped_columns'] or 'none'}, "
+        f"{report['dropped_rows']} rows, {report['dropped_flat_text']} flat_text entries"
+        + (", compact table" if report["compact_table"] else "")
+    )
+    kept_labels = [labels[i] for i in keep]
+    sheet = dict(
+        sheet_data,
+        columns=kept_labels,
+        rows=[{label: row.get(label) for label in kept_labels} for row in rows[:n_rows]],
+        flat_text=json.loads(payload)["flat_text"],
+        markdown=markdown,
+    )
+    return PackedContext(payload, markdown, report, sheet)
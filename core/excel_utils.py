@@ -1,10 +1,27 @@
 """Utilities for reading Excel sheets and exporting their content."""
 
+import math
 import os
-from typing import Any, Dict, List
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple, Union
 
 from core.common import debug_print
 
+if TYPE_CHECKING:  # pandas is imported when a workbook is first parsed
+    import pandas as pd
+
+
+# Row cap for streaming extraction when no flat_text budget stops it earlier
+EXCEL_STREAMING_MAX_ROWS = int(os.getenv("EXCEL_STREAMING_MAX_ROWS", "10000"))
+
+# Number of parsed workbooks kept in memory (each holds all of its sheets)
+EXCEL_WORKBOOK_CACHE_SIZE = int(os.getenv("EXCEL_WORKBOOK_CACHE_SIZE", "4"))
+
+_workbooks: "OrderedDict[Tuple[str, int, int], Dict[str, Any]]" = OrderedDict()
+_workbooks_lock = threading.Lock()
+_workbook_load_locks: Dict[Tuple[str, int, int], threading.Lock] = {}
+
 
 def _engine_for_excel(path: str) -> str:
     """Pick a pandas engine based on file extension.
@@ -20,6 +37,199 @@ def _engine_for_excel(path: str) -> str:
     return None  # type: ignore
 
 
+def stringify_cell(value: Any) -> str:
+    """Render a cell for a Markdown table cell.
+
+    Integral floats are shown as integers (as Excel displays them), newlines
+    become ``<br>`` and pipes are escaped so the table structure survives.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        # pandas uses NaN for missing; treat as empty
+        if math.isnan(value):
+            return ""
+        if math.isfinite(value) and value.is_integer():
+            return str(int(value))
+    s = str(value)
+    if "\r" in s or "\n" in s:
+        # Replace newlines with <br> to keep table structure
+        s = s.replace("\r\n", "\n").replace("\r", "\n").replace("\n", "<br>")
+    # Escape pipe characters which are column separators in Markdown tables
+    return s.replace("|", "\\|")
+
+
+def _col_letter(idx: int) -> str:
+    """Convert a 0-based column index to Excel-like letters (A, ..., Z, AA, ...)."""
+    s = ""
+    n = idx
+    while True:
+        n, r = divmod(n, 26)
+        s = chr(ord('A') + r) + s
+        if n == 0:
+            break
+        n -= 1
+    return s
+
+
+def _column_strings(values: List[Any], present: List[bool]) -> Tuple[List[str], List[str]]:
+    """Stringify one column once, for both the Markdown table and ``flat_text``.
+
+    Returns ``(markdown_cells, flat_cells)``; missing cells are ``""`` in both.
+    ``flat_cells`` keep the plain ``str()`` form (stripped), matching what the
+    LLM sees in ``EXCEL_DATA.flat_text``.
+    """
+    markdown_cells: List[str] = []
+    flat_cells: List[str] = []
+    for value, ok in zip(values, present):
+        if not ok:
+            markdown_cells.append("")
+            flat_cells.append("")
+            continue
+        text = value if isinstance(value, str) else str(value)
+        flat_cells.append(text.strip())
+        markdown_cells.append(stringify_cell(value))
+    return markdown_cells, flat_cells
+
+
+def markdown_table(columns: List[List[str]], aligns: List[str]) -> str:
+    """Build a GitHub-flavored Markdown table from pre-stringified columns.
+
+    The header row is left empty so sheets without headers do not gain fake
+    names like "Unnamed: 0". ``aligns`` holds ``"right"`` or ``"left"`` per
+    column.
+    """
+    # Minimum width of 3 so the separator has at least '---'
+    widths = [max(3, max(map(len, col), default=0)) for col in columns]
+
+    header_row = "| " + " | ".join(" " * w for w in widths) + " |"
+    sep_row = "| " + " | ".join(
+        ("-" * (w - 1) + ":") if align == "right" else "-" * w
+        for w, align in zip(widths, aligns)
+    ) + " |"
+
+    padded = [
+        [s.rjust(w) for s in col] if align == "right" else [s.ljust(w) for s in col]
+        for col, w, align in zip(columns, widths, aligns)
+    ]
+    body_rows = ["| " + " | ".join(cells) + " |" for cells in zip(*padded)]
+    return "\n".join([header_row, sep_row] + body_rows)
+
+
+def _frame_to_sheet_data(df: "pd.DataFrame", sheet_name: str) -> Dict[str, Any]:
+    """Convert a header-less sheet DataFrame into the ``extract_sheet_text`` dict.
+
+    Works column by column: each column is converted to Python values and
+    stringified once, and those strings feed ``rows``, ``flat_text``, the
+    column widths and the Markdown body.
+    """
+    from pandas.api.types import is_numeric_dtype
+
+    n_cols = len(df.columns)
+    column_labels = [_col_letter(i) for i in range(n_cols)]
+    present = df.notna().to_numpy().T.tolist()
+    values = [df.iloc[:, i].tolist() for i in range(n_cols)]
+
+    markdown_columns: List[List[str]] = []
+    flat_columns: List[List[str]] = []
+    for col_values, col_present in zip(values, present):
+        markdown_cells, flat_cells = _column_strings(col_values, col_present)
+        markdown_columns.append(markdown_cells)
+        flat_columns.append(flat_cells)
+
+    # Keep native types for rows; missing cells become None
+    if n_cols:
+        cleaned = [
+            [v if ok else None for v, ok in zip(col_values, col_present)]
+            for col_values, col_present in zip(values, present)
+        ]
+        rows = [dict(zip(column_labels, row)) for row in zip(*cleaned)]
+    else:
+        rows = [{} for _ in range(len(df))]
+
+    # Non-empty, de-duplicated cell strings in row order
+    flat: List[str] = []
+    seen = set()
+    for row_cells in zip(*flat_columns):
+        for text in row_cells:
+            if text and text not in seen:
+                flat.append(text)
+                seen.add(text)
+
+    aligns = [
+        "right" if is_numeric_dtype(df.iloc[:, i]) else "left" for i in range(n_cols)
+    ]
+    markdown = markdown_table(markdown_columns, aligns)
+
+    return {
+        "sheet_name": sheet_name,
+        "columns": column_labels,
+        "rows": rows,
+        "flat_text": flat,
+        "markdown": markdown,
+    }
+
+
+def load_workbook_frames(excel_path: str) -> Dict[str, "pd.DataFrame"]:
+    """Parse every sheet of a workbook once and return ``{sheet_name: DataFrame}``.
+
+    Sheets are read without a header row so the exact grid shape is kept.
+    Parsed workbooks are cached by absolute path, modification time and
+    size (an edited file is parsed again); at most
+    ``EXCEL_WORKBOOK_CACHE_SIZE`` workbooks are kept, least recently used
+    first out. The frames are shared between callers and must not be
+    modified in place.
+    """
+    stat = os.stat(excel_path)
+    key = (os.path.abspath(excel_path), stat.st_mtime_ns, stat.st_size)
+
+    with _workbooks_lock:
+        frames = _workbooks.get(key)
+        if frames is not None:
+            _workbooks.move_to_end(key)
+            return frames
+        load_lock = _workbook_load_locks.setdefault(key, threading.Lock())
+
+    # One thread parses a given workbook; others wait for its result
+    with load_lock:
+        with _workbooks_lock:
+            frames = _workbooks.get(key)
+        if frames is None:
+            import pandas as pd
+
+            debug_print(f"Parsing workbook: {excel_path}")
+            frames = pd.read_excel(
+                excel_path, sheet_name=None, engine=_engine_for_excel(excel_path), header=None
+            )
+            with _workbooks_lock:
+                _workbooks[key] = frames
+                while len(_workbooks) > max(1, EXCEL_WORKBOOK_CACHE_SIZE):
+                    _workbooks.popitem(last=False)
+
+    with _workbooks_lock:
+        _workbook_load_locks.pop(key, None)
+    return frames
+
+
+def clear_workbook_cache() -> None:
+    """Drop all parsed workbooks from memory."""
+    with _workbooks_lock:
+        _workbooks.clear()
+
+
+def _sheet_frame(excel_path: str, sheet_name: Union[str, int]) -> "pd.DataFrame":
+    """Return one header-less sheet from the workbook cache."""
+    frames = load_workbook_frames(excel_path)
+    if isinstance(sheet_name, int):
+        names = list(frames)
+        if not 0 <= sheet_name < len(names):
+            raise ValueError(f"Worksheet index {sheet_name} is invalid, {len(names)} worksheets found")
+        return frames[names[sheet_name]]
+    if sheet_name not in frames:
+        raise ValueError(f"Worksheet named '{sheet_name}' not found")
+    return frames[sheet_name]
+
+
 def extract_sheet_text(excel_path: str, sheet_name: str) -> Dict[str, Any]:
     """Read an Excel sheet and extract row/column data plus Markdown table.
 
@@ -29,245 +239,156 @@ def extract_sheet_text(excel_path: str, sheet_name: str) -> Dict[str, Any]:
       - rows: List[Dict[str, Any]]  (per row values keyed by column name)
       - flat_text: List[str]        (non-empty, de-duplicated cell strings in row order)
       - markdown: str               (GitHub‑flavored Markdown table of the sheet)
+
+    The workbook is parsed once and served from memory for later sheets.
     """
-    import pandas as pd
-    from pandas.api.types import is_numeric_dtype
+    return _frame_to_sheet_data(_sheet_frame(excel_path, sheet_name), sheet_name)
 
-    def _stringify(value: Any) -> str:
-        if value is None:
-            return ""
-        # pandas uses NaN/NaT for missing; treat as empty
+
+def extract_all_sheets(excel_path: str) -> Dict[str, Dict[str, Any]]:
+    """Extract every sheet of a workbook, parsing the file only once.
+
+    Returns ``{sheet_name: extract_sheet_text-style dict}`` in workbook order.
+    """
+    frames = load_workbook_frames(excel_path)
+    return {name: _frame_to_sheet_data(df, name) for name, df in frames.items()}
+
+
+def _xlrd_cell_value(cell: Any, datemode: int) -> Any:
+    """Convert an xlrd cell the way pandas does (integral floats -> int)."""
+    import xlrd
+
+    if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+        return None
+    if cell.ctype == xlrd.XL_CELL_NUMBER:
+        value = cell.value
+        return int(value) if math.isfinite(value) and value.is_integer() else value
+    if cell.ctype == xlrd.XL_CELL_DATE:
         try:
-            import math
-            if isinstance(value, float) and math.isnan(value):
-                return ""
+            return xlrd.xldate.xldate_as_datetime(cell.value, datemode)
         except Exception:
-            pass
-        # Normalize common numeric representations to mimic typical Excel integer display
+            return cell.value
+    if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+        return bool(cell.value)
+    return cell.value or None
+
+
+def iter_sheet_rows(excel_path: str, sheet_name: str) -> Iterator[List[Any]]:
+    """Yield the rows of one sheet lazily as lists of cell values.
+
+    ``.xlsx``/``.xlsm`` files are read with openpyxl in read-only mode, so
+    rows are parsed as they are consumed. ``.xls`` files are opened with
+    xlrd ``on_demand``, which skips the other sheets but still parses the
+    whole requested sheet into memory before the first row is yielded.
+    Blank cells are ``None``; the workbook is closed when the generator
+    finishes or is closed early.
+    """
+    if _engine_for_excel(excel_path) == "xlrd":
+        import xlrd
+
+        book = xlrd.open_workbook(excel_path, on_demand=True)
         try:
-            import math
-            if isinstance(value, float) and math.isfinite(value):
-                if value.is_integer():
-                    return str(int(value))
-        except Exception:
-            pass
-        # Convert to string and normalize newlines for Markdown tables
-        s = str(value)
-        if s is None:
-            return ""
-        # Replace newlines with <br> to keep table structure
-        s = s.replace("\r\n", "\n").replace("\r", "\n").replace("\n", "<br>")
-        # Escape pipe characters which are column separators in Markdown tables
-        s = s.replace("|", "\\|")
-        return s
-
-    def _dataframe_to_markdown(df_in: "pd.DataFrame") -> str:
-        # Ensure string column names
-        df_local = df_in.copy()
-        df_local.columns = [str(c) for c in df_local.columns]
-
-        # Prepare per-column alignment based on dtype (numeric -> right)
-        aligns = [
-            ("right" if is_numeric_dtype(df_local[col]) else "left")
-            for col in df_local.columns
-        ]
+            sheet = book.sheet_by_name(sheet_name)
+            for r in range(sheet.nrows):
+                yield [_xlrd_cell_value(cell, book.datemode) for cell in sheet.row(r)]
+        finally:
+            book.release_resources()
+        return
 
-        # Compute column widths (consider header and all cells as strings)
-        widths: List[int] = []
-        for idx, col in enumerate(df_local.columns):
-            header_len = len(_stringify(col))
-            max_cell_len = header_len
-            if not df_local.empty:
-                for v in df_local[col].tolist():
-                    cell_len = len(_stringify(v))
-                    if cell_len > max_cell_len:
-                        max_cell_len = cell_len
-            # Minimum width of 3 so the separator has at least '---'
-            widths.append(max(3, max_cell_len))
-
-        # Build header row
-        header_cells = []
-        for i, col in enumerate(df_local.columns):
-            text = _stringify(col)
-            header_cells.append(text.ljust(widths[i]))
-        header_row = "| " + " | ".join(header_cells) + " |"
-
-        # Build alignment separator row
-        sep_cells = []
-        for i, align in enumerate(aligns):
-            if align == "right":
-                # ---: for right alignment, width dictates dashes
-                sep = "-" * (widths[i] - 1) + ":"
-            elif align == "center":
-                # :---: (not used by default, but keep logic for completeness)
-                inner = "-" * max(1, widths[i] - 2)
-                sep = ":" + inner + ":"
-            else:
-                # left: ---
-                sep = "-" * widths[i]
-            sep_cells.append(sep)
-        sep_row = "| " + " | ".join(sep_cells) + " |"
-
-        # Build data rows
-        body_rows: List[str] = []
-        for _, row in df_local.iterrows():
-            cells = []
-            for i, col in enumerate(df_local.columns):
-                val = row[col]
-                s = _stringify(val)
-                if aligns[i] == "right":
-                    cells.append(s.rjust(widths[i]))
-                elif aligns[i] == "center":
-                    # center pad (rarely used); approximate by ljust/rjust split
-                    total = widths[i]
-                    left = (total - len(s)) // 2
-                    right = total - len(s) - left
-                    cells.append(" " * left + s + " " * right)
-                else:
-                    cells.append(s.ljust(widths[i]))
-            body_rows.append("| " + " | ".join(cells) + " |")
-
-        parts = [header_row, sep_row]
-        parts.extend(body_rows)
-        return "\n".join(parts)
-
-    engine = _engine_for_excel(excel_path)
-    # Read without treating any row as header to preserve the exact grid shape.
-    df = pd.read_excel(excel_path, sheet_name=sheet_name, engine=engine, header=None)
-
-    # Helper to convert 0-based column index to Excel-like letters (A, B, ..., Z, AA, AB, ...)
-    def _col_letter(idx: int) -> str:
-        s = ""
-        n = idx
-        while True:
-            n, r = divmod(n, 26)
-            s = chr(ord('A') + r) + s
-            if n == 0:
-                break
-            n -= 1
-        return s
+    from openpyxl import load_workbook
 
-    # Keep internal numeric index for markdown; export column labels for metadata
-    column_labels = [_col_letter(i) for i in range(len(df.columns))]
+    book = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        sheet = book[sheet_name]
+        for row in sheet.iter_rows(values_only=True):
+            yield [None if value == "" else value for value in row]
+    finally:
+        book.close()
+
+
+def extract_sheet_text_streaming(
+    excel_path: str,
+    sheet_name: str,
+    flat_text_limit: Optional[int] = None,
+    max_rows: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Memory-bounded variant of :func:`extract_sheet_text`.
+
+    Rows are pulled one at a time from :func:`iter_sheet_rows` and reading
+    stops as soon as ``flat_text`` holds ``flat_text_limit`` entries or
+    ``max_rows`` rows (default ``EXCEL_STREAMING_MAX_ROWS``) were read. For
+    ``.xlsx``/``.xlsm`` memory then depends on the budget rather than the
+    size of the sheet; ``.xls`` sheets are still parsed whole by xlrd, so
+    only the extracted rows are bounded. The returned dict has the same
+    keys as :func:`extract_sheet_text` plus ``truncated`` (whether the sheet
+    had more rows) and ``truncated_by`` (``"flat_text_limit"``,
+    ``"max_rows"`` or ``None``). Cell values keep their own types instead of
+    pandas' per-column dtypes.
+    """
+    if max_rows is None:
+        max_rows = EXCEL_STREAMING_MAX_ROWS
 
-    rows: List[Dict[str, Any]] = []
+    raw_rows: List[List[Any]] = []
     flat: List[str] = []
     seen = set()
-
-    for _, row in df.iterrows():
-        row_dict: Dict[str, Any] = {}
-        for i, col in enumerate(df.columns):
-            val = row[col]
-            # Keep native types but also build flat text list from strings/numbers
-            row_dict[column_labels[i]] = val if (pd.notna(val)) else None
-            if pd.notna(val):
-                if isinstance(val, str):
-                    text = val.strip()
-                else:
-                    # Convert numbers and other simple types to string
-                    text = str(val).strip()
-                if text:
-                    if text not in seen:
-                        flat.append(text)
-                        seen.add(text)
-        rows.append(row_dict)
-
-    # Build markdown with empty header cells so we don't introduce fake names like "Unnamed: 0".
-    def _dataframe_to_markdown_no_header(df_in: "pd.DataFrame") -> str:
-        df_local = df_in.copy()
-        # Determine alignments based on dtype
-        aligns = [
-            ("right" if is_numeric_dtype(df_local[col]) else "left")
-            for col in df_local.columns
-        ]
-
-        # Compute column widths from cell contents only (ignore header)
-        widths: List[int] = []
-        for col in df_local.columns:
-            max_cell_len = 0
-            if not df_local.empty:
-                for v in df_local[col].tolist():
-                    cell_len = len(_stringify(v))
-                    if cell_len > max_cell_len:
-                        max_cell_len = cell_len
-            widths.append(max(3, max_cell_len))
-
-        # Header row with empty labels to mimic sheets without headers
-        header_cells = ["".ljust(w) for w in widths]
-        header_row = "| " + " | ".join(header_cells) + " |"
-
-        # Alignment row
-        sep_cells = []
-        for i, align in enumerate(aligns):
-            if align == "right":
-                sep = "-" * (max(3, widths[i]) - 1) + ":"
-            elif align == "center":
-                inner = "-" * max(1, widths[i] - 2)
-                sep = ":" + inner + ":"
-            else:
-                sep = "-" * max(3, widths[i])
-            sep_cells.append(sep)
-        sep_row = "| " + " | ".join(sep_cells) + " |"
-
-        # Body rows
-        body_rows: List[str] = []
-        for _, row in df_local.iterrows():
-            cells = []
-            for i, col in enumerate(df_local.columns):
-                s = _stringify(row[col])
-                if aligns[i] == "right":
-                    cells.append(s.rjust(widths[i]))
-                elif aligns[i] == "center":
-                    total = widths[i]
-                    left = (total - len(s)) // 2
-                    right = total - len(s) - left
-                    cells.append(" " * left + s + " " * right)
-                else:
-                    cells.append(s.ljust(widths[i]))
-            body_rows.append("| " + " | ".join(cells) + " |")
-
-        return "\n".join([header_row, sep_row] + body_rows)
-
-    markdown = _dataframe_to_markdown_no_header(df)
+    truncated_by: Optional[str] = None
+    rows_iter = iter_sheet_rows(excel_path, sheet_name)
+    try:
+        for row in rows_iter:
+            if flat_text_limit is not None and len(flat) >= flat_text_limit:
+                truncated_by = "flat_text_limit"
+                break
+            if len(raw_rows) >= max_rows:
+                truncated_by = "max_rows"
+                break
+            raw_rows.append(row)
+            for value in row:
+                if value is None:
+                    continue
+                text = (value if isinstance(value, str) else str(value)).strip()
+                if text and text not in seen:
+                    flat.append(text)
+                    seen.add(text)
+    finally:
+        rows_iter.close()
+
+    if flat_text_limit is not None and len(flat) > flat_text_limit:
+        flat = flat[:flat_text_limit]
+        truncated_by = "flat_text_limit"
+
+    # Pad to a rectangular grid (read-only rows may be ragged)
+    n_cols = max((len(r) for r in raw_rows), default=0)
+    grid = [r + [None] * (n_cols - len(r)) for r in raw_rows]
+    column_labels = [_col_letter(i) for i in range(n_cols)]
+
+    columns = [list(col) for col in zip(*grid)] if grid else [[] for _ in range(n_cols)]
+    markdown_columns = [[stringify_cell(v) for v in col] for col in columns]
+    aligns = [
+        "right" if all(isinstance(v, (int, float)) for v in col if v is not None) else "left"
+        for col in columns
+    ]
 
     return {
         "sheet_name": sheet_name,
         "columns": column_labels,
-        "rows": rows,
+        "rows": [dict(zip(column_labels, r)) for r in grid],
         "flat_text": flat,
-        "markdown": markdown,
+        "markdown": markdown_table(markdown_columns, aligns),
+        "truncated": truncated_by is not None,
+        "truncated_by": truncated_by,
     }
 
+
 def export_sheet_pdf(excel_path: str, sheet_name: str, output_pdf: str) -> str:
     """Render an Excel sheet to PDF.
 
-    This helper reads the specified sheet into a DataFrame, converts it to
-    HTML, and then writes that HTML to a PDF file. The output directory is
-    created if it does not already exist.
+    The sheet comes from the workbook cache and is drawn in-process by
+    :func:`core.pdf_export.export_sheet_data_pdf`, which reuses a cached PDF
+    when the sheet content has not changed. The output directory is created
+    if it does not already exist.
 
     Returns the path to the generated PDF.
     """
-    import pandas as pd
-    import os
-
-    # Read the sheet using the appropriate engine
-    engine = _engine_for_excel(excel_path)
-    df = pd.read_excel(excel_path, sheet_name=sheet_name, engine=engine)
-
-    # Convert DataFrame to HTML
-    html = df.to_html(index=False)
-
-    # Ensure output directory exists
-    os.makedirs(os.path.dirname(output_pdf) or ".", exist_ok=True)
-
-    # Attempt to convert HTML to PDF using pdfkit or weasyprint
-    try:
-        import pdfkit
-
-        pdfkit.from_string(html, output_pdf)
-    except Exception:
-        from weasyprint import HTML  # type: ignore
-
-        HTML(string=html).write_pdf(output_pdf)
+    from core.pdf_export import export_sheet_data_pdf
 
-    return output_pdf
+    return export_sheet_data_pdf(extract_sheet_text(excel_path, sheet_name), output_pdf)
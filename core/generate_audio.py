@@ -1,52 +1,258 @@
 """Text-to-speech helpers that turn script paragraphs into audio files."""
 
+import asyncio
 import os
-import requests
+import random
+import threading
+import time
 import json
-from datetime import datetime
-from core.common import VOICE_OUTPUT_FOLDER
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence
+from core.cache import ContentCache, make_cache_key
+from core.clients import (
+    backend_semaphore,
+    get_async_http_client,
+    get_http_session,
+    http_timeout,
+    httpx_module,
+)
+from core.common import VOICE_CACHE_FOLDER, debug_print
+from core.instrumentation import span
 
-def generate_audio_from_script(script, voice="alloy", model="gpt-4o-mini-tts"):
-    """
-    Generate speech audio from a script using Azure OpenAI's text-to-speech API.
-    Returns the path to the saved audio file.
+# Concurrency and retry tuning for the TTS endpoint
+TTS_MAX_CONCURRENCY = int(os.getenv("TTS_MAX_CONCURRENCY", "4"))
+TTS_MAX_RETRIES = int(os.getenv("TTS_MAX_RETRIES", "5"))
+TTS_RETRY_BACKOFF = float(os.getenv("TTS_RETRY_BACKOFF", "1.0"))
+TTS_RETRY_MAX_DELAY = float(os.getenv("TTS_RETRY_MAX_DELAY", "30"))
+
+# Audio cache limits; TTS_CACHE=0 skips lookups (fresh audio still refreshes the cache)
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE", "1") != "0"
+TTS_CACHE_MAX_MB = float(os.getenv("TTS_CACHE_MAX_MB", "2048"))
+TTS_CACHE_MAX_AGE_DAYS = float(os.getenv("TTS_CACHE_MAX_AGE_DAYS", "90"))
+
+# Status codes that indicate throttling or a transient server problem
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+_tts_cache: Optional[ContentCache] = None
+_tts_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> ContentCache:
+    """Return the process-wide audio cache under ``VOICE_CACHE_FOLDER``."""
+    global _tts_cache
+    with _tts_cache_lock:
+        if _tts_cache is None:
+            _tts_cache = ContentCache(
+                VOICE_CACHE_FOLDER,
+                suffix=".mp3",
+                max_bytes=int(TTS_CACHE_MAX_MB * 1024 * 1024),
+                max_age_seconds=TTS_CACHE_MAX_AGE_DAYS * 86400,
+            )
+        return _tts_cache
+
+
+def _retry_delay(attempt: int, response=None) -> float:
+    """Seconds to wait before retry ``attempt`` (0-based).
+
+    Honours a numeric ``Retry-After`` header when the server sends one,
+    otherwise uses exponential backoff with jitter.
     """
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), TTS_RETRY_MAX_DELAY)
+            except ValueError:
+                pass
+    delay = TTS_RETRY_BACKOFF * (2 ** attempt)
+    delay += random.uniform(0, TTS_RETRY_BACKOFF)
+    return min(delay, TTS_RETRY_MAX_DELAY)
+
 
+def _tts_request(script, voice, model):
+    """Return ``(url, headers, payload)`` for a TTS request."""
     # Load env variables
     api_key = os.getenv("OPENAI_TTS_API_KEY")
     api_url = os.getenv("OPENAI_TTS_API_BASE")  # full URL already includes deployment and version
-    deployment = os.getenv("OPENAI_TTS_DEPLOYMENT_NAME")  # for completeness, but not reused directly
 
     if not api_key or not api_url:
         raise RuntimeError("Environment variables OPENAI_TTS_API_KEY and OPENAI_TTS_API_BASE must be set.")
 
-    if not os.path.exists(VOICE_OUTPUT_FOLDER):
-        os.makedirs(VOICE_OUTPUT_FOLDER)
-
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"audio_{timestamp}.mp3"
-    output_path = os.path.join(VOICE_OUTPUT_FOLDER, filename)
-    
-    if os.path.exists(output_path):
-        return output_path
-
-    # Prepare request
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {api_key}"
     }
-
     payload = {
         "model": model,
         "input": script,
         "voice": voice
     }
+    return api_url, headers, payload
 
-    response = requests.post(api_url, headers=headers, data=json.dumps(payload))
 
-    if response.status_code == 200:
-        with open(output_path, "wb") as f:
-            f.write(response.content)
-        return output_path
+def generate_audio_from_script(script, voice="alloy", model="gpt-4o-mini-tts"):
+    """
+    Generate speech audio from a script using Azure OpenAI's text-to-speech API.
+    Returns the path to the saved audio file.
+
+    Results are stored in the content-addressed audio cache, so repeated
+    text is only synthesized once. Throttling (429) and transient server
+    errors (5xx) are retried up to ``TTS_MAX_RETRIES`` times with backoff.
+    """
+    api_url, headers, payload = _tts_request(script, voice, model)
+
+    with span("tts", chars=len(script)) as stage:
+        # Identical text/voice/model/endpoint always yields the same audio
+        cache = get_tts_cache()
+        cache_key = make_cache_key(script, voice, model, api_url)
+        if TTS_CACHE_ENABLED:
+            cached_path = cache.get(cache_key)
+            stage.cache_result(cached_path is not None)
+            if cached_path:
+                return cached_path
+
+        import requests
+
+        body = json.dumps(payload)
+        attempt = 0
+        while True:
+            try:
+                stage.add_bytes(sent=len(body))
+                response = get_http_session().post(
+                    api_url, headers=headers, data=body, timeout=http_timeout()
+                )
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                if attempt >= TTS_MAX_RETRIES:
+                    raise
+                delay = _retry_delay(attempt)
+                debug_print(f"TTS request failed ({exc}); retrying in {delay:.1f}s", level="WARNING")
+            else:
+                stage.add_bytes(received=len(response.content))
+                if response.status_code == 200:
+                    stage.set(attempts=attempt + 1)
+                    return cache.put_bytes(cache_key, response.content)
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= TTS_MAX_RETRIES:
+                    raise Exception(f"Error {response.status_code}: {response.text}")
+                delay = _retry_delay(attempt, response)
+                debug_print(f"TTS returned {response.status_code}; retrying in {delay:.1f}s", level="WARNING")
+            time.sleep(delay)
+            attempt += 1
+
+
+def generate_audio_for_scripts(
+    scripts: Sequence[str],
+    voice: str = "alloy",
+    model: str = "gpt-4o-mini-tts",
+    max_workers: Optional[int] = None,
+    on_result: Optional[Callable[[int, str], None]] = None,
+) -> List[str]:
+    """Synthesize several scripts concurrently.
+
+    At most ``max_workers`` requests are in flight at once (default
+    ``TTS_MAX_CONCURRENCY``). The returned paths are in the same order as
+    ``scripts``; the first failure is re-raised once all workers finish.
+    ``on_result(index, path)`` is called as each script completes, so
+    callers can record progress that survives a later failure.
+    """
+    if max_workers is None:
+        max_workers = TTS_MAX_CONCURRENCY
+    max_workers = max(1, min(max_workers, len(scripts) or 1))
+
+    def synthesize(index: int, script: str) -> str:
+        path = generate_audio_from_script(script, voice=voice, model=model)
+        if on_result is not None:
+            on_result(index, path)
+        return path
+
+    if max_workers == 1:
+        paths = [synthesize(i, s) for i, s in enumerate(scripts)]
     else:
-        raise Exception(f"Error {response.status_code}: {response.text}")
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts") as executor:
+            futures = [executor.submit(synthesize, i, s) for i, s in enumerate(scripts)]
+            paths = [future.result() for future in futures]
+
+    if TTS_CACHE_ENABLED:
+        stats = get_tts_cache().stats()
+        debug_print(
+            f"TTS cache: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['entries']} entries ({stats['bytes'] / (1024 * 1024):.1f} MB)"
+        )
+    return paths
+
+
+# ---------------------------------------------------------------------------
+# Async API
+# ---------------------------------------------------------------------------
+
+async def agenerate_audio_from_script(script, voice="alloy", model="gpt-4o-mini-tts"):
+    """Async :func:`generate_audio_from_script`.
+
+    Uses the event loop's shared async HTTP client; requests from the loop
+    are capped by the "tts" backend semaphore (``ASYNC_TTS_CONCURRENCY``).
+    Retries, caching and errors match the sync version. Cancelling the task
+    aborts the request or the backoff sleep.
+    """
+    api_url, headers, payload = _tts_request(script, voice, model)
+
+    with span("tts", chars=len(script)) as stage:
+        cache = get_tts_cache()
+        cache_key = make_cache_key(script, voice, model, api_url)
+        if TTS_CACHE_ENABLED:
+            cached_path = await asyncio.to_thread(cache.get, cache_key)
+            stage.cache_result(cached_path is not None)
+            if cached_path:
+                return cached_path
+
+        httpx = httpx_module()
+        client = get_async_http_client()
+        body = json.dumps(payload)
+        attempt = 0
+        while True:
+            try:
+                async with backend_semaphore("tts"):
+                    stage.add_bytes(sent=len(body))
+                    response = await client.post(api_url, headers=headers, content=body)
+            except httpx.TransportError as exc:
+                if attempt >= TTS_MAX_RETRIES:
+                    raise
+                delay = _retry_delay(attempt)
+                debug_print(f"TTS request failed ({exc}); retrying in {delay:.1f}s", level="WARNING")
+            else:
+                stage.add_bytes(received=len(response.content))
+                if response.status_code == 200:
+                    stage.set(attempts=attempt + 1)
+                    return await asyncio.to_thread(cache.put_bytes, cache_key, response.content)
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= TTS_MAX_RETRIES:
+                    raise Exception(f"Error {response.status_code}: {response.text}")
+                delay = _retry_delay(attempt, response)
+                debug_print(f"TTS returned {response.status_code}; retrying in {delay:.1f}s", level="WARNING")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+async def agenerate_audio_for_scripts(
+    scripts: Sequence[str],
+    voice: str = "alloy",
+    model: str = "gpt-4o-mini-tts",
+    on_result: Optional[Callable[[int, str], None]] = None,
+) -> List[str]:
+    """Async :func:`generate_audio_for_scripts`; paths are in ``scripts`` order.
+
+    If one script fails, the others are cancelled and the error is raised.
+    ``on_result(index, path)`` is called as each script completes.
+    """
+    async def synthesize(index: int, script: str) -> str:
+        path = await agenerate_audio_from_script(script, voice=voice, model=model)
+        if on_result is not None:
+            on_result(index, path)
+        return path
+
+    tasks = [asyncio.ensure_future(synthesize(i, s)) for i, s in enumerate(scripts)]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
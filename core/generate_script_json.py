@@ -2,78 +2,243 @@
 
 import os
 import argparse
+import asyncio
 import base64
+import hashlib
+import threading
+from collections import OrderedDict
 
-from openai import AzureOpenAI, OpenAI
 import sys
 from datetime import datetime
-from core.common import debug_print
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from core.cache import ContentCache, make_cache_key
+from core.common import debug_print, LLM_CACHE_FOLDER
+from core.image_utils import PreparedImage, prepare_image
+from core.instrumentation import span, start_span
+from core.clients import backend_semaphore, get_async_openai_client, get_openai_client
 
+# Response cache; LLM_CACHE=0 bypasses lookups (fresh responses still refresh the cache)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "720"))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
 
-def invoke_openai(prompt):
-    """
-    Invoke OpenAI API with the given prompt and parameters.
-    Compatible with OpenAI Python SDK v1.0+.
+_llm_cache: Optional[ContentCache] = None
+_llm_cache_lock = threading.Lock()
+
+# Encoded attachments shared by calls that send the same file (e.g. one image in many languages)
+ATTACHMENT_CACHE_SIZE = 16
+_attachments: "OrderedDict[Tuple, Any]" = OrderedDict()
+_attachments_lock = threading.Lock()
+
+
+# Client classes imported from openai on first use; the SDK takes most of a second to import
+_OPENAI_CLASSES = ("AsyncAzureOpenAI", "AzureOpenAI", "OpenAI")
+
+
+def __getattr__(name):
+    if name in _OPENAI_CLASSES:
+        import openai
+
+        value = getattr(openai, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _openai_class(name):
+    # Module globals first so tests can monkeypatch the classes
+    return globals().get(name) or __getattr__(name)
+
+
+def _get_client(api_key, api_base, api_version):
+    """Return the shared AzureOpenAI client for these credentials."""
+    return get_openai_client(api_key, api_base, api_version, factory=_openai_class("AzureOpenAI"))
+
+
+def _get_async_client(api_key, api_base, api_version):
+    """Return the running event loop's shared AsyncAzureOpenAI client."""
+    return get_async_openai_client(api_key, api_base, api_version, factory=_openai_class("AsyncAzureOpenAI"))
+
+
+def get_llm_cache() -> ContentCache:
+    """Return the process-wide LLM response cache under ``LLM_CACHE_FOLDER``."""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = ContentCache(
+                LLM_CACHE_FOLDER,
+                suffix=".txt",
+                max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024),
+                max_age_seconds=LLM_CACHE_TTL_HOURS * 3600,
+            )
+        return _llm_cache
+
+
+def llm_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counters of the LLM response cache."""
+    return get_llm_cache().stats()
+
+
+def _cached_attachment(path: str, kind: str, load: Callable[[bytes], Any]) -> Any:
+    """Return ``load(file bytes)`` for ``path``, reusing earlier reads.
+
+    Entries are keyed by absolute path, modification time and size, so an
+    edited file is read again.
     """
-    # Make sure these are set in your environment or .env
-    api_key     = os.getenv("OPENAI_API_KEY")
-    api_base    = os.getenv("OPENAI_API_BASE")
-    api_version = os.getenv("OPENAI_API_VERSION")
-    model = os.getenv("OPENAI_DEPLOYMENT_NAME")
-    
-    if not all([api_key, api_base, api_version]):
-        raise RuntimeError("Please set OPENAI_API_KEY, OPENAI_API_BASE and OPENAI_API_VERSION")
+    stat = os.stat(path)
+    key = (kind, os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _attachments_lock:
+        cached = _attachments.get(key)
+        if cached is not None:
+            _attachments.move_to_end(key)
+            return cached
+
+    with open(path, "rb") as f:
+        data = f.read()
+    loaded = load(data)
+
+    with _attachments_lock:
+        _attachments[key] = loaded
+        while len(_attachments) > ATTACHMENT_CACHE_SIZE:
+            _attachments.popitem(last=False)
+    return loaded
 
-    client = AzureOpenAI(
-        api_key=api_key,
-        api_version=api_version,
-        azure_endpoint=api_base
+
+def read_attachment(path: str) -> Tuple[str, str]:
+    """Return ``(sha256, base64)`` of a file, reusing earlier reads."""
+    return _cached_attachment(
+        path,
+        "raw",
+        lambda data: (hashlib.sha256(data).hexdigest(), base64.b64encode(data).decode("utf-8")),
     )
 
-    debug_print("Invoking OpenAI API with model:", model)
 
-    response = client.chat.completions.create(
-        model=model,
-        messages=[{"role": "user", "content": prompt}]
+def _read_image(path: str) -> PreparedImage:
+    """Return the upload-ready image for ``path`` (see ``core.image_utils``)."""
+    return _cached_attachment(path, "image", lambda data: prepare_image(data, filename=path))
+
+
+def _request_size(prompt: str, *attachments_b64: str) -> int:
+    """Approximate request body size: prompt plus base64 attachments."""
+    return len(prompt.encode("utf-8")) + sum(len(a) for a in attachments_b64)
+
+
+def _cacheable(key: str, encoded: bytes, finish_reason: Optional[str]) -> bool:
+    """Whether a response may be cached: non-empty and finished with ``stop``.
+
+    Truncated (``length``), filtered or empty responses are returned to the
+    caller but not stored, so the next run asks again.
+    """
+    if finish_reason == "stop" and encoded:
+        return True
+    debug_print(
+        f"Not caching LLM response ({key[:12]}): finish_reason={finish_reason!r}, {len(encoded)} bytes",
+        level="WARNING",
     )
+    return False
 
-    return response.choices[0].message.content
 
+def _cached_completion(
+    key_parts: Sequence[Any],
+    create: Callable[[], Any],
+    use_cache: Optional[bool] = None,
+    request_bytes: int = 0,
+) -> str:
+    """Return the cached response for ``key_parts`` or call ``create``.
 
-def invoke_openai_with_image(prompt, image_path, temperature=0):
+    ``create`` returns the first choice of the completion. ``key_parts``
+    must identify the request completely: endpoint, model, prompt text and
+    hashes of any attached files. ``request_bytes`` is recorded on the
+    ``llm`` span.
     """
-    Invoke OpenAI with a prompt and an image using AzureOpenAI.
+    if use_cache is None:
+        use_cache = LLM_CACHE_ENABLED
+    cache = get_llm_cache()
+    key = make_cache_key("chat.completions", *key_parts)
+    with span("llm") as stage:
+        if use_cache:
+            cached = cache.get_bytes(key)
+            stage.cache_result(cached is not None)
+            if cached is not None:
+                debug_print(f"LLM cache hit ({key[:12]})")
+                return cached.decode("utf-8")
 
-    Args:
-        prompt_text (str): The text prompt to send to OpenAI.
-        image_path (str): Path to the image file to include in the request.
-        model (str): The OpenAI model to use (default: read from env OPENAI_DEPLOYMENT_NAME).
-        temperature (float): Sampling temperature (default: 0).
+        choice = create()
+        content = choice.message.content
+        encoded = (content or "").encode("utf-8")
+        stage.add_bytes(sent=request_bytes, received=len(encoded))
+        if _cacheable(key, encoded, getattr(choice, "finish_reason", None)):
+            cache.put_bytes(key, encoded)
+        return content
 
-    Returns:
-        dict: The response from OpenAI.
+
+def _stream_completion(
+    key_parts: Sequence[Any],
+    create_stream: Callable[[], Iterable[Any]],
+    use_cache: Optional[bool] = None,
+    request_bytes: int = 0,
+) -> Iterator[str]:
+    """Yield the response text for ``key_parts`` as it is generated.
+
+    A cached response is yielded in one piece. Otherwise the content deltas
+    of the streamed chunks are yielded as they arrive and the complete text
+    is stored in the same cache entry the blocking call would use, unless
+    the stream ended without ``finish_reason="stop"`` or with no text.
     """
-    # Read environment variables
+    if use_cache is None:
+        use_cache = LLM_CACHE_ENABLED
+    cache = get_llm_cache()
+    key = make_cache_key("chat.completions", *key_parts)
+    # Not a context manager: the span must not leak into the consumer's context
+    stage = start_span("llm", stream=True)
+    try:
+        if use_cache:
+            cached = cache.get_bytes(key)
+            stage.cache_result(cached is not None)
+            if cached is not None:
+                debug_print(f"LLM cache hit ({key[:12]})")
+                yield cached.decode("utf-8")
+                return
+
+        parts: List[str] = []
+        finish_reason = None
+        for chunk in create_stream():
+            # Azure sends chunks without choices (e.g. content filter results)
+            if not chunk.choices:
+                continue
+            finish_reason = chunk.choices[0].finish_reason or finish_reason
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if not parts:
+                    stage.set(first_token_ms=round(stage.elapsed_ms(), 1))
+                parts.append(delta)
+                yield delta
+        encoded = "".join(parts).encode("utf-8")
+        stage.add_bytes(sent=request_bytes, received=len(encoded))
+        if _cacheable(key, encoded, finish_reason):
+            cache.put_bytes(key, encoded)
+    except Exception as exc:
+        stage.finish(error=exc)
+        raise
+    finally:
+        stage.finish()
+
+
+def _llm_settings(require_model: bool = True) -> Tuple[str, str, str, Optional[str]]:
+    """Return ``(api_key, api_base, api_version, model)`` from the environment."""
     api_key = os.getenv("OPENAI_API_KEY")
     api_base = os.getenv("OPENAI_API_BASE")
     api_version = os.getenv("OPENAI_API_VERSION")
     model = os.getenv("OPENAI_DEPLOYMENT_NAME")
-
-    if not all([api_key, api_base, api_version, model]):
+    if require_model and not all([api_key, api_base, api_version, model]):
         raise RuntimeError("Please set OPENAI_API_KEY, OPENAI_API_BASE, OPENAI_API_VERSION, and OPENAI_DEPLOYMENT_NAME")
+    if not all([api_key, api_base, api_version]):
+        raise RuntimeError("Please set OPENAI_API_KEY, OPENAI_API_BASE and OPENAI_API_VERSION")
+    return api_key, api_base, api_version, model
 
-    client = AzureOpenAI(
-        api_key=api_key,
-        api_version=api_version,
-        azure_endpoint=api_base
-    )
-
-    # Read and encode the image as base64
-    with open(image_path, "rb") as f:
-        img_b64 = base64.b64encode(f.read()).decode("utf-8")
 
-    # Create the input payload
-    input_payload = [
+def _image_messages(prompt: str, image: PreparedImage) -> List[Dict[str, Any]]:
+    return [
         {
             "role": "user",
             "content": [
@@ -81,24 +246,91 @@ def invoke_openai_with_image(prompt, image_path, temperature=0):
                 {
                     "type": "image_url",
                     "image_url": {
-                        "url": f"data:image/png;base64,{img_b64}"
+                        "url": image.data_url
                     }
                 }
             ]
         }
     ]
 
-    # Send the request to OpenAI
-    response = client.chat.completions.create(
-        model=model,
-        messages=input_payload
+
+def _image_and_pdf_messages(prompt: str, image: PreparedImage, pdf_b64: str) -> List[Dict[str, Any]]:
+    messages = _image_messages(prompt, image)
+    messages[0]["content"].append(
+        {
+            "type": "input_pdf",
+            "data": pdf_b64,
+            "mime_type": "application/pdf",
+        }
     )
+    return messages
+
+
+def invoke_openai(prompt, use_cache=None):
+    """
+    Invoke OpenAI API with the given prompt and parameters.
+    Compatible with OpenAI Python SDK v1.0+.
+
+    Responses are cached by endpoint, model and prompt; pass
+    ``use_cache=False`` to force a fresh call.
+    """
+    # Make sure these are set in your environment or .env
+    api_key, api_base, api_version, model = _llm_settings(require_model=False)
+
+    def _create():
+        client = _get_client(api_key, api_base, api_version)
 
-    return response.choices[0].message.content
+        debug_print("Invoking OpenAI API with model:", model)
 
+        response = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}]
+        )
+
+        return response.choices[0]
+
+    return _cached_completion([api_base, model, prompt], _create, use_cache, _request_size(prompt))
+
+
+def invoke_openai_with_image(prompt, image_path, temperature=0, use_cache=None):
+    """
+    Invoke OpenAI with a prompt and an image using AzureOpenAI.
+
+    Args:
+        prompt_text (str): The text prompt to send to OpenAI.
+        image_path (str): Path to the image file to include in the request;
+            it is scaled and re-encoded for upload per ``core.image_utils``.
+        model (str): The OpenAI model to use (default: read from env OPENAI_DEPLOYMENT_NAME).
+        temperature (float): Sampling temperature (default: 0).
+        use_cache (bool): Reuse a cached response for the same prompt and image
+            bytes (default: ``LLM_CACHE_ENABLED``).
+
+    Returns:
+        dict: The response from OpenAI.
+    """
+    # Read environment variables
+    api_key, api_base, api_version, model = _llm_settings()
 
+    # Downscale/encode the image once (shared across calls for the same file)
+    image = _read_image(image_path)
 
-def invoke_openai_with_image_and_pdf(prompt, image_path, pdf_path, temperature=0):
+    def _create():
+        client = _get_client(api_key, api_base, api_version)
+
+        # Send the request to OpenAI
+        response = client.chat.completions.create(
+            model=model,
+            messages=_image_messages(prompt, image)
+        )
+
+        return response.choices[0]
+
+    key_parts = [api_base, model, prompt, image.sha256]
+    return _cached_completion(key_parts, _create, use_cache, _request_size(prompt, image.b64))
+
+
+
+def invoke_openai_with_image_and_pdf(prompt, image_path, pdf_path, temperature=0, use_cache=None):
     """Invoke OpenAI with a prompt, an image, and a PDF document.
 
     This helper mirrors :func:`invoke_openai_with_image` but includes an
@@ -112,53 +344,156 @@ def invoke_openai_with_image_and_pdf(prompt, image_path, pdf_path, temperature=0
     prompt : str
         Text prompt sent to the model.
     image_path : str
-        Path to an image that will be base64 encoded and attached.
+        Path to an image that will be prepared for upload (see
+        ``core.image_utils``), base64 encoded and attached.
     pdf_path : str
         Path to a PDF file that will be base64 encoded and attached.
     temperature : float, optional
         Sampling temperature, by default 0.
+    use_cache : bool, optional
+        Reuse a cached response keyed by the prompt and the SHA-256 of both
+        attachments, by default ``LLM_CACHE_ENABLED``.
     """
-    api_key = os.getenv("OPENAI_API_KEY")
-    api_base = os.getenv("OPENAI_API_BASE")
-    api_version = os.getenv("OPENAI_API_VERSION")
-    model = os.getenv("OPENAI_DEPLOYMENT_NAME")
+    api_key, api_base, api_version, model = _llm_settings()
+
+    # Encode image and PDF as base64 strings (shared across calls for the same files)
+    image = _read_image(image_path)
+    pdf_sha, pdf_b64 = read_attachment(pdf_path)
+
+    def _create():
+        client = _get_client(api_key, api_base, api_version)
+        messages = _image_and_pdf_messages(prompt, image, pdf_b64)
+        response = client.chat.completions.create(model=model, messages=messages)
+        return response.choices[0]
+
+    key_parts = [api_base, model, prompt, image.sha256, pdf_sha]
+    return _cached_completion(key_parts, _create, use_cache, _request_size(prompt, image.b64, pdf_b64))
+
+
+# ---------------------------------------------------------------------------
+# Streaming variants: yield the response text as it is generated. They share
+# the response cache with the blocking calls above.
+# ---------------------------------------------------------------------------
 
-    if not all([api_key, api_base, api_version, model]):
-        raise RuntimeError(
-            "Please set OPENAI_API_KEY, OPENAI_API_BASE, OPENAI_API_VERSION, and OPENAI_DEPLOYMENT_NAME"
+def invoke_openai_stream(prompt, use_cache=None):
+    """Streaming :func:`invoke_openai`; yields text deltas."""
+    api_key, api_base, api_version, model = _llm_settings(require_model=False)
+
+    def _create_stream():
+        client = _get_client(api_key, api_base, api_version)
+        messages = [{"role": "user", "content": prompt}]
+        return client.chat.completions.create(model=model, messages=messages, stream=True)
+
+    return _stream_completion([api_base, model, prompt], _create_stream, use_cache, _request_size(prompt))
+
+
+def invoke_openai_with_image_stream(prompt, image_path, temperature=0, use_cache=None):
+    """Streaming :func:`invoke_openai_with_image`; yields text deltas."""
+    api_key, api_base, api_version, model = _llm_settings()
+    image = _read_image(image_path)
+
+    def _create_stream():
+        client = _get_client(api_key, api_base, api_version)
+        messages = _image_messages(prompt, image)
+        return client.chat.completions.create(model=model, messages=messages, stream=True)
+
+    key_parts = [api_base, model, prompt, image.sha256]
+    return _stream_completion(key_parts, _create_stream, use_cache, _request_size(prompt, image.b64))
+
+
+def invoke_openai_with_image_and_pdf_stream(prompt, image_path, pdf_path, temperature=0, use_cache=None):
+    """Streaming :func:`invoke_openai_with_image_and_pdf`; yields text deltas."""
+    api_key, api_base, api_version, model = _llm_settings()
+    image = _read_image(image_path)
+    pdf_sha, pdf_b64 = read_attachment(pdf_path)
+
+    def _create_stream():
+        client = _get_client(api_key, api_base, api_version)
+        messages = _image_and_pdf_messages(prompt, image, pdf_b64)
+        return client.chat.completions.create(model=model, messages=messages, stream=True)
+
+    key_parts = [api_base, model, prompt, image.sha256, pdf_sha]
+    return _stream_completion(key_parts, _create_stream, use_cache, _request_size(prompt, image.b64, pdf_b64))
+
+
+
+# ---------------------------------------------------------------------------
+# Async variants: the same requests and cache entries through AsyncAzureOpenAI.
+# Calls from one event loop are capped by the "llm" backend semaphore
+# (ASYNC_LLM_CONCURRENCY); cancelling the task aborts the request.
+# ---------------------------------------------------------------------------
+
+async def _acached_completion(
+    key_parts: Sequence[Any],
+    acreate: Callable[[], Awaitable[Any]],
+    use_cache: Optional[bool] = None,
+    request_bytes: int = 0,
+) -> str:
+    """Async :func:`_cached_completion`; cache file I/O runs off the event loop."""
+    if use_cache is None:
+        use_cache = LLM_CACHE_ENABLED
+    cache = get_llm_cache()
+    key = make_cache_key("chat.completions", *key_parts)
+    with span("llm") as stage:
+        if use_cache:
+            cached = await asyncio.to_thread(cache.get_bytes, key)
+            stage.cache_result(cached is not None)
+            if cached is not None:
+                debug_print(f"LLM cache hit ({key[:12]})")
+                return cached.decode("utf-8")
+
+        async with backend_semaphore("llm"):
+            choice = await acreate()
+        content = choice.message.content
+        encoded = (content or "").encode("utf-8")
+        stage.add_bytes(sent=request_bytes, received=len(encoded))
+        if _cacheable(key, encoded, getattr(choice, "finish_reason", None)):
+            await asyncio.to_thread(cache.put_bytes, key, encoded)
+        return content
+
+
+async def ainvoke_openai(prompt, use_cache=None):
+    """Async :func:`invoke_openai`."""
+    api_key, api_base, api_version, model = _llm_settings(require_model=False)
+
+    async def _acreate():
+        client = _get_async_client(api_key, api_base, api_version)
+        response = await client.chat.completions.create(
+            model=model, messages=[{"role": "user", "content": prompt}]
         )
+        return response.choices[0]
 
-    client = AzureOpenAI(
-        api_key=api_key,
-        api_version=api_version,
-        azure_endpoint=api_base,
-    )
+    return await _acached_completion([api_base, model, prompt], _acreate, use_cache, _request_size(prompt))
 
-    # Encode image and PDF as base64 strings
-    with open(image_path, "rb") as f:
-        img_b64 = base64.b64encode(f.read()).decode("utf-8")
 
-    with open(pdf_path, "rb") as f:
-        pdf_b64 = base64.b64encode(f.read()).decode("utf-8")
+async def ainvoke_openai_with_image(prompt, image_path, temperature=0, use_cache=None):
+    """Async :func:`invoke_openai_with_image`."""
+    api_key, api_base, api_version, model = _llm_settings()
+    image = await asyncio.to_thread(_read_image, image_path)
 
-    input_payload = [
-        {
-            "role": "user",
-            "content": [
-                {"type": "text", "text": prompt},
-                {
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/png;base64,{img_b64}"},
-                },
-                {
+    async def _acreate():
+        client = _get_async_client(api_key, api_base, api_version)
+        response = await client.chat.completions.create(
+            model=model, messages=_image_messages(prompt, image)
+        )
+        return response.choices[0]
 
-                    "type": "input_pdf",
-                    "data": pdf_b64,
-                    "mime_type": "application/pdf",
-                },
-            ],
-        }
-    ]
+    key_parts = [api_base, model, prompt, image.sha256]
+    return await _acached_completion(key_parts, _acreate, use_cache, _request_size(prompt, image.b64))
+
+
+async def ainvoke_openai_with_image_and_pdf(prompt, image_path, pdf_path, temperature=0, use_cache=None):
+    """Async :func:`invoke_openai_with_image_and_pdf`."""
+    api_key, api_base, api_version, model = _llm_settings()
+    image = await asyncio.to_thread(_read_image, image_path)
+    pdf_sha, pdf_b64 = await asyncio.to_thread(read_attachment, pdf_path)
+
+    async def _acreate():
+        client = _get_async_client(api_key, api_base, api_version)
+        response = await client.chat.completions.create(
+            model=model, messages=_image_and_pdf_messages(prompt, image, pdf_b64)
+        )
+        return response.choices[0]
 
-    response = client.chat.completions.create(model=model, messages=input_payload)
-    return response.choices[0].message.content
+    key_parts = [api_base, model, prompt, image.sha256, pdf_sha]
+    return await _acached_completion(key_parts, _acreate, use_cache, _request_size(prompt, image.b64, pdf_b64))
@@ -1,76 +1,589 @@
 """Render a video by overlaying text onto an image background with audio."""
 
+import hashlib
+import json
 import os
+import shutil
+import subprocess
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from core.common import VIDEO_OUTPUT_FOLDER
-from moviepy.editor import (
-    TextClip,
-    AudioFileClip,
-    ImageClip,
-    CompositeVideoClip,
-    concatenate_videoclips,
-)
-
-def generate_video_for_paragraphs(text_audio_mapping, background_image_path=None, output_path=None):
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from core.cache import make_cache_key
+from core.common import VIDEO_OUTPUT_FOLDER, debug_print
+from core.instrumentation import span
+
+if TYPE_CHECKING:  # numpy and moviepy are imported when a video is rendered
+    import numpy as np
+
+# moviepy classes, imported from their own modules on first use; moviepy.editor
+# also loads IPython and the preview helpers, which rendering never needs
+_MOVIEPY_NAMES = {
+    "TextClip": "moviepy.video.VideoClip",
+    "ImageClip": "moviepy.video.VideoClip",
+    "AudioFileClip": "moviepy.audio.io.AudioFileClip",
+    "concatenate_videoclips": "moviepy.video.compositing.concatenate",
+}
+
+# Caption styling; CAPTION_FONT falls back to ImageMagick's default font
+CAPTION_FONT_SIZE = int(os.getenv("CAPTION_FONT_SIZE", "70"))
+CAPTION_COLOR = os.getenv("CAPTION_COLOR", "white")
+CAPTION_FONT = os.getenv("CAPTION_FONT") or None
+# Rasterized captions kept in memory; each is a full-width RGB image plus a
+# uint8 mask (about 1-2 MB at 1920 px wide)
+CAPTION_CACHE_SIZE = int(os.getenv("CAPTION_CACHE_SIZE", "32"))
+
+# Encoding settings shared by every segment so they can be joined without re-encoding
+VIDEO_FPS = 24
+VIDEO_CODEC = "libx264"
+AUDIO_CODEC = "aac"
+AUDIO_FPS = 44100
+SEGMENT_FFMPEG_PARAMS = ["-pix_fmt", "yuv420p"]
+
+# "standard" encodes at VIDEO_FPS with default x264 settings; "static" is tuned
+# for slides that never move: a low frame rate, -tune stillimage and one
+# keyframe per segment plus one every VIDEO_STATIC_KEYFRAME_SECONDS for seeking
+VIDEO_RENDER_PROFILE = os.getenv("VIDEO_RENDER_PROFILE", "standard")
+VIDEO_STATIC_FPS = int(os.getenv("VIDEO_STATIC_FPS", "2"))
+VIDEO_STATIC_KEYFRAME_SECONDS = int(os.getenv("VIDEO_STATIC_KEYFRAME_SECONDS", "10"))
+VIDEO_PRESET = os.getenv("VIDEO_PRESET", "medium")
+VIDEO_CRF = int(os.getenv("VIDEO_CRF", "23"))
+# Static profile only: encode the composed still straight from a PNG with ffmpeg
+VIDEO_STILL_DIRECT = os.getenv("VIDEO_STILL_DIRECT", "1") != "0"
+
+# Segment workers: 0 encodes in this process, -1 uses every core
+VIDEO_RENDER_WORKERS = int(os.getenv("VIDEO_RENDER_WORKERS", "0"))
+VIDEO_SEGMENT_RETRIES = int(os.getenv("VIDEO_SEGMENT_RETRIES", "1"))
+
+# Keep per-paragraph segments next to the output so reruns only re-encode changes
+VIDEO_INCREMENTAL = os.getenv("VIDEO_INCREMENTAL", "1") != "0"
+SEGMENT_MANIFEST_VERSION = 1
+
+
+def __getattr__(name):
+    if name in _MOVIEPY_NAMES:
+        import importlib
+
+        value = getattr(importlib.import_module(_MOVIEPY_NAMES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _moviepy(name):
+    # Module globals first so tests can monkeypatch the classes
+    return globals().get(name) or __getattr__(name)
+
+
+@lru_cache(maxsize=CAPTION_CACHE_SIZE)
+def _render_caption(
+    text: str, fontsize: int, color: str, width: int, font: Optional[str] = None
+) -> "Tuple[np.ndarray, np.ndarray]":
+    """Rasterize a word-wrapped caption once and return ``(rgb, mask)``.
+
+    ``TextClip`` shells out to ImageMagick, so identical captions (same text,
+    font, size, colour and wrap width) are served from this cache. The mask
+    is stored as uint8 (0-255) to keep cached entries small. The returned
+    arrays are shared and must not be modified.
+    """
+    import numpy as np
+
+    kwargs = {"font": font} if font else {}
+    with span("caption", chars=len(text)):
+        clip = _moviepy("TextClip")(text, fontsize=fontsize, color=color, method='caption',
+                                    size=(width, None), align='center', **kwargs)
+        rgb = clip.get_frame(0)
+        if clip.mask is not None:
+            mask = np.rint(clip.mask.get_frame(0) * 255).astype(np.uint8)
+        else:
+            mask = np.full(rgb.shape[:2], 255, dtype=np.uint8)
+        clip.close()
+    return rgb, mask
+
+
+def _compose_still(background: "np.ndarray", caption: "np.ndarray", mask: "np.ndarray") -> "np.ndarray":
+    """Alpha-blend ``caption`` centred over ``background`` into a new frame.
+
+    ``mask`` is the caption's uint8 alpha (255 = opaque).
+    """
+    import numpy as np
+
+    bg_h, bg_w = background.shape[:2]
+    cap_h, cap_w = caption.shape[:2]
+    x = int(bg_w / 2 - cap_w / 2)
+    y = int(bg_h / 2 - cap_h / 2)
+
+    # Crop the caption to the part that lands inside the background
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(bg_w, x + cap_w), min(bg_h, y + cap_h)
+    frame = background[:, :, :3].astype(np.float32)
+    if x1 <= x0 or y1 <= y0:
+        return frame.astype(np.uint8)
+
+    cap = caption[y0 - y:y1 - y, x0 - x:x1 - x, :3].astype(np.float32)
+    alpha = mask[y0 - y:y1 - y, x0 - x:x1 - x, np.newaxis].astype(np.float32) / 255
+    region = frame[y0:y1, x0:x1]
+    frame[y0:y1, x0:x1] = alpha * cap + (1 - alpha) * region
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def _even_frame(frame: "np.ndarray") -> "np.ndarray":
+    """Pad ``frame`` to even width and height by repeating its last row/column.
+
+    Segments are encoded as yuv420p, which libx264 only accepts for even
+    dimensions; odd-sized screenshots would otherwise fail to encode.
+    """
+    import numpy as np
+
+    pad_h, pad_w = frame.shape[0] % 2, frame.shape[1] % 2
+    if not pad_h and not pad_w:
+        return frame
+    return np.pad(frame, ((0, pad_h), (0, pad_w)) + ((0, 0),) * (frame.ndim - 2), mode="edge")
+
+
+def _load_background(background_image_path: Optional[str]) -> "np.ndarray":
+    """Return the background frame (even-sized); black 1280x720 if the image is missing."""
+    # Use black background if image not provided or not found
+    if not background_image_path or not os.path.exists(background_image_path):
+        import numpy as np
+
+        return np.zeros((720, 1280, 3), dtype=np.uint8)
+    # Workers are long-lived, so key the cache by the file's state as well:
+    # a background rewritten in place is decoded again
+    stat = os.stat(background_image_path)
+    return _read_background(background_image_path, stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=4)
+def _read_background(path: str, mtime_ns: int, size: int) -> "np.ndarray":
+    return _even_frame(_moviepy("ImageClip")(path).get_frame(0))
+
+
+def _slide_frame(text: str, background: "np.ndarray") -> "np.ndarray":
+    """Background + caption for one paragraph, composed once."""
+    if not text:
+        return background
+    caption, mask = _render_caption(
+        text, CAPTION_FONT_SIZE, CAPTION_COLOR, background.shape[1], CAPTION_FONT
+    )
+    return _compose_still(background, caption, mask)
+
+
+def encoding_profile(name: Optional[str] = None) -> Dict[str, Any]:
+    """Frame rate and x264 arguments for a render profile.
+
+    ``name`` defaults to ``VIDEO_RENDER_PROFILE``; unknown names raise
+    ``ValueError``.
+    """
+    name = name or VIDEO_RENDER_PROFILE
+    if name == "standard":
+        return {"name": name, "fps": VIDEO_FPS, "ffmpeg_params": list(SEGMENT_FFMPEG_PARAMS), "direct": False}
+    if name == "static":
+        fps = max(1, VIDEO_STATIC_FPS)
+        return {
+            "name": name,
+            "fps": fps,
+            "ffmpeg_params": SEGMENT_FFMPEG_PARAMS + [
+                "-tune", "stillimage",
+                "-preset", VIDEO_PRESET,
+                "-crf", str(VIDEO_CRF),
+                "-profile:v", "high",
+                "-g", str(fps * max(1, VIDEO_STATIC_KEYFRAME_SECONDS)),
+            ],
+            "direct": VIDEO_STILL_DIRECT,
+        }
+    raise ValueError(f"Unknown render profile: {name}")
+
+
+def _encode_still_direct(still: "np.ndarray", audio_path: str, duration: float,
+                         output_path: str, profile: Dict[str, Any]) -> None:
+    """Encode a looped still PNG plus audio with a single ffmpeg call."""
+    from PIL import Image
+
+    still_path = output_path + ".still.png"
+    Image.fromarray(still).save(still_path)
+    command = [
+        _ffmpeg_binary(), "-y", "-loglevel", "error",
+        "-loop", "1", "-framerate", str(profile["fps"]), "-i", still_path,
+        "-i", audio_path, "-map", "0:v", "-map", "1:a", "-t", f"{duration:.3f}",
+        "-c:v", VIDEO_CODEC, *profile["ffmpeg_params"], "-r", str(profile["fps"]),
+        # Stereo at AUDIO_FPS, matching what moviepy writes for the other path
+        "-c:a", AUDIO_CODEC, "-ar", str(AUDIO_FPS), "-ac", "2", "-f", "mp4", output_path,
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True)
+    finally:
+        os.remove(still_path)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg still encode failed: {result.stderr.strip()}")
+
+
+def _encode_segment(spec: Dict[str, Any]) -> str:
+    """Encode one paragraph into its own MP4 (process-pool entry point).
+
+    Every segment uses the same codec, frame rate, pixel format and audio
+    rate so the results can be concatenated with a stream copy. The file is
+    written under a temporary name and renamed when complete.
+    """
+    profile = encoding_profile(spec.get("profile"))
+    with span("encode", index=spec["index"], profile=profile["name"]) as stage:
+        background = _load_background(spec["background_image_path"])
+        still = _slide_frame(spec["text"], background)
+        audio_clip = _moviepy("AudioFileClip")(spec["audio_file_path"])
+
+        output_path = spec["output_path"]
+        partial_path = output_path + ".part.mp4"
+        if profile["direct"]:
+            duration = audio_clip.duration
+            audio_clip.close()
+            _encode_still_direct(still, spec["audio_file_path"], duration, partial_path, profile)
+        else:
+            clip = _moviepy("ImageClip")(still).set_duration(audio_clip.duration).set_audio(audio_clip)
+            clip.write_videofile(
+                partial_path,
+                fps=profile["fps"],
+                codec=VIDEO_CODEC,
+                audio_codec=AUDIO_CODEC,
+                audio_fps=AUDIO_FPS,
+                ffmpeg_params=profile["ffmpeg_params"],
+                temp_audiofile=output_path + ".audio.m4a",
+                logger=None,
+            )
+            clip.close()
+            audio_clip.close()
+        os.replace(partial_path, output_path)
+        stage.add_bytes(received=os.path.getsize(output_path))
+    return output_path
+
+
+def _ffmpeg_binary() -> str:
+    from moviepy.config import get_setting
+
+    return get_setting("FFMPEG_BINARY")
+
+
+def concat_segments(segment_paths: List[str], output_path: str) -> str:
+    """Join segments with ffmpeg's concat demuxer without re-encoding."""
+    list_path = output_path + ".concat.txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    command = [
+        _ffmpeg_binary(), "-y", "-loglevel", "error",
+        "-f", "concat", "-safe", "0", "-i", list_path,
+        "-c", "copy", "-movflags", "+faststart", output_path,
+    ]
+    try:
+        with span("concat", segments=len(segment_paths)):
+            result = subprocess.run(command, capture_output=True, text=True)
+    finally:
+        os.remove(list_path)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg concat failed: {result.stderr.strip()}")
+    return output_path
+
+
+def _submit_segments(executor: ProcessPoolExecutor, specs: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], Future]]:
+    """Submit ``specs`` to ``executor``; if the pool is broken, their futures fail."""
+    results = []
+    for spec in specs:
+        try:
+            future = executor.submit(_encode_segment, spec)
+        except BrokenProcessPool as exc:
+            future = Future()
+            future.set_exception(exc)
+        results.append((spec, future))
+    return results
+
+
+def _render_segments(specs: List[Dict[str, Any]], workers: int,
+                     on_encoded: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+    """Encode ``specs``, retrying failed segments on their own.
+
+    With ``workers > 1`` segments are encoded in a process pool, otherwise
+    one after another in this process. If a pool worker dies, the segments
+    it took down with it are retried in a fresh pool. ``on_encoded(spec)``
+    is called for each segment as soon as it is written.
+    """
+    pending = list(specs)
+    attempt = 0
+    pool_size = min(workers, len(specs))
+    executor = ProcessPoolExecutor(max_workers=pool_size) if workers > 1 else None
+    try:
+        while pending:
+            failed = []
+            broken = False
+            if executor is not None:
+                results = _submit_segments(executor, pending)
+            else:
+                results = [(spec, None) for spec in pending]
+            for spec, future in results:
+                try:
+                    future.result() if future is not None else _encode_segment(spec)
+                except Exception as exc:
+                    debug_print(f"Segment {spec['index']} failed: {exc}", level="WARNING")
+                    broken = broken or isinstance(exc, BrokenProcessPool)
+                    failed.append(spec)
+                    continue
+                if on_encoded is not None:
+                    on_encoded(spec)
+            if failed and attempt >= VIDEO_SEGMENT_RETRIES:
+                indices = [spec["index"] for spec in failed]
+                raise RuntimeError(f"Rendering failed for segments {indices}")
+            if broken:
+                # A broken pool accepts no more work; retry in a new one
+                executor.shutdown(wait=False)
+                executor = ProcessPoolExecutor(max_workers=min(pool_size, len(failed)))
+            pending = failed
+            attempt += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def _file_digest(path: str) -> str:
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _render_settings(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Every setting that changes how a segment looks or is encoded."""
+    return {
+        "profile": profile,
+        "codec": VIDEO_CODEC,
+        "audio_codec": AUDIO_CODEC,
+        "audio_fps": AUDIO_FPS,
+        "caption": [CAPTION_FONT_SIZE, CAPTION_COLOR, CAPTION_FONT],
+    }
+
+
+def segment_manifest_path(output_path: str) -> str:
+    return output_path + ".segments.json"
+
+
+def _load_segment_manifest(output_path: str) -> Dict[str, Any]:
+    try:
+        with open(segment_manifest_path(output_path), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != SEGMENT_MANIFEST_VERSION:
+        return {}
+    return manifest
+
+
+def _save_segment_manifest(output_path: str, manifest: Dict[str, Any]) -> None:
+    path = segment_manifest_path(output_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class SegmentPlan:
+    """Naming, reuse and stitching of the per-paragraph segments of one video.
+
+    Each segment is named after a hash of its text, audio content,
+    background and render settings, and the list used for the output is
+    recorded in ``<output>.segments.json``. A segment whose file already
+    exists does not need encoding, and the concat is skipped entirely when
+    the output was already built from the same segments.
+    """
+
+    def __init__(self, output_path: str, background_image_path: Optional[str] = None,
+                 profile: Optional[str] = None):
+        self.output_path = output_path
+        self.background_image_path = background_image_path
+        self.segment_dir = os.path.splitext(output_path)[0] + "_segments"
+        os.makedirs(self.segment_dir, exist_ok=True)
+
+        self.profile = encoding_profile(profile)
+        self.settings = _render_settings(self.profile)
+        if background_image_path and os.path.exists(background_image_path):
+            self.background_digest = _file_digest(background_image_path)
+        else:
+            self.background_digest = "black"
+        self._audio_digests: Dict[str, str] = {}
+
+    def spec(self, index: int, para: Dict[str, Any]) -> Dict[str, Any]:
+        """Segment spec for paragraph ``index`` (see ``_encode_segment``)."""
+        audio_path = para["audio_file_path"]
+        if audio_path not in self._audio_digests:
+            self._audio_digests[audio_path] = _file_digest(audio_path)
+        text = para.get("text_to_be_rendered", "")
+        segment_hash = make_cache_key(
+            text, self._audio_digests[audio_path], self.background_digest, self.settings
+        )
+        return {
+            "index": index,
+            "hash": segment_hash,
+            "text": text,
+            "audio_file_path": audio_path,
+            "background_image_path": self.background_image_path,
+            "profile": self.profile["name"],
+            "output_path": os.path.join(self.segment_dir, f"segment_{segment_hash[:24]}.mp4"),
+        }
+
+    @staticmethod
+    def is_encoded(spec: Dict[str, Any]) -> bool:
+        return os.path.exists(spec["output_path"])
+
+    def stitch(self, specs: List[Dict[str, Any]], keep_segments: bool = True) -> str:
+        """Concat encoded ``specs`` into the output unless it is already up to date.
+
+        With ``keep_segments=False`` the segments and manifest are removed
+        afterwards; otherwise only segments no longer in ``specs`` are.
+        """
+        output_path = self.output_path
+        hashes = [spec["hash"] for spec in specs]
+        previous = _load_segment_manifest(output_path)
+        newest_segment = max(os.path.getmtime(spec["output_path"]) for spec in specs)
+        up_to_date = (
+            previous.get("segments") == hashes
+            and os.path.exists(output_path)
+            and os.path.getmtime(output_path) >= newest_segment
+        )
+        if not up_to_date:
+            concat_segments([spec["output_path"] for spec in specs], output_path)
+            _save_segment_manifest(output_path, {"version": SEGMENT_MANIFEST_VERSION, "segments": hashes})
+
+        if not keep_segments:
+            shutil.rmtree(self.segment_dir, ignore_errors=True)
+            os.remove(segment_manifest_path(output_path))
+            return output_path
+
+        # Drop segments that are no longer part of the video
+        keep = {os.path.basename(spec["output_path"]) for spec in specs}
+        for name in os.listdir(self.segment_dir):
+            if name not in keep:
+                try:
+                    os.remove(os.path.join(self.segment_dir, name))
+                except OSError:
+                    pass
+        return output_path
+
+
+def _render_segmented(paragraphs, background_image_path, output_path, workers, keep_segments=True,
+                      profile=None, on_segment=None) -> str:
+    """Encode the segments that are missing, then stitch them into ``output_path``."""
+    plan = SegmentPlan(output_path, background_image_path, profile)
+    specs = [plan.spec(i, para) for i, para in enumerate(paragraphs)]
+
+    # Identical paragraphs share one segment file, so encode each hash once
+    todo, queued = [], set()
+    for spec in specs:
+        if plan.is_encoded(spec):
+            if on_segment is not None:
+                on_segment(spec)
+        elif spec["hash"] not in queued:
+            queued.add(spec["hash"])
+            todo.append(spec)
+    debug_print(f"Segments: {len(specs)} in video, {len(todo)} to encode")
+
+    def encoded(done: Dict[str, Any]) -> None:
+        for spec in specs:
+            if spec["hash"] == done["hash"] and on_segment is not None:
+                on_segment(spec)
+
+    if todo:
+        _render_segments(todo, workers, on_encoded=encoded)
+    return plan.stitch(specs, keep_segments=keep_segments)
+
+
+def generate_video_for_paragraphs(text_audio_mapping, background_image_path=None, output_path=None, workers=None,
+                                  incremental=None, profile=None, on_segment=None):
     """
     Generate a video using a provided background image with the same resolution.
     Text from paragraphs is rendered on top of the background image for the duration of its audio.
 
+    Each paragraph becomes one still frame (background + caption, composed
+    once) shown for the length of its audio, so no per-frame compositing
+    happens during encoding.
+
     Args:
         text_audio_mapping (dict): A dict with key "paragraphs", a list of dicts each containing:
             - "text_to_be_rendered": str, the text to display
             - "audio_file_path": str, path to the audio file
         background_image_path (str, optional): Path to the background image file. If None, uses black background.
         output_path (str, optional): Path to save the output video. If None, a timestamped file is created in VIDEO_OUTPUT_FOLDER.
+        workers (int, optional): Encode each paragraph as its own segment in a
+            pool of this many processes and join them with an ffmpeg stream
+            copy; failed segments are retried individually. ``-1`` uses every
+            core. Defaults to ``VIDEO_RENDER_WORKERS``.
+        incremental (bool, optional): Keep segments and a manifest next to
+            the output so a rerun only re-encodes paragraphs whose text,
+            audio, background or render settings changed. Defaults to
+            ``VIDEO_INCREMENTAL``. Always off when ``output_path`` is not
+            given. With ``incremental=False`` and ``workers=0`` the video
+            is encoded in a single pass.
+        profile (str, optional): ``"standard"`` or ``"static"`` (low frame
+            rate, ``-tune stillimage``, ``VIDEO_PRESET``/``VIDEO_CRF``).
+            Defaults to ``VIDEO_RENDER_PROFILE``.
+        on_segment (callable, optional): Called with the spec of each
+            segment once it is encoded or found already encoded (segmented
+            renders only), e.g. to checkpoint progress.
 
     Returns:
         str: Path to the saved video file.
     """
-    # Use black background if image not provided or not found
-    if not background_image_path or not os.path.exists(background_image_path):
-        from moviepy.editor import ColorClip
-        bg_image = ColorClip(size=(1280, 720), color=(0, 0, 0)).set_duration(1)
-        font_color = 'white'
-        width, height = bg_image.size
-    else:
-        bg_image = ImageClip(background_image_path)
-        font_color = 'white'
-        width, height = bg_image.size
+    if workers is None:
+        workers = VIDEO_RENDER_WORKERS
+    if incremental is None:
+        incremental = VIDEO_INCREMENTAL
+    if workers < 0:
+        workers = os.cpu_count() or 1
 
     # Ensure output folder exists
     os.makedirs(VIDEO_OUTPUT_FOLDER, exist_ok=True)
     if not output_path:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_path = os.path.join(VIDEO_OUTPUT_FOLDER, f"video_{timestamp}.mp4")
+        # No later run can reuse segments kept next to a one-off name
+        incremental = False
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
 
-    clips = []
-    for para in text_audio_mapping.get("paragraphs", []):
-        text = para.get("text_to_be_rendered", "")
-        audio_file = para.get("audio_file_path")
-        if not audio_file or not os.path.exists(audio_file):
-            continue
+    paragraphs = [
+        para for para in text_audio_mapping.get("paragraphs", [])
+        if para.get("audio_file_path") and os.path.exists(para["audio_file_path"])
+    ]
+    if not paragraphs:
+        raise RuntimeError("No valid clips to concatenate.")
 
+    if incremental or workers > 0:
+        return _render_segmented(
+            paragraphs, background_image_path, output_path, workers,
+            keep_segments=incremental, profile=profile, on_segment=on_segment,
+        )
+
+    encoding = encoding_profile(profile)
+    background = _load_background(background_image_path)
+    clips = []
+    for para in paragraphs:
         # Load audio clip to get duration
-        audio_clip = AudioFileClip(audio_file)
+        audio_clip = _moviepy("AudioFileClip")(para["audio_file_path"])
         duration = audio_clip.duration
 
-        # Create a background clip of the same resolution for this duration
-        bg_clip = bg_image.set_duration(duration)
-
-        # Create text clip with word-wrap/caption to fit width
-        txt_clip = (TextClip(text, fontsize=70, color='white', method='caption', size=(width, None), align='center')
-                    .set_duration(duration)
-                    .set_position(('center', 'center')))
-
-        # Composite text over the background, and attach audio
-        video_clip = CompositeVideoClip([bg_clip, txt_clip]).set_audio(audio_clip)
+        # Background + caption rendered once, shown for the whole paragraph
+        still = _slide_frame(para.get("text_to_be_rendered", ""), background)
+        video_clip = _moviepy("ImageClip")(still).set_duration(duration).set_audio(audio_clip)
         clips.append(video_clip)
 
-    if not clips:
-        raise RuntimeError("No valid clips to concatenate.")
-
-    # Concatenate all clips and write final video
-    final_clip = concatenate_videoclips(clips, method="compose")
-    final_clip.write_videofile(output_path, fps=24, codec='libx264', audio_codec='aac')
+    # All slides share the background size, so a plain chain is enough
+    final_clip = _moviepy("concatenate_videoclips")(clips, method="chain")
+    with span("encode", paragraphs=len(clips), profile=encoding["name"]):
+        final_clip.write_videofile(
+            output_path,
+            fps=encoding["fps"],
+            codec=VIDEO_CODEC,
+            audio_codec=AUDIO_CODEC,
+            ffmpeg_params=encoding["ffmpeg_params"] if encoding["name"] != "standard" else None,
+        )
 
     return output_path
@@ -0,0 +1,131 @@
+"""Prepare images for upload to the vision model.
+
+Full-resolution screenshots make multi-megabyte request bodies even though
+the model downsamples them anyway. Images are scaled to fit
+``IMAGE_MAX_DIMENSION`` and optionally re-encoded before they are base64
+encoded, and the prepared payload is cached by a hash of the source bytes.
+Only the upload is affected; the original file is still used as the video
+background.
+"""
+
+import base64
+import hashlib
+import io
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+# Longest side sent to the model (0 keeps the original size)
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "2048"))
+# "auto" keeps the source format (PNG for formats the API does not accept);
+# "png", "jpeg" or "webp" always re-encode
+IMAGE_UPLOAD_FORMAT = os.getenv("IMAGE_UPLOAD_FORMAT", "auto").lower()
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "85"))
+IMAGE_CACHE_SIZE = int(os.getenv("IMAGE_CACHE_SIZE", "16"))
+
+# Formats the chat completions API accepts as-is
+UPLOAD_FORMATS = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp", "GIF": "image/gif"}
+_FORMAT_NAMES = {"png": "PNG", "jpeg": "JPEG", "jpg": "JPEG", "webp": "WEBP"}
+
+
+class PreparedImage(NamedTuple):
+    """Upload-ready image: hash and base64 of the prepared bytes, and their MIME type."""
+
+    sha256: str
+    mime: str
+    b64: str
+
+    @property
+    def data_url(self) -> str:
+        return f"data:{self.mime};base64,{self.b64}"
+
+
+_prepared: "OrderedDict[Tuple, PreparedImage]" = OrderedDict()
+_prepared_lock = threading.Lock()
+
+
+def _settings() -> Tuple[int, str, int]:
+    return (IMAGE_MAX_DIMENSION, IMAGE_UPLOAD_FORMAT, IMAGE_QUALITY)
+
+
+def detect_mime(data: bytes, filename: Optional[str] = None) -> str:
+    """MIME type from the image content, then the file name, else ``image/png``."""
+    try:
+        from PIL import Image
+
+        with Image.open(io.BytesIO(data)) as img:
+            mime = Image.MIME.get(img.format or "")
+        if mime:
+            return mime
+    except Exception:
+        pass
+    guessed = mimetypes.guess_type(filename)[0] if filename else None
+    return guessed if guessed and guessed.startswith("image/") else "image/png"
+
+
+def prepare_image_bytes(data: bytes, filename: Optional[str] = None) -> Tuple[str, bytes]:
+    """Return ``(mime, bytes)`` to upload for the image in ``data``.
+
+    The image is scaled down to fit ``IMAGE_MAX_DIMENSION`` and encoded as
+    ``IMAGE_UPLOAD_FORMAT``. Under ``auto``, an image that needs neither is
+    sent unchanged. Data Pillow cannot read is sent unchanged with a MIME
+    type guessed from ``filename``.
+    """
+    from PIL import Image
+
+    try:
+        img = Image.open(io.BytesIO(data))
+        img.load()
+    except Exception:
+        return detect_mime(data, filename), data
+
+    source_format = img.format or ""
+    target = _FORMAT_NAMES.get(IMAGE_UPLOAD_FORMAT)
+    if target is None:
+        target = source_format if source_format in UPLOAD_FORMATS else "PNG"
+    too_large = IMAGE_MAX_DIMENSION > 0 and max(img.size) > IMAGE_MAX_DIMENSION
+    if not too_large and target == source_format and IMAGE_UPLOAD_FORMAT == "auto":
+        return UPLOAD_FORMATS[source_format], data
+
+    if too_large:
+        img.thumbnail((IMAGE_MAX_DIMENSION, IMAGE_MAX_DIMENSION), Image.LANCZOS)
+    if target == "JPEG" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    elif img.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+        img = img.convert("RGBA")
+
+    out = io.BytesIO()
+    if target == "PNG":
+        img.save(out, format="PNG", optimize=True)
+    elif target == "GIF":
+        img.save(out, format="GIF")
+    else:
+        img.save(out, format=target, quality=IMAGE_QUALITY)
+    return UPLOAD_FORMATS[target], out.getvalue()
+
+
+def prepare_image(data: bytes, filename: Optional[str] = None) -> PreparedImage:
+    """Prepared, base64-encoded upload for ``data``, cached by source hash."""
+    key = (hashlib.sha256(data).hexdigest(),) + _settings()
+    with _prepared_lock:
+        cached = _prepared.get(key)
+        if cached is not None:
+            _prepared.move_to_end(key)
+            return cached
+
+    mime, prepared = prepare_image_bytes(data, filename)
+    result = PreparedImage(
+        hashlib.sha256(prepared).hexdigest(), mime, base64.b64encode(prepared).decode("utf-8")
+    )
+    with _prepared_lock:
+        _prepared[key] = result
+        while len(_prepared) > IMAGE_CACHE_SIZE:
+            _prepared.popitem(last=False)
+    return result
+
+
+def clear_image_cache() -> None:
+    with _prepared_lock:
+        _prepared.clear()
@@ -0,0 +1,237 @@
+"""Stage timing and resource usage for a run.
+
+Wrap a stage in ``with span("tts"):`` to record its wall time, the bytes
+it sent and received, whether it was served from a cache and the peak RSS
+of the process when it ended. Finished spans are aggregated per stage for
+:func:`format_summary` and, when tracing is on, appended to a JSONL trace
+(one object per span, with ``parent`` linking nested spans).
+
+Tracing is enabled by ``TRACE=1`` (``logs/<date>/trace.jsonl``) or by
+``TRACE_FILE=<path>``. ``PROFILE=cprofile`` or ``PROFILE=pyinstrument``
+profiles the code run under :func:`profiled`.
+"""
+
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+from core.common import PROJECT_ROOT, debug_print, today_date_folder
+
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+if not TRACE_FILE and os.getenv("TRACE", "0") == "1":
+    TRACE_FILE = os.path.join(PROJECT_ROOT, "logs", today_date_folder, "trace.jsonl")
+# "cprofile" or "pyinstrument"; empty disables profiling
+PROFILE = os.getenv("PROFILE", "").lower()
+
+_ids = itertools.count(1)
+_current: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_stats: Dict[str, Dict[str, Any]] = {}
+_stats_lock = threading.Lock()
+_trace_lock = threading.Lock()
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Peak resident set size of this process in KiB (``None`` where unsupported)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux KiB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class Span:
+    """One timed stage; use :func:`span` or :func:`start_span` to create it."""
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, **fields: Any):
+        self.name = name
+        self.id = f"{os.getpid()}-{next(_ids)}"
+        self.parent = parent.id if parent is not None else None
+        self.fields: Dict[str, Any] = fields
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.cache: Optional[str] = None
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.wall_ms: Optional[float] = None
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def add_bytes(self, sent: int = 0, received: int = 0) -> None:
+        self.bytes_sent += sent
+        self.bytes_received += received
+
+    def cache_result(self, hit: bool) -> None:
+        self.cache = "hit" if hit else "miss"
+
+    def set(self, **fields: Any) -> None:
+        self.fields.update(fields)
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """Stop the clock and record the span (only the first call counts)."""
+        if self.wall_ms is not None:
+            return
+        self.wall_ms = self.elapsed_ms()
+        if error is not None:
+            self.fields["error"] = type(error).__name__
+        _record(self)
+
+
+def start_span(name: str, **fields: Any) -> Span:
+    """Start a span without making it current; call ``finish`` when done.
+
+    For work that is suspended and resumed elsewhere, such as a generator
+    consumed by a caller, where a context manager would leak the span into
+    the caller's context.
+    """
+    return Span(name, parent=_current.get(), **fields)
+
+
+@contextmanager
+def span(name: str, **fields: Any) -> Iterator[Span]:
+    """Time the ``with`` block as stage ``name``; spans opened inside are its children."""
+    current = start_span(name, **fields)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.finish(error=exc)
+        raise
+    finally:
+        _current.reset(token)
+        current.finish()
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def add_bytes(sent: int = 0, received: int = 0) -> None:
+    """Add transferred bytes to the current span, if any."""
+    current = _current.get()
+    if current is not None:
+        current.add_bytes(sent, received)
+
+
+def _record(s: Span) -> None:
+    rss = peak_rss_kb()
+    with _stats_lock:
+        stats = _stats.setdefault(s.name, {
+            "count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "bytes_sent": 0,
+            "bytes_received": 0, "cache_hits": 0, "cache_misses": 0, "peak_rss_kb": None,
+        })
+        stats["count"] += 1
+        stats["errors"] += "error" in s.fields
+        stats["total_ms"] += s.wall_ms
+        stats["max_ms"] = max(stats["max_ms"], s.wall_ms)
+        stats["bytes_sent"] += s.bytes_sent
+        stats["bytes_received"] += s.bytes_received
+        stats["cache_hits"] += s.cache == "hit"
+        stats["cache_misses"] += s.cache == "miss"
+        if rss is not None:
+            stats["peak_rss_kb"] = max(stats["peak_rss_kb"] or 0, rss)
+
+    if TRACE_FILE:
+        record = {
+            "name": s.name,
+            "id": s.id,
+            "parent": s.parent,
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+            "start": round(s.started_at, 6),
+            "wall_ms": round(s.wall_ms, 3),
+            "bytes_sent": s.bytes_sent,
+            "bytes_received": s.bytes_received,
+            "cache": s.cache,
+            "peak_rss_kb": rss,
+            **s.fields,
+        }
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with _trace_lock:
+            os.makedirs(os.path.dirname(TRACE_FILE) or ".", exist_ok=True)
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+def summary() -> Dict[str, Dict[str, Any]]:
+    """Per-stage totals of the spans finished in this process so far."""
+    with _stats_lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
+
+
+def format_summary() -> str:
+    """Summary table of the finished spans, one row per stage."""
+    rows = [("stage", "count", "total s", "mean ms", "max ms", "sent KB", "recv KB", "cache hit/miss", "peak RSS MB")]
+    for name, s in sorted(summary().items(), key=lambda item: -item[1]["total_ms"]):
+        rss = f"{s['peak_rss_kb'] / 1024:.0f}" if s["peak_rss_kb"] is not None else "-"
+        cache = f"{s['cache_hits']}/{s['cache_misses']}" if s["cache_hits"] or s["cache_misses"] else "-"
+        rows.append((
+            name + (f" ({s['errors']} failed)" if s["errors"] else ""),
+            str(s["count"]),
+            f"{s['total_ms'] / 1000:.2f}",
+            f"{s['total_ms'] / s['count']:.1f}",
+            f"{s['max_ms']:.1f}",
+            f"{s['bytes_sent'] / 1024:.1f}",
+            f"{s['bytes_received'] / 1024:.1f}",
+            cache,
+            rss,
+        ))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines = ["  ".join(cell.ljust(w) if i == 0 else cell.rjust(w) for i, (cell, w) in enumerate(zip(row, widths)))
+             for row in rows]
+    lines.insert(1, "-" * len(lines[0]))
+    return "\n".join(lines)
+
+
+def reset() -> None:
+    """Forget the aggregated spans (the trace file is left as is)."""
+    with _stats_lock:
+        _stats.clear()
+
+
+@contextmanager
+def profiled(name: str = "run") -> Iterator[None]:
+    """Profile the ``with`` block when ``PROFILE`` is set.
+
+    ``cprofile`` writes ``logs/<date>/profile_<name>_<time>.prof`` (open it
+    with ``pstats`` or snakeviz); ``pyinstrument`` writes an HTML report.
+    """
+    if PROFILE not in ("cprofile", "pyinstrument"):
+        yield
+        return
+
+    stamp = datetime.now().strftime("%H%M%S")
+    base = os.path.join(PROJECT_ROOT, "logs", today_date_folder, f"profile_{name}_{stamp}")
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    if PROFILE == "cprofile":
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(base + ".prof")
+            debug_print(f"Profile written to {base}.prof")
+    else:
+        from pyinstrument import Profiler
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(base + ".html", "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+            debug_print(f"Profile written to {base}.html")
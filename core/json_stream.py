@@ -0,0 +1,122 @@
+"""Incremental parsing of one JSON array inside a streamed LLM response."""
+
+import json
+import re
+from typing import Any, Iterable, Iterator, List
+
+
+class ArrayItemParser:
+    """Yield the items of the ``key`` array as soon as each one is complete.
+
+    Feed the response text chunk by chunk; every object or value of the
+    array is decoded with ``json.loads`` once its closing bracket arrives,
+    while the rest of the document is still being generated. Text around
+    the document (Markdown fences, a leading sentence) is ignored. The full
+    text stays available as ``text`` so the complete document can be parsed
+    at the end.
+    """
+
+    def __init__(self, key: str = "paragraphs"):
+        self._key_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._chunks: List[str] = []
+        self._buffer = ""
+        self._pos = 0          # next unread character of _buffer
+        self._in_array = False
+        self._finished = False
+        # State of the item being scanned
+        self._item_start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    @property
+    def finished(self) -> bool:
+        """True once the closing ``]`` of the array has been seen."""
+        return self._finished
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Add ``chunk`` and return the items completed by it."""
+        if not chunk:
+            return []
+        self._chunks.append(chunk)
+        if self._finished:
+            return []
+        self._buffer += chunk
+        if not self._in_array:
+            match = self._key_pattern.search(self._buffer)
+            if match is None:
+                return []
+            self._in_array = True
+            self._pos = match.end()
+        return self._scan()
+
+    def _scan(self) -> List[Any]:
+        items: List[Any] = []
+        buf = self._buffer
+        i = self._pos
+        n = len(buf)
+        while i < n:
+            ch = buf[i]
+            if self._item_start < 0:
+                # Between items: skip separators until an item or the end of the array
+                if ch in " \t\r\n,":
+                    i += 1
+                    continue
+                if ch == "]":
+                    self._finished = True
+                    i += 1
+                    break
+                self._item_start = i
+                self._depth = 0
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 0:
+                        i = self._emit(items, i + 1)
+                        continue
+            elif self._depth == 0 and ch in ",]":
+                # End of a bare number/true/false/null item
+                i = self._emit(items, i)
+                continue
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    i = self._emit(items, i + 1)
+                    continue
+            i += 1
+
+        # Drop consumed text so memory stays bounded by the item being built
+        keep_from = self._item_start if self._item_start >= 0 else i
+        self._buffer = buf[keep_from:]
+        if self._item_start >= 0:
+            self._item_start = 0
+        self._pos = i - keep_from
+        return items
+
+    def _emit(self, items: List[Any], end: int) -> int:
+        raw = self._buffer[self._item_start:end].strip()
+        items.append(json.loads(raw))
+        self._item_start = -1
+        return end
+
+    def iter_items(self, chunks: Iterable[str]) -> Iterator[Any]:
+        """Feed ``chunks`` and yield each array item as soon as it is complete."""
+        for chunk in chunks:
+            yield from self.feed(chunk)
+
+
+def iter_array_items(chunks: Iterable[str], key: str = "paragraphs") -> Iterator[Any]:
+    """Yield the items of the ``key`` array from streamed JSON text."""
+    return ArrayItemParser(key).iter_items(chunks)
@@ -0,0 +1,202 @@
+"""Background log writer behind ``core.common.debug_print``.
+
+Callers only format the line and put it on a queue. One daemon thread per
+log file drains the queue in batches and writes each batch to the console
+and to the file (kept open) with a single call, so concurrent workers
+neither block on file I/O nor interleave partial lines. Lines carry the
+fields set with :func:`log_context` (e.g. the job id).
+
+A forked child starts its own writer thread on first use, and pending lines
+are flushed at interpreter exit. ``multiprocessing`` children (worker and
+render pool processes) leave through ``os._exit`` without running
+``atexit``, so they flush through a ``multiprocessing`` finalizer instead.
+"""
+
+import atexit
+import os
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+# Messages below this level are dropped
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG").upper()
+# Most lines written per console/file write
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "256"))
+LOG_CONSOLE = os.getenv("LOG_CONSOLE", "1") != "0"
+
+_STOP = object()
+_context: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """Tag every line logged inside the block (in this thread/task) with ``fields``."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class LogWriter:
+    """Queue-backed writer for one log file."""
+
+    def __init__(self, path: str, console: bool = True, batch_size: int = 256):
+        self.path = path
+        self.console = console
+        self.batch_size = max(1, batch_size)
+        self._closed = False
+        self._start()
+
+    def _start(self) -> None:
+        self._pid = os.getpid()
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, line: str) -> None:
+        """Queue one line (without the trailing newline)."""
+        if self._closed:
+            self._write_batch([line], None)
+            return
+        if os.getpid() != self._pid:
+            # Forked child: the parent's writer thread does not exist here
+            self._start()
+        self._queue.put(line)
+
+    def flush(self, timeout: Optional[float] = 5.0) -> None:
+        """Block until every line queued so far has been written."""
+        if self._closed or os.getpid() != self._pid:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Write what is queued and stop the thread; later lines are written directly."""
+        if self._closed or os.getpid() != self._pid:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._closed = True
+
+    def _run(self) -> None:
+        handle = None
+        try:
+            while True:
+                items = [self._queue.get()]
+                while len(items) < self.batch_size:
+                    try:
+                        items.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                lines = [item for item in items if isinstance(item, str)]
+                if lines:
+                    handle = self._write_batch(lines, handle)
+                for item in items:
+                    if isinstance(item, threading.Event):
+                        item.set()
+                if any(item is _STOP for item in items):
+                    return
+        finally:
+            if handle is not None:
+                handle.close()
+
+    def _write_batch(self, lines: List[str], handle):
+        text = "\n".join(lines) + "\n"
+        if self.console:
+            try:
+                sys.stdout.write(text)
+                sys.stdout.flush()
+            except (OSError, ValueError):  # console closed
+                pass
+        try:
+            if handle is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                handle = open(self.path, "a", encoding="utf-8")
+            handle.write(text)
+            handle.flush()
+        except OSError:
+            pass
+        if self._closed and handle is not None:
+            handle.close()
+            handle = None
+        return handle
+
+
+_writers: Dict[str, LogWriter] = {}
+_writers_lock = threading.Lock()
+# Process that registered the multiprocessing exit hook
+_exit_hook_pid: Optional[int] = None
+
+
+def get_writer(path: str) -> LogWriter:
+    writer = _writers.get(path)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(path)
+            if writer is None:
+                writer = LogWriter(path, console=LOG_CONSOLE, batch_size=LOG_BATCH_SIZE)
+                _writers[path] = writer
+    return writer
+
+
+def format_line(message: str, level: str = "DEBUG") -> str:
+    """``[timestamp] [context] LEVEL: message``; DEBUG/INFO lines have no level tag."""
+    line = f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] "
+    fields = _context.get()
+    if fields:
+        line += "[" + " ".join(f"{k}={v}" for k, v in fields.items()) + "] "
+    if LEVELS.get(level, 10) >= LEVELS["WARNING"]:
+        line += f"{level}: "
+    return line + message
+
+
+def log(path: str, message: str, level: str = "DEBUG") -> None:
+    """Queue ``message`` for ``path`` if ``level`` passes ``LOG_LEVEL``."""
+    level = level.upper()
+    if LEVELS.get(level, 10) < LEVELS.get(LOG_LEVEL, 10):
+        return
+    if _exit_hook_pid != os.getpid():
+        _register_exit_hook()
+    get_writer(path).write(format_line(message, level))
+
+
+def flush() -> None:
+    """Wait until every queued line has been written."""
+    for writer in list(_writers.values()):
+        writer.flush()
+
+
+def _close_all() -> None:
+    for writer in list(_writers.values()):
+        writer.close()
+
+
+def _register_exit_hook() -> None:
+    # A child's finalizer registry is cleared when it starts, so register on
+    # its first line rather than at import or fork time
+    global _exit_hook_pid
+    _exit_hook_pid = os.getpid()
+    mp_util = sys.modules.get("multiprocessing.util")
+    if mp_util is not None:
+        mp_util.Finalize(None, _close_all, exitpriority=0)
+
+
+def _after_fork_in_child() -> None:
+    # Locks and queues may have been held by threads that do not exist in the child
+    global _writers_lock
+    _writers_lock = threading.Lock()
+    for writer in _writers.values():
+        if not writer._closed:
+            writer._start()
+
+
+atexit.register(_close_all)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
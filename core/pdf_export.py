@@ -0,0 +1,231 @@
+"""Render extracted sheets to PDF in-process with reportlab.
+
+A sheet is drawn as a grid straight onto a reportlab canvas: no HTML step
+and no external process. Columns wider than the page are split into bands
+that continue on the following pages, with the column letters repeated at
+the top of every page. Finished PDFs are kept in a :class:`ContentCache`
+under ``PDF_CACHE_FOLDER``, keyed by a hash of the cell text and layout
+settings, so the same sheet is rendered once and then only copied.
+"""
+
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from core.cache import ContentCache
+from core.common import PDF_CACHE_FOLDER, debug_print
+from core.instrumentation import span
+
+# "a4" or "letter"; pages are landscape so more columns fit side by side
+PDF_PAGE_SIZE = os.getenv("PDF_PAGE_SIZE", "a4").lower()
+PDF_FONT_SIZE = float(os.getenv("PDF_FONT_SIZE", "8"))
+# Longer cell text wraps inside the column (points; 72 points = 1 inch)
+PDF_MAX_COLUMN_WIDTH = float(os.getenv("PDF_MAX_COLUMN_WIDTH", "180"))
+# Bump when the layout changes so cached PDFs are not reused
+PDF_FORMAT_VERSION = "1"
+PDF_CACHE_MAX_MB = float(os.getenv("PDF_CACHE_MAX_MB", "256"))
+PDF_CACHE_MAX_AGE_DAYS = float(os.getenv("PDF_CACHE_MAX_AGE_DAYS", "30"))
+
+FONT_NAME = "Helvetica"
+MARGIN = 36
+CELL_PADDING = 2
+MIN_COLUMN_WIDTH = 24
+
+_pdf_cache: Optional[ContentCache] = None
+_pdf_cache_lock = threading.Lock()
+
+
+def get_pdf_cache() -> ContentCache:
+    """Return the process-wide rendered-PDF cache under ``PDF_CACHE_FOLDER``."""
+    global _pdf_cache
+    with _pdf_cache_lock:
+        if _pdf_cache is None:
+            _pdf_cache = ContentCache(
+                PDF_CACHE_FOLDER,
+                suffix=".pdf",
+                max_bytes=int(PDF_CACHE_MAX_MB * 1024 * 1024),
+                max_age_seconds=PDF_CACHE_MAX_AGE_DAYS * 86400,
+            )
+        return _pdf_cache
+
+
+def _cell_text(value: Any) -> str:
+    """Cell text as shown in Excel: blanks and NaN empty, integral floats as ints."""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        if math.isfinite(value) and value.is_integer():
+            return str(int(value))
+    return str(value).replace("\r\n", "\n").replace("\r", "\n")
+
+
+def sheet_table(sheet_data: Dict[str, Any]) -> Tuple[List[str], List[List[str]]]:
+    """``(header, rows)`` of cell strings for an ``extract_sheet_text``-style dict."""
+    labels = list(sheet_data.get("columns", []))
+    rows = [[_cell_text(row.get(label)) for label in labels] for row in sheet_data.get("rows", [])]
+    return labels, rows
+
+
+def _settings() -> Tuple[str, float, float, str]:
+    return (PDF_PAGE_SIZE, PDF_FONT_SIZE, PDF_MAX_COLUMN_WIDTH, PDF_FORMAT_VERSION)
+
+
+def table_digest(header: Sequence[str], rows: Sequence[Sequence[str]], title: Optional[str] = None) -> str:
+    """Hash of everything that affects the rendered PDF."""
+    h = hashlib.sha256(json.dumps([_settings(), title, list(header)], ensure_ascii=False).encode("utf-8"))
+    for row in rows:
+        h.update(json.dumps(list(row), ensure_ascii=False).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def _column_bands(widths: List[float], usable: float) -> List[List[int]]:
+    """Split column indexes into consecutive groups that fit the page width."""
+    bands: List[List[int]] = []
+    current: List[int] = []
+    used = 0.0
+    for i, width in enumerate(widths):
+        if current and used + width > usable:
+            bands.append(current)
+            current, used = [], 0.0
+        current.append(i)
+        used += width
+    if current:
+        bands.append(current)
+    return bands
+
+
+def render_table_pdf(
+    header: Sequence[str],
+    rows: Sequence[Sequence[str]],
+    output_pdf: str,
+    title: Optional[str] = None,
+) -> str:
+    """Draw ``rows`` under ``header`` into ``output_pdf`` (no caching)."""
+    from reportlab.lib.pagesizes import A4, landscape, letter
+    from reportlab.lib.utils import simpleSplit
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from reportlab.pdfgen import canvas
+
+    page_width, page_height = landscape(letter if PDF_PAGE_SIZE == "letter" else A4)
+    font_size = PDF_FONT_SIZE
+    leading = font_size * 1.25
+    usable_width = page_width - 2 * MARGIN
+    max_width = min(PDF_MAX_COLUMN_WIDTH, usable_width)
+
+    # Natural column widths from the widest line, capped so long text wraps
+    widths: List[float] = []
+    for i, label in enumerate(header):
+        natural = stringWidth(label, FONT_NAME, font_size)
+        for row in rows:
+            for line in row[i].split("\n"):
+                if line:
+                    natural = max(natural, stringWidth(line, FONT_NAME, font_size))
+                    if natural >= max_width:
+                        break
+        widths.append(min(max(natural + 2 * CELL_PADDING, MIN_COLUMN_WIDTH), max_width))
+
+    def cell_lines(text: str, width: float) -> List[str]:
+        inner = width - 2 * CELL_PADDING
+        lines: List[str] = []
+        for line in text.split("\n"):
+            if stringWidth(line, FONT_NAME, font_size) <= inner:
+                lines.append(line)
+            else:
+                lines.extend(simpleSplit(line, FONT_NAME, font_size, inner) or [""])
+        return lines
+
+    os.makedirs(os.path.dirname(output_pdf) or ".", exist_ok=True)
+    pdf = canvas.Canvas(output_pdf, pagesize=(page_width, page_height), invariant=1)
+    pdf.setTitle(title or "")
+    bands = _column_bands(widths, usable_width) or [[]]
+    top = page_height - MARGIN
+    bottom = MARGIN
+    max_lines = max(1, int((top - bottom - 2 * leading) // leading) - 1)
+
+    def start_page(band: List[int], band_no: int) -> float:
+        y = top
+        caption = title or ""
+        if len(bands) > 1:
+            caption += f"  (columns {header[band[0]]}-{header[band[-1]]}, part {band_no + 1} of {len(bands)})"
+        if caption.strip():
+            pdf.setFont(FONT_NAME + "-Bold", font_size + 2)
+            pdf.drawString(MARGIN, y - font_size - 2, caption.strip())
+            y -= leading + 6
+        return draw_row(y, band, [[header[i]] for i in band], bold=True)
+
+    def draw_row(y: float, band: List[int], lines: List[List[str]], bold: bool = False) -> float:
+        height = max((len(cell) for cell in lines), default=1) * leading + 2 * CELL_PADDING
+        x = MARGIN
+        pdf.setFont(FONT_NAME + "-Bold" if bold else FONT_NAME, font_size)
+        for i, cell in zip(band, lines):
+            pdf.rect(x, y - height, widths[i], height, stroke=1, fill=0)
+            text_y = y - CELL_PADDING - font_size
+            for line in cell:
+                pdf.drawString(x + CELL_PADDING, text_y, line)
+                text_y -= leading
+            x += widths[i]
+        return y - height
+
+    pdf.setLineWidth(0.25)
+    for band_no, band in enumerate(bands):
+        y = start_page(band, band_no)
+        for row in rows:
+            lines = [cell_lines(row[i], widths[i])[:max_lines] for i in band]
+            height = max((len(cell) for cell in lines), default=1) * leading + 2 * CELL_PADDING
+            if y - height < bottom:
+                pdf.showPage()
+                y = start_page(band, band_no)
+            y = draw_row(y, band, lines)
+        pdf.showPage()
+    pdf.save()
+    return output_pdf
+
+
+def export_table_pdf(
+    header: Sequence[str],
+    rows: Sequence[Sequence[str]],
+    output_pdf: str,
+    title: Optional[str] = None,
+) -> str:
+    """Write the table to ``output_pdf``, rendering it only if it is not cached."""
+    cache = get_pdf_cache()
+    key = table_digest(header, rows, title)
+    with span("sheet_pdf", rows=len(rows), columns=len(header)) as stage:
+        cached = cache.get(key)
+        stage.cache_result(cached is not None)
+        if cached is not None:
+            debug_print(f"PDF cache hit: {cached}")
+        else:
+            os.makedirs(cache.folder, exist_ok=True)
+            # Unique per call: threads of one process may render the same sheet at once
+            fd, partial = tempfile.mkstemp(dir=cache.folder, suffix=".part")
+            os.close(fd)
+            try:
+                render_table_pdf(header, rows, partial, title=title)
+                cached = cache.put_file(key, partial)
+            except OSError:
+                # Another writer finished the same PDF first
+                cached = cache.path_for(key)
+                if not os.path.exists(cached):
+                    raise
+            finally:
+                if os.path.exists(partial):
+                    os.remove(partial)
+    if os.path.abspath(output_pdf) != os.path.abspath(cached):
+        os.makedirs(os.path.dirname(output_pdf) or ".", exist_ok=True)
+        shutil.copyfile(cached, output_pdf)
+    return output_pdf
+
+
+def export_sheet_data_pdf(sheet_data: Dict[str, Any], output_pdf: str) -> str:
+    """Render an ``extract_sheet_text``-style dict to ``output_pdf``; returns the path."""
+    header, rows = sheet_table(sheet_data)
+    return export_table_pdf(header, rows, output_pdf, title=sheet_data.get("sheet_name"))
@@ -0,0 +1,204 @@
+"""Pipelined TTS and rendering: every paragraph moves on as soon as it is ready.
+
+Paragraphs may come from any iterable - a finished script or a generator
+that yields them while the LLM response is still streaming. Each one is
+handed to TTS immediately, its video segment is encoded as soon as its
+audio lands, and the final stream-copy concat starts once the last segment
+is done. Time to a finished video is therefore close to the slowest single
+paragraph rather than the sum of all stages.
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.common import VIDEO_OUTPUT_FOLDER, debug_print
+from core.generate_audio import TTS_MAX_CONCURRENCY, generate_audio_from_script
+from core.generate_video import (
+    VIDEO_INCREMENTAL,
+    VIDEO_RENDER_WORKERS,
+    VIDEO_SEGMENT_RETRIES,
+    SegmentPlan,
+    _encode_segment,
+)
+
+
+class ParagraphPipeline:
+    """Run TTS and segment encoding for paragraphs as they are added.
+
+    Call ``add`` for each paragraph (in order) and ``finish`` once there are
+    no more; ``finish`` waits for the outstanding work, stitches the video
+    and returns its path. Identical segments are encoded once, and a failed
+    segment is retried on its own up to ``VIDEO_SEGMENT_RETRIES`` times.
+
+    ``on_audio(index, para)`` is called once a paragraph's audio exists and
+    ``on_segment(spec)`` once its segment is encoded, e.g. to checkpoint
+    progress; an error raised by either fails that paragraph.
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        background_image_path: Optional[str] = None,
+        voice: str = "alloy",
+        model: str = "gpt-4o-mini-tts",
+        tts_workers: Optional[int] = None,
+        render_workers: Optional[int] = None,
+        profile: Optional[str] = None,
+        on_audio: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+        on_segment: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        if tts_workers is None:
+            tts_workers = TTS_MAX_CONCURRENCY
+        if render_workers is None:
+            render_workers = VIDEO_RENDER_WORKERS
+        if render_workers < 0:
+            render_workers = os.cpu_count() or 1
+
+        self.voice = voice
+        self.model = model
+        self.on_audio = on_audio
+        self.on_segment = on_segment
+        self.plan = SegmentPlan(output_path, background_image_path, profile)
+        self.paragraphs: List[Dict[str, Any]] = []
+        self._done: List[Future] = []
+        self._segments: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._tts_pool = ThreadPoolExecutor(max_workers=max(1, tts_workers), thread_name_prefix="tts")
+        if render_workers > 1:
+            self._render_pool = ProcessPoolExecutor(max_workers=render_workers)
+        else:
+            self._render_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="render")
+
+    # -- stages -------------------------------------------------------------
+
+    def add(self, para: Dict[str, Any]) -> None:
+        """Queue one paragraph; TTS starts right away unless it already has audio."""
+        index = len(self.paragraphs)
+        self.paragraphs.append(para)
+        done: Future = Future()
+        self._done.append(done)
+
+        audio_path = para.get("audio_file_path")
+        if audio_path and os.path.exists(audio_path):
+            self._schedule_render(index, para, done)
+        elif para.get("audio_script", ""):
+            tts = self._tts_pool.submit(
+                generate_audio_from_script, para["audio_script"], voice=self.voice, model=self.model
+            )
+            tts.add_done_callback(lambda f: self._on_audio(index, para, done, f))
+        else:
+            done.set_exception(RuntimeError(f"Paragraph {index} has no audio_script"))
+
+    def _on_audio(self, index: int, para: Dict[str, Any], done: Future, tts: Future) -> None:
+        try:
+            para["audio_file_path"] = tts.result()
+            if self.on_audio is not None:
+                self.on_audio(index, para)
+        except Exception as exc:
+            done.set_exception(exc)
+            return
+        self._schedule_render(index, para, done)
+
+    def _schedule_render(self, index: int, para: Dict[str, Any], done: Future) -> None:
+        try:
+            with self._lock:
+                spec = self.plan.spec(index, para)
+                segment = self._segments.get(spec["hash"])
+                if segment is None:
+                    segment = Future()
+                    self._segments[spec["hash"]] = segment
+                    if self.plan.is_encoded(spec):
+                        segment.set_result(spec["output_path"])
+                    else:
+                        self._submit_encode(spec, segment, attempt=0)
+        except Exception as exc:
+            done.set_exception(exc)
+            return
+
+        def _segment_done(f: Future) -> None:
+            if f.exception() is None and self.on_segment is not None:
+                try:
+                    self.on_segment(spec)
+                except Exception as exc:
+                    done.set_exception(exc)
+                    return
+            _relay(f, done, spec)
+
+        segment.add_done_callback(_segment_done)
+
+    def _submit_encode(self, spec: Dict[str, Any], segment: Future, attempt: int) -> None:
+        def _encoded(f: Future) -> None:
+            exc = f.exception()
+            if exc is None:
+                segment.set_result(f.result())
+            elif attempt < VIDEO_SEGMENT_RETRIES:
+                debug_print(f"Segment {spec['index']} failed: {exc}; retrying", level="WARNING")
+                try:
+                    self._submit_encode(spec, segment, attempt + 1)
+                except RuntimeError as shutdown:  # pool closed after another failure
+                    segment.set_exception(shutdown)
+            else:
+                segment.set_exception(RuntimeError(f"Rendering failed for segments [{spec['index']}]: {exc}"))
+
+        self._render_pool.submit(_encode_segment, spec).add_done_callback(_encoded)
+
+    def finish(self, keep_segments: bool = True) -> str:
+        """Wait for every paragraph, stitch the segments and return the video path."""
+        try:
+            if not self._done:
+                raise RuntimeError("No valid clips to concatenate.")
+            specs = [done.result() for done in self._done]
+            debug_print(f"Segments: {len(specs)} in video, {len(self._segments)} distinct")
+            return self.plan.stitch(specs, keep_segments=keep_segments)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Stop the worker pools, cancelling work that has not started."""
+        self._tts_pool.shutdown(wait=True, cancel_futures=True)
+        self._render_pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _relay(source: Future, target: Future, result: Any) -> None:
+    """Complete ``target`` with ``result`` once ``source`` succeeds."""
+    exc = source.exception()
+    if exc is not None:
+        target.set_exception(exc)
+    else:
+        target.set_result(result)
+
+
+def run_paragraph_pipeline(
+    paragraphs: Iterable[Dict[str, Any]],
+    background_image_path: Optional[str] = None,
+    output_path: Optional[str] = None,
+    incremental: Optional[bool] = None,
+    **options: Any,
+) -> Tuple[List[Dict[str, Any]], str]:
+    """Synthesize and render ``paragraphs`` as they arrive.
+
+    ``paragraphs`` is consumed lazily, so a generator fed by a streaming LLM
+    response gets each paragraph into TTS before the response is complete.
+    ``options`` are passed to ``ParagraphPipeline``. Returns the paragraphs
+    (with ``audio_file_path`` filled in) and the video path.
+    """
+    if incremental is None:
+        incremental = VIDEO_INCREMENTAL
+    if not output_path:
+        os.makedirs(VIDEO_OUTPUT_FOLDER, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = os.path.join(VIDEO_OUTPUT_FOLDER, f"video_{timestamp}.mp4")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    pipeline = ParagraphPipeline(output_path, background_image_path, **options)
+    try:
+        for para in paragraphs:
+            pipeline.add(para)
+    except BaseException:
+        pipeline.close()
+        raise
+    video_path = pipeline.finish(keep_segments=incremental)
+    return pipeline.paragraphs, video_path
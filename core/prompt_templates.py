@@ -0,0 +1,89 @@
+"""Precompiled prompt templates from ``prompt_library/``.
+
+Templates use ``<<NAME>>`` placeholders. Each file is parsed once into
+alternating literal and placeholder segments and cached until its
+modification time or size changes; rendering fills the placeholder slots
+and joins the segments in one pass, so substituted values are never
+re-scanned for placeholders.
+"""
+
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from core.common import TEMPLATE_LIBRARY_FOLDER
+
+PLACEHOLDER_PATTERN = re.compile(r"<<([A-Z][A-Z0-9_]*)>>")
+
+
+class PromptTemplate:
+    """A parsed template; ``placeholders`` lists the names it contains."""
+
+    def __init__(self, text: str, name: str = "<string>"):
+        self.name = name
+        self.text = text
+        # re.split with one group alternates literal, name, literal, ...
+        self._segments: List[str] = PLACEHOLDER_PATTERN.split(text)
+        self.placeholders = frozenset(self._segments[1::2])
+
+    def require(self, names: Iterable[str]) -> "PromptTemplate":
+        """Raise ``ValueError`` unless every placeholder in ``names`` occurs in the template."""
+        missing = sorted(set(names) - self.placeholders)
+        if missing:
+            listed = ", ".join(f"<<{n}>>" for n in missing)
+            raise ValueError(f"Template {self.name} is missing placeholder(s) {listed}")
+        return self
+
+    def render(self, values: Optional[Mapping[str, str]] = None, **kwargs: str) -> str:
+        """Fill placeholders from ``values``/``kwargs``.
+
+        Placeholders without a value are left as ``<<NAME>>`` in the output.
+        """
+        if values:
+            kwargs = {**values, **kwargs}
+        parts = list(self._segments)
+        for i in range(1, len(parts), 2):
+            value = kwargs.get(parts[i])
+            parts[i] = f"<<{parts[i]}>>" if value is None else str(value)
+        return "".join(parts)
+
+
+_templates: Dict[str, Tuple[int, int, PromptTemplate]] = {}
+_templates_lock = threading.Lock()
+
+
+def load_template(
+    name: str,
+    required: Iterable[str] = (),
+    folder: Optional[str] = None,
+) -> PromptTemplate:
+    """Return the parsed template ``name`` from ``folder`` (default ``TEMPLATE_LIBRARY_FOLDER``).
+
+    The parse is cached per file and redone only when the file's
+    modification time or size changes. ``required`` placeholders are
+    checked on every load, so a template missing one fails before any
+    prompt is rendered.
+    """
+    path = os.path.abspath(os.path.join(folder or TEMPLATE_LIBRARY_FOLDER, name))
+    stat = os.stat(path)
+    with _templates_lock:
+        cached = _templates.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        template = cached[2]
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            template = PromptTemplate(f.read(), name=name)
+        with _templates_lock:
+            _templates[path] = (stat.st_mtime_ns, stat.st_size, template)
+    return template.require(required)
+
+
+def render_template(name: str, required: Iterable[str] = (), **values: str) -> str:
+    """Load ``name`` (checking ``required``) and render it with ``values``."""
+    return load_template(name, required=required).render(values)
+
+
+def clear_template_cache() -> None:
+    with _templates_lock:
+        _templates.clear()
@@ -0,0 +1,275 @@
+"""Run many image/Excel/language jobs from a manifest in a single process.
+
+Each manifest row describes one job with the same inputs as
+``generate_from_image.py``: ``image_path``, ``excel_path``, ``sheet_name``,
+``language`` and ``pdf_path`` (all optional except where the job needs them)
+plus an optional ``job_id``. Manifests may be CSV (with a header row) or
+JSONL (one object per line).
+
+Jobs flow through three stages - LLM script, TTS audio and video render -
+and each stage has its own thread pool sized by its concurrency limit. A
+job moves to the next stage's queue when a stage finishes, so a slow render
+never holds up LLM calls for the next jobs. A per-job status report is
+written when the batch finishes.
+"""
+
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from core.common import PROJECT_ROOT, VIDEO_OUTPUT_FOLDER, debug_print
+from core.instrumentation import format_summary, profiled, summary
+from core.log_writer import log_context
+import generate_from_image as pipeline
+
+
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+BATCH_TTS_CONCURRENCY = int(os.getenv("BATCH_TTS_CONCURRENCY", "2"))
+BATCH_RENDER_CONCURRENCY = int(os.getenv("BATCH_RENDER_CONCURRENCY", "1"))
+
+MANIFEST_FIELDS = ["job_id", "image_path", "excel_path", "sheet_name", "language", "pdf_path"]
+REPORT_FIELDS = [
+    "job_id",
+    "status",
+    "error",
+    "script_json",
+    "video_path",
+    "llm_seconds",
+    "tts_seconds",
+    "render_seconds",
+]
+
+
+def read_manifest(path: str) -> List[Dict[str, Any]]:
+    """Load jobs from a CSV or JSONL manifest.
+
+    Empty values are treated as missing, ``language`` defaults to
+    ``english`` and ``job_id`` defaults to the 1-based row number.
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith((".jsonl", ".json")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    jobs: List[Dict[str, Any]] = []
+    for number, row in enumerate(rows, start=1):
+        unknown = set(row) - set(MANIFEST_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown manifest column(s) in row {number}: {sorted(unknown)}")
+        job = {field: (row.get(field) or None) for field in MANIFEST_FIELDS}
+        job["job_id"] = str(job["job_id"] or number)
+        job["language"] = job["language"] or "english"
+        jobs.append(job)
+    return jobs
+
+
+def _new_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    status: Dict[str, Any] = {field: None for field in REPORT_FIELDS}
+    status["job_id"] = job["job_id"]
+    return status
+
+
+def _llm_stage(job: Dict[str, Any], status: Dict[str, Any], state: Dict[str, Any], use_cache: bool) -> None:
+    for key in ("image_path", "pdf_path", "excel_path"):
+        if job.get(key) and not os.path.exists(job[key]):
+            raise FileNotFoundError(f"{key} not found: {job[key]}")
+
+    today_date_folder = datetime.now().strftime("%Y-%m-%d")
+    prompt, suffix, pdf_path = pipeline.build_prompt(
+        job.get("image_path"),
+        excel_path=job.get("excel_path"),
+        sheet_name=job.get("sheet_name"),
+        language=job["language"],
+        pdf_path=job.get("pdf_path"),
+        today_date_folder=today_date_folder,
+    )
+    suffix = f"{pipeline._sanitize_name(job['job_id'])}_{suffix}"
+    output_file, raw_text_file = pipeline.job_output_files(suffix, today_date_folder)
+    state["script_data"] = pipeline.request_script(
+        prompt, job.get("image_path"), pdf_path, output_file,
+        use_cache=use_cache, raw_text_file=raw_text_file,
+    )
+    state["suffix"] = suffix
+    state["output_file"] = output_file
+    status["script_json"] = output_file
+
+
+def _tts_stage(job: Dict[str, Any], status: Dict[str, Any], state: Dict[str, Any], use_cache: bool) -> None:
+    state["script_data"] = pipeline.synthesize_audio(state["script_data"], state["output_file"])
+
+
+def _render_stage(job: Dict[str, Any], status: Dict[str, Any], state: Dict[str, Any], use_cache: bool) -> None:
+    video_output = os.path.join(VIDEO_OUTPUT_FOLDER, f"video_{state['suffix']}.mp4")
+    status["video_path"] = pipeline.render_video(
+        state["script_data"], job.get("image_path"), output_path=video_output,
+        checkpoint_file=pipeline.checkpoint_path(state["output_file"]),
+    )
+
+
+# (stage name, step) in pipeline order; names match the BATCH_* limits and the report
+STAGES = [("llm", _llm_stage), ("tts", _tts_stage), ("render", _render_stage)]
+
+
+def _run_stage(stage: int, job: Dict[str, Any], status: Dict[str, Any], state: Dict[str, Any],
+               use_cache: bool) -> bool:
+    """Run one stage of ``job``; on error record the failure and return False."""
+    name, step = STAGES[stage]
+    with log_context(job=job["job_id"]):
+        started = time.perf_counter()
+        try:
+            step(job, status, state, use_cache)
+        except Exception as exc:
+            debug_print(f"Job {job['job_id']} failed: {exc}", level="ERROR")
+            status["status"] = "failed"
+            status["error"] = f"{type(exc).__name__}: {exc}"
+            return False
+        status[f"{name}_seconds"] = round(time.perf_counter() - started, 3)
+    if stage == len(STAGES) - 1:
+        status["status"] = "ok"
+    return True
+
+
+class StagePipeline:
+    """Per-stage thread pools that hand each job on to the next stage.
+
+    Each stage gets a pool sized by its limit. A submitted job starts in the
+    LLM pool and is queued on the next stage's pool when a stage finishes,
+    so a job never holds a thread while it waits for a later stage.
+    ``on_done(job, status)`` is called once per job, after its last stage
+    or its first failure. Leaving the ``with`` block waits for every job.
+    """
+
+    def __init__(self, llm: int, tts: int, render: int, use_cache: bool = True,
+                 on_done: Optional[Callable[[Dict[str, Any], Dict[str, Any]], None]] = None):
+        limits = {"llm": llm, "tts": tts, "render": render}
+        self._pools = {
+            name: ThreadPoolExecutor(max_workers=max(1, limits[name]), thread_name_prefix=name)
+            for name, _step in STAGES
+        }
+        self._use_cache = use_cache
+        self._on_done = on_done
+        self._in_flight = 0
+        self._changed = threading.Condition()
+
+    def submit(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Start ``job``; returns its status row, filled in as the job runs."""
+        status = _new_status(job)
+        with self._changed:
+            self._in_flight += 1
+        self._pools[STAGES[0][0]].submit(self._advance, job, status, {}, 0)
+        return status
+
+    def in_flight(self) -> int:
+        """Number of submitted jobs that have not finished yet."""
+        with self._changed:
+            return self._in_flight
+
+    def wait(self, below: int = 1) -> None:
+        """Block until fewer than ``below`` jobs are in flight (default: all done)."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._in_flight < below)
+
+    def close(self) -> None:
+        """Wait for every submitted job, then stop the stage pools."""
+        self.wait()
+        for pool in self._pools.values():
+            pool.shutdown(wait=True)
+
+    def __enter__(self) -> "StagePipeline":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _advance(self, job: Dict[str, Any], status: Dict[str, Any], state: Dict[str, Any], stage: int) -> None:
+        ok = _run_stage(stage, job, status, state, self._use_cache)
+        if ok and stage + 1 < len(STAGES):
+            self._pools[STAGES[stage + 1][0]].submit(self._advance, job, status, state, stage + 1)
+            return
+        state.clear()
+        try:
+            if self._on_done is not None:
+                self._on_done(job, status)
+        except Exception as exc:
+            debug_print(f"Recording job {job['job_id']} failed: {exc}", level="ERROR")
+        finally:
+            with self._changed:
+                self._in_flight -= 1
+                self._changed.notify_all()
+
+
+def write_report(statuses: List[Dict[str, Any]], report_path: str) -> str:
+    """Write job statuses as CSV (``.csv``) or JSONL (anything else)."""
+    os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+    with open(report_path, "w", encoding="utf-8", newline="") as f:
+        if report_path.lower().endswith(".csv"):
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(statuses)
+        else:
+            for row in statuses:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return report_path
+
+
+def run_batch(
+    manifest_path: str,
+    report_path: Optional[str] = None,
+    llm_concurrency: int = BATCH_LLM_CONCURRENCY,
+    tts_concurrency: int = BATCH_TTS_CONCURRENCY,
+    render_concurrency: int = BATCH_RENDER_CONCURRENCY,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    """Run every job in ``manifest_path`` and write the status report.
+
+    Returns the status rows in manifest order.
+    """
+    jobs = read_manifest(manifest_path)
+    if report_path is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        report_path = os.path.join(PROJECT_ROOT, "output", "batch", f"report_{timestamp}.jsonl")
+
+    debug_print(
+        f"Running {len(jobs)} jobs (LLM={llm_concurrency}, TTS={tts_concurrency}, render={render_concurrency})"
+    )
+    with StagePipeline(llm_concurrency, tts_concurrency, render_concurrency, use_cache=use_cache) as stages:
+        statuses = [stages.submit(job) for job in jobs]
+
+    write_report(statuses, report_path)
+    failed = sum(1 for s in statuses if s["status"] != "ok")
+    debug_print(f"Batch finished: {len(statuses) - failed} ok, {failed} failed. Report: {report_path}")
+    return statuses
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Generate audio and video for every job listed in a CSV/JSONL manifest."
+    )
+    parser.add_argument("manifest", help="Path to the CSV or JSONL manifest")
+    parser.add_argument("--report", help="Status report path (.jsonl or .csv)", default=None)
+    parser.add_argument("--llm_concurrency", type=int, default=BATCH_LLM_CONCURRENCY)
+    parser.add_argument("--tts_concurrency", type=int, default=BATCH_TTS_CONCURRENCY)
+    parser.add_argument("--render_concurrency", type=int, default=BATCH_RENDER_CONCURRENCY)
+    parser.add_argument("--no_cache", help="Bypass the LLM response cache", action="store_true")
+    args = parser.parse_args()
+
+    with profiled("generate_batch"):
+        results = run_batch(
+            args.manifest,
+            report_path=args.report,
+            llm_concurrency=args.llm_concurrency,
+            tts_concurrency=args.tts_concurrency,
+            render_concurrency=args.render_concurrency,
+            use_cache=not args.no_cache,
+        )
+    if summary():
+        debug_print("Stage summary:\n" + format_summary())
+    raise SystemExit(0 if all(r["status"] == "ok" for r in results) else 1)
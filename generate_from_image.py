@@ -11,76 +11,133 @@ Environment variables required:
 - TTS:  OPENAI_TTS_API_KEY, OPENAI_TTS_API_BASE, OPENAI_TTS_DEPLOYMENT_NAME
 """
 
+import asyncio
 import os
 import json
 import re
-import shutil
-from typing import Any, Dict, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
-from core.common import debug_print, SCRIPT_OUTPUT_FOLDER
+from core.common import debug_print, SCRIPT_OUTPUT_FOLDER, VIDEO_OUTPUT_FOLDER
+from core.checkpoint import Checkpoint, checkpoint_path, job_key
+from core.clients import backend_semaphore
 from core.generate_script_json import (
+    ainvoke_openai,
+    ainvoke_openai_with_image,
+    ainvoke_openai_with_image_and_pdf,
     invoke_openai_with_image,
     invoke_openai,
     invoke_openai_with_image_and_pdf,
+    invoke_openai_stream,
+    invoke_openai_with_image_stream,
+    invoke_openai_with_image_and_pdf_stream,
+    llm_cache_stats,
 )
-from core.generate_audio import generate_audio_from_script
+from core.json_stream import ArrayItemParser
+from core.prompt_templates import load_template
+from core.generate_audio import agenerate_audio_for_scripts, generate_audio_for_scripts
 from core.generate_video import generate_video_for_paragraphs
-from core.excel_utils import extract_sheet_text, export_sheet_pdf
+from core.pipeline import run_paragraph_pipeline
+from core.context_packing import pack_excel_context
+from core.instrumentation import format_summary, profiled, span, summary
+from core.log_writer import log_context
+from core.excel_utils import extract_sheet_text, extract_sheet_text_streaming
+from core.pdf_export import export_sheet_data_pdf
 
 
+# Number of flat_text entries after which streaming extraction stops reading;
+# the prompt itself is sized by EXCEL_CONTEXT_TOKEN_BUDGET (core.context_packing)
 EXCEL_FLAT_TEXT_LIMIT = int(os.getenv("EXCEL_FLAT_TEXT_LIMIT", "5000"))
+# Read sheets row by row and stop at EXCEL_FLAT_TEXT_LIMIT (for very large workbooks)
+EXCEL_STREAMING = os.getenv("EXCEL_STREAMING", "0") == "1"
+# Parallel languages in --languages mode, and how many of them may render at once
+LANGUAGE_CONCURRENCY = int(os.getenv("LANGUAGE_CONCURRENCY", "4"))
+RENDER_CONCURRENCY = int(os.getenv("RENDER_CONCURRENCY", "1"))
+# Stream the LLM response and overlap TTS and rendering per paragraph in main();
+# PIPELINED=0 runs the stages one after another
+PIPELINED = os.getenv("PIPELINED", "1") != "0"
+
+IMAGE_PROMPT_TEMPLATE = "EGM_Help_image_to_audio.txt"
+EXCEL_IMAGE_PROMPT_TEMPLATE = "EGM_Help_excel_image_to_audio.txt"
+
 
 def read_prompt_template() -> str:
     """Read the base prompt for image-only transcription."""
-    path = os.path.join("prompt_library", "EGM_Help_image_to_audio.txt")
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
+    return load_template(IMAGE_PROMPT_TEMPLATE).text
 
 
 def read_prompt_template_excel_image() -> str:
     """Read the prompt for Excel+image guided output."""
-    path = os.path.join("prompt_library", "EGM_Help_excel_image_to_audio.txt")
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
+    return load_template(EXCEL_IMAGE_PROMPT_TEMPLATE).text
 
 
 def prepare_prompt(language: str = "english") -> str:
     """Prepare the prompt for image-only mode."""
-    prompt = read_prompt_template()
-    prompt = prompt.replace("<<LANGUAGE>>", language)
-    if "<<LANGUAGE>>" in prompt:
-        raise ValueError("Unresolved placeholder <<LANGUAGE>> in prompt")
-    return prompt
+    template = load_template(IMAGE_PROMPT_TEMPLATE, required=("LANGUAGE",))
+    return template.render(LANGUAGE=language)
 
-def prepare_prompt_excel_image(language: str, excel_data_json: str) -> str:
+def prepare_prompt_excel_image(language: str, excel_data_json: str, excel_data_markdown: str = "") -> str:
     """Prepare the prompt for Excel+image mode with embedded authoritative Excel JSON."""
-    prompt = read_prompt_template_excel_image()
-    prompt = prompt.replace("<<LANGUAGE>>", language)
-    prompt = prompt.replace("<<EXCEL_DATA_JSON>>", excel_data_json)
+    template = load_template(EXCEL_IMAGE_PROMPT_TEMPLATE, required=("LANGUAGE", "EXCEL_DATA_JSON"))
+    prompt = template.render(
+        LANGUAGE=language,
+        EXCEL_DATA_JSON=excel_data_json,
+        EXCEL_DATA_MARKDOWN=excel_data_markdown,
+    )
 
-    if "<<EXCEL_DATA_MARKDOWN>>" in prompt:
-        prompt = prompt.replace("<<EXCEL_DATA_MARKDOWN>>", excel_data_markdown)
-    else:
+    if "EXCEL_DATA_MARKDOWN" not in template.placeholders:
         # Append a clearly labeled Markdown section so the model sees the exact grid.
         prompt += "\n\n## Excel-Derived Markdown (authoritative table)\n\n```markdown\n" + excel_data_markdown + "\n```\n"
 
-    if "<<LANGUAGE>>" in prompt or "<<EXCEL_DATA_JSON>>" in prompt:
-        raise ValueError("Unresolved placeholders in prompt")
-
     return prompt
 
 
-def add_tts_to_paragraphs(script_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Generate TTS for each paragraph and add `audio_file_path` in-place.
+def _pending_audio(
+    script_data: Dict[str, Any], checkpoint: Optional[Checkpoint] = None
+) -> List[Tuple[int, Dict[str, Any]]]:
+    """``(index, paragraph)`` of the paragraphs that still need audio.
 
-    Returns the updated dict.
+    Paragraphs that already have an ``audio_file_path``, or whose audio is
+    recorded in ``checkpoint``, are skipped (the checkpointed path is filled in).
     """
-    for para in script_data.get("paragraphs", []):
+    pending = []
+    for index, para in enumerate(script_data.get("paragraphs", [])):
         text = para.get("audio_script", "")
-        if not text:
+        if not text or para.get("audio_file_path"):
             continue
-        audio_path = generate_audio_from_script(text)
+        done = checkpoint.audio(index, text) if checkpoint is not None else None
+        if done:
+            para["audio_file_path"] = done
+        else:
+            pending.append((index, para))
+    return pending
+
+
+def add_tts_to_paragraphs(script_data: Dict[str, Any], checkpoint: Optional[Checkpoint] = None) -> Dict[str, Any]:
+    """Generate TTS for each paragraph and add `audio_file_path` in-place.
+
+    Paragraphs are synthesized concurrently (see ``TTS_MAX_CONCURRENCY``).
+    Only paragraphs without audio are synthesized. Each one is recorded in
+    ``checkpoint`` as soon as its audio exists, so a failure elsewhere does
+    not lose it. Returns the updated dict.
+    """
+    pending = _pending_audio(script_data, checkpoint)
+    spoken = [p for p in script_data.get("paragraphs", []) if p.get("audio_script", "")]
+    if len(pending) < len(spoken):
+        debug_print(f"Audio already done for {len(spoken) - len(pending)} of {len(spoken)} paragraphs")
+    if not pending:
+        return script_data
+
+    def on_result(i: int, audio_path: str) -> None:
+        index, para = pending[i]
+        para["audio_file_path"] = audio_path
+        if checkpoint is not None:
+            checkpoint.record_audio(index, para["audio_script"], audio_path)
+
+    audio_paths = generate_audio_for_scripts([p["audio_script"] for _, p in pending], on_result=on_result)
+    for (_, para), audio_path in zip(pending, audio_paths):
         para["audio_file_path"] = audio_path
     return script_data
 
@@ -90,174 +147,166 @@ def _sanitize_name(value: str) -> str:
     return re.sub(r"[^A-Za-z0-9_-]+", "_", value or "")
 
 
+def _image_only_suffix(image_path: Optional[str]) -> str:
+    """File suffix for image-only runs, distinct per source image."""
+    if not image_path:
+        return "image_only"
+    return f"image_only_{_sanitize_name(os.path.splitext(os.path.basename(image_path))[0])}"
+
+
 def _save_text(path: str, content: str) -> None:
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path, "w", encoding="utf-8") as f:
         f.write(content)
 
 
-def _export_markdown_to_pdf(markdown: str, pdf_path: str) -> Optional[str]:
-    """Attempt to write the provided Markdown text to a PDF file.
-
-    Returns the path if successful; otherwise returns None and logs the error.
+def prepare_excel_context(
+    excel_path: str,
+    sheet_name: str,
+    today_date_folder: Optional[str] = None,
+    streaming: Optional[bool] = None,
+) -> Optional[Dict[str, Any]]:
+    """Extract an Excel sheet once so it can feed prompts in any language.
+
+    With ``streaming`` (default ``EXCEL_STREAMING``) the sheet is read row by
+    row and reading stops once ``EXCEL_FLAT_TEXT_LIMIT`` entries are found
+    or ``EXCEL_STREAMING_MAX_ROWS`` rows were read, keeping memory bounded
+    for very large ``.xlsx`` sheets (``.xls`` sheets are still parsed whole). The JSON and Markdown are
+    then fitted to ``EXCEL_CONTEXT_TOKEN_BUDGET`` tokens (see
+    :func:`core.context_packing.pack_excel_context`).
+
+    Returns a dict with ``excel_data_json``, ``markdown``, ``pdf_path``,
+    ``suffix`` and the packing report under ``packing``, or ``None`` if the
+    sheet could not be prepared (callers then fall back to the image-only
+    prompt).
     """
+    if today_date_folder is None:
+        today_date_folder = datetime.now().strftime("%Y-%m-%d")
+    if streaming is None:
+        streaming = EXCEL_STREAMING
+    suffix = f"{_sanitize_name(os.path.splitext(os.path.basename(excel_path))[0])}_{_sanitize_name(sheet_name)}"
+    prompts_dir = os.path.join("output", "prompts", today_date_folder)
+
     try:
-        from fpdf import FPDF  # type: ignore
-
-        pdf = FPDF()
-        pdf.set_auto_page_break(auto=True, margin=10)
-        pdf.add_page()
-        pdf.set_font("Arial", size=10)
-        for line in markdown.splitlines():
-            pdf.multi_cell(0, 5, line)
-        pdf.output(pdf_path)
-        return pdf_path
-    except Exception as exc:  # pragma: no cover - best effort
-        debug_print(f"PDF export failed: {exc}")
+        with span("excel_read", sheet=sheet_name, streaming=streaming):
+            if streaming:
+                excel_data = extract_sheet_text_streaming(
+                    excel_path, sheet_name, flat_text_limit=EXCEL_FLAT_TEXT_LIMIT
+                )
+                if excel_data["truncated_by"] == "flat_text_limit":
+                    debug_print(f"Stopped reading sheet {sheet_name} at {EXCEL_FLAT_TEXT_LIMIT} flat_text entries.")
+                elif excel_data["truncated_by"] == "max_rows":
+                    debug_print(
+                        f"Stopped reading sheet {sheet_name} at {len(excel_data['rows'])} rows "
+                        f"(EXCEL_STREAMING_MAX_ROWS)."
+                    )
+            else:
+                excel_data = extract_sheet_text(excel_path=excel_path, sheet_name=sheet_name)
+        with span("excel_pack"):
+            packed = pack_excel_context(excel_data)
+        excel_markdown = packed.markdown
+
+        # Save the markdown as a .md file in output/prompts for auditing
+        _save_text(os.path.join(prompts_dir, f"excel_markdown_{suffix}.md"), excel_markdown)
+
+        # One PDF of the packed sheet, kept for auditing and attached to the LLM call
+        pdf_path = export_sheet_data_pdf(packed.sheet, os.path.join(prompts_dir, f"excel_sheet_{suffix}.pdf"))
+    except Exception as exc:
+        debug_print(f"Skipping Excel context: {exc}", level="WARNING")
         return None
 
+    return {
+        "excel_data_json": packed.excel_data_json,
+        "markdown": excel_markdown,
+        "pdf_path": pdf_path,
+        "suffix": suffix,
+        "packing": packed.report,
+    }
 
-def main(
-    image_path: str,
+
+def build_prompt(
+    image_path: Optional[str],
     excel_path: Optional[str] = None,
     sheet_name: Optional[str] = None,
     language: str = "english",
     pdf_path: Optional[str] = None,
-) -> None:
-    """Generate per-paragraph audio and a simple video.
-
-    - If `excel_path` and `sheet_name` are provided, uses Excel+image prompt.
-    - If `pdf_path` is provided alongside an image, both are sent to the LLM.
-    - Otherwise, uses image-only transcription prompt.
+    today_date_folder: Optional[str] = None,
+    excel_context: Optional[Dict[str, Any]] = None,
+) -> Tuple[str, str, Optional[str]]:
+    """Build the LLM prompt for one job.
+
+    ``excel_context`` (from :func:`prepare_excel_context`) is used when given;
+    otherwise the sheet is extracted here if ``excel_path`` and ``sheet_name``
+    are set. Returns ``(prompt, suffix, pdf_path)`` where ``suffix`` names
+    the output files of this job and ``pdf_path`` is the PDF to attach (the
+    exported Excel sheet in Excel mode, otherwise the caller's PDF).
     """
-    # Output locations
-    today_date_folder = datetime.now().strftime("%Y-%m-%d")
-    os.makedirs(SCRIPT_OUTPUT_FOLDER, exist_ok=True)
-    output_dir = os.path.join(SCRIPT_OUTPUT_FOLDER, today_date_folder)
-    os.makedirs(output_dir, exist_ok=True)
-    
-    if image_path is not None and not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image not found: {image_path}")
-    if pdf_path is not None and not os.path.exists(pdf_path):
-        raise FileNotFoundError(f"PDF not found: {pdf_path}")
-
-    # Build prompt and optionally export the Excel sheet to PDF
-    pdf_path: Optional[str] = None
-    if excel_path and sheet_name:
-
-        excel_data = extract_sheet_text(excel_path=excel_path, sheet_name=sheet_name)
-        excel_payload = {
-            "sheet_name": excel_data["sheet_name"],
-            "flat_text": excel_data["flat_text"],
-        }
-
-        if len(excel_payload["flat_text"]) > EXCEL_FLAT_TEXT_LIMIT:
-            debug_print(
-                f"Truncating Excel flat_text from {len(excel_payload['flat_text'])} to {EXCEL_FLAT_TEXT_LIMIT} characters."
+    if today_date_folder is None:
+        today_date_folder = datetime.now().strftime("%Y-%m-%d")
+    if excel_context is None and excel_path and sheet_name:
+        excel_context = prepare_excel_context(excel_path, sheet_name, today_date_folder)
+
+    with span("prompt_build", language=language, excel=bool(excel_context)):
+        if excel_context:
+            prompt = prepare_prompt_excel_image(
+                language=language,
+                excel_data_json=excel_context["excel_data_json"],
+                excel_data_markdown=excel_context["markdown"],
             )
-            excel_payload["flat_text"] = excel_payload["flat_text"][:EXCEL_FLAT_TEXT_LIMIT]
-        excel_markdown = excel_data.get("markdown", "")
-        excel_pdf_source = excel_data.get("pdf_path") or excel_data.get("pdf_file_path")
-        if excel_pdf_source and os.path.exists(excel_pdf_source):
-            excel_pdf_output = os.path.join(
-                "output",
-                "prompts",
-                today_date_folder,
-                f"excel_pdf_{_sanitize_name(os.path.splitext(os.path.basename(excel_path))[0])}_{_sanitize_name(sheet_name)}.pdf",
-            )
-            os.makedirs(os.path.dirname(excel_pdf_output), exist_ok=True)
-            shutil.copy(excel_pdf_source, excel_pdf_output)
-            debug_print(f"Excel PDF copied to: {excel_pdf_output}")
+            suffix = excel_context["suffix"]
+            pdf_path = excel_context["pdf_path"]
         else:
-            debug_print("Excel PDF not available; skipping copy.")
-
-
-        # Export the sheet to PDF for auditing
-        excel_pdf_output = os.path.join(
-            "output",
-            "prompts",
-            today_date_folder,
-            f"excel_sheet_{_sanitize_name(os.path.splitext(os.path.basename(excel_path))[0])}_{_sanitize_name(sheet_name)}.pdf",
-        )
-        export_sheet_pdf(excel_path=excel_path, sheet_name=sheet_name, output_pdf=excel_pdf_output)
-
-
-        prompt = prepare_prompt_excel_image(
-            language=language,
-            excel_data_json=json.dumps(excel_payload, ensure_ascii=False, indent=2),
-        )
-        suffix = f"{_sanitize_name(os.path.splitext(os.path.basename(excel_path))[0])}_{_sanitize_name(sheet_name)}"
-        # Save prompt for audit in all cases
-        prompt_output = os.path.join("output", "prompts", today_date_folder, f"prompt_{suffix}.txt")
-        _save_text(prompt_output, prompt)
-        try:
-            excel_data = extract_sheet_text(excel_path=excel_path, sheet_name=sheet_name)
-            excel_payload = {
-                "sheet_name": excel_data["sheet_name"],
-                "flat_text": excel_data["flat_text"],
-            }
-            excel_markdown = excel_data.get("markdown", "")
-            # Save the markdown as a .md file in output/prompts for auditing
-            excel_markdown_output = os.path.join(
-                "output",
-                "prompts",
-                today_date_folder,
-                f"excel_markdown_{_sanitize_name(os.path.splitext(os.path.basename(excel_path))[0])}_{_sanitize_name(sheet_name)}.md",
-            )
-            _save_text(excel_markdown_output, excel_markdown)
-
-            tentative_pdf = os.path.join(
-                "output",
-                "prompts",
-                today_date_folder,
-                f"excel_pdf_{_sanitize_name(os.path.splitext(os.path.basename(excel_path))[0])}_{_sanitize_name(sheet_name)}.pdf",
-            )
-            pdf_path = _export_markdown_to_pdf(excel_markdown, tentative_pdf)
-            if pdf_path:
-                prompt = prepare_prompt_excel_image(
-                    language=language,
-                    excel_data_json=json.dumps(excel_payload, ensure_ascii=False, indent=2),
-                    excel_data_markdown=excel_markdown,
-                )
-                suffix = f"{_sanitize_name(os.path.splitext(os.path.basename(excel_path))[0])}_{_sanitize_name(sheet_name)}"
-            else:
-                raise RuntimeError("PDF export failed")
-        except Exception as exc:
-            debug_print(f"Skipping Excel context: {exc}")
             prompt = prepare_prompt(language=language)
-            suffix = "image_only"
-            pdf_path = None
+            suffix = _image_only_suffix(image_path)
 
-    else:
-        prompt = prepare_prompt(language=language)
-        suffix = "image_only"
+    # Several languages of the same source must not share output files
+    suffix = f"{suffix}_{_sanitize_name(language)}"
 
     # Save prompt for audit in all cases with note about PDF attachment
     prompt_output = os.path.join("output", "prompts", today_date_folder, f"prompt_{suffix}.txt")
     pdf_note = pdf_path if pdf_path else "none"
     _save_text(prompt_output, f"# PDF attached: {pdf_note}\n\n{prompt}")
+    return prompt, suffix, pdf_path
 
 
-    output_file = os.path.join(output_dir, f"script_json_output_{suffix}.json")
+def _invoke_llm(prompt: str, image_path: Optional[str], pdf_path: Optional[str], use_cache: bool, stream: bool = False):
+    """Call the LLM with whatever context is available.
 
-    # Invoke or reuse cached JSON
-    if os.path.exists(output_file):
-        debug_print(f"Reusing existing script JSON: {output_file}")
-        with open(output_file, "r", encoding="utf-8") as f:
-            script_json = f.read()
-    else:
-        if pdf_path and image_path:
-            debug_print("Invoking LLM with image and PDF context…")
-            script_json = invoke_openai_with_image_and_pdf(
-                prompt=prompt, image_path=image_path, pdf_path=pdf_path
-            )
-        elif image_path:
-            debug_print("Invoking LLM with image context…")
-            script_json = invoke_openai_with_image(prompt=prompt, image_path=image_path)
-        else:
-            debug_print("Invoking LLM with text-only context…")
-            script_json = invoke_openai(prompt=prompt)
-        _save_text(output_file, script_json)
+    Returns the response text, or an iterator of text deltas with ``stream``.
+    """
+    # Invoke the LLM; unchanged prompt + attachments are served from the response cache
+    if pdf_path and image_path:
+        debug_print("Invoking LLM with image and PDF context…")
+        invoke = invoke_openai_with_image_and_pdf_stream if stream else invoke_openai_with_image_and_pdf
+        return invoke(prompt=prompt, image_path=image_path, pdf_path=pdf_path, use_cache=use_cache)
+    if image_path:
+        debug_print("Invoking LLM with image context…")
+        invoke = invoke_openai_with_image_stream if stream else invoke_openai_with_image
+        return invoke(prompt=prompt, image_path=image_path, use_cache=use_cache)
+    debug_print("Invoking LLM with text-only context…")
+    invoke = invoke_openai_stream if stream else invoke_openai
+    return invoke(prompt=prompt, use_cache=use_cache)
+
+
+async def _ainvoke_llm(prompt: str, image_path: Optional[str], pdf_path: Optional[str], use_cache: bool) -> str:
+    """Async :func:`_invoke_llm`."""
+    if pdf_path and image_path:
+        debug_print("Invoking LLM with image and PDF context…")
+        return await ainvoke_openai_with_image_and_pdf(
+            prompt=prompt, image_path=image_path, pdf_path=pdf_path, use_cache=use_cache
+        )
+    if image_path:
+        debug_print("Invoking LLM with image context…")
+        return await ainvoke_openai_with_image(prompt=prompt, image_path=image_path, use_cache=use_cache)
+    debug_print("Invoking LLM with text-only context…")
+    return await ainvoke_openai(prompt=prompt, use_cache=use_cache)
+
+
+def _parse_script(script_json: str, output_file: str, raw_text_file: Optional[str] = None) -> Dict[str, Any]:
+    """Save the model's JSON to ``output_file`` and return it parsed."""
+    _save_text(output_file, script_json)
+    stats = llm_cache_stats()
+    debug_print(f"LLM cache: {stats['hits']} hits, {stats['misses']} misses (hit rate {stats['hit_rate']:.0%})")
 
     # Parse JSON safely
     try:
@@ -267,13 +316,43 @@ def main(
 
     # Optionally save raw_text for auditing
     raw_text = script_data.get("raw_text")
-    if isinstance(raw_text, str) and raw_text.strip():
-        _save_text(os.path.join(output_dir, f"raw_text_{suffix}.txt"), raw_text)
+    if raw_text_file and isinstance(raw_text, str) and raw_text.strip():
+        _save_text(raw_text_file, raw_text)
+    return script_data
+
 
-    # Generate TTS per paragraph (idempotent if already present)
-    audio_exists = any("audio_file_path" in p for p in script_data.get("paragraphs", []))
-    if not audio_exists:
-        script_data = add_tts_to_paragraphs(script_data)
+def request_script(
+    prompt: str,
+    image_path: Optional[str],
+    pdf_path: Optional[str],
+    output_file: str,
+    use_cache: bool = True,
+    raw_text_file: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Invoke the LLM, save its JSON to ``output_file`` and return it parsed.
+
+    The model's ``raw_text`` field, if any, is saved to ``raw_text_file``.
+    A script already checkpointed for the same prompt and attachments is
+    reused without calling the LLM (unless ``use_cache`` is off).
+    """
+    checkpoint = Checkpoint(checkpoint_path(output_file), key=job_key(prompt, image_path, pdf_path))
+    script_data = checkpoint.script() if use_cache else None
+    if script_data is not None:
+        debug_print(f"Resuming from checkpoint {checkpoint.path}: {checkpoint.progress()}")
+        return script_data
+    script_json = _invoke_llm(prompt, image_path, pdf_path, use_cache)
+    script_data = _parse_script(script_json, output_file, raw_text_file)
+    checkpoint.record_script(script_data)
+    return script_data
+
+
+def synthesize_audio(script_data: Dict[str, Any], output_file: str) -> Dict[str, Any]:
+    """Add TTS audio to every paragraph and save the updated script JSON.
+
+    Paragraphs that already have audio, here or in the job's checkpoint,
+    are not synthesized again.
+    """
+    script_data = add_tts_to_paragraphs(script_data, Checkpoint(checkpoint_path(output_file)))
 
     # Ensure all paragraphs have audio before saving
     missing_audio = [idx for idx, p in enumerate(script_data.get("paragraphs", [])) if not p.get("audio_file_path")]
@@ -283,14 +362,282 @@ def main(
 
     _save_text(output_file, json.dumps(script_data, ensure_ascii=False, indent=2))
     debug_print(f"Script JSON ready: {output_file}")
+    return script_data
 
 
+def render_video(
+    script_data: Dict[str, Any],
+    image_path: Optional[str],
+    output_path: Optional[str] = None,
+    checkpoint_file: Optional[str] = None,
+) -> str:
+    """Render the narrated video; the image is the background if provided.
+
+    With ``checkpoint_file`` each encoded segment and the finished video
+    are recorded in that checkpoint.
+    """
+    checkpoint = Checkpoint(checkpoint_file) if checkpoint_file else None
     # Render video with the image as background if provided, else use black background
-    if image_path:
-        video_path = generate_video_for_paragraphs(script_data, background_image_path=image_path)
-    else:
-        video_path = generate_video_for_paragraphs(script_data, background_color="black")
+    video_path = generate_video_for_paragraphs(
+        script_data, background_image_path=image_path, output_path=output_path,
+        on_segment=checkpoint.record_segment if checkpoint is not None else None,
+    )
+    if checkpoint is not None:
+        checkpoint.record_video(video_path)
+    debug_print(f"Video generated at: {video_path}")
+    return video_path
+
+
+def stream_and_render(
+    prompt: str,
+    image_path: Optional[str],
+    pdf_path: Optional[str],
+    output_file: str,
+    use_cache: bool = True,
+    raw_text_file: Optional[str] = None,
+    output_path: Optional[str] = None,
+) -> Tuple[Dict[str, Any], str]:
+    """Stream the LLM response straight into the TTS/render pipeline.
+
+    Each paragraph goes to TTS as soon as its JSON object is complete, so
+    the first audio and segments are produced while the model is still
+    writing the rest of the script. Once the response is complete it is
+    saved and parsed like :func:`request_script`, and the script JSON is
+    updated with the audio paths. Returns ``(script_data, video_path)``.
+
+    The job's checkpoint records each paragraph's audio and segment as soon
+    as it is done, and audio recorded by an earlier run is reused. If a
+    later stage fails after the response was complete, the script is still
+    recorded, so a rerun resumes without calling the LLM.
+    """
+    checkpoint = Checkpoint(checkpoint_path(output_file), key=job_key(prompt, image_path, pdf_path))
+    parser = ArrayItemParser("paragraphs")
+    chunks = _invoke_llm(prompt, image_path, pdf_path, use_cache, stream=True)
+
+    def resumed(paragraphs):
+        for index, para in enumerate(paragraphs):
+            done = checkpoint.audio(index, para["audio_script"]) if para.get("audio_script") else None
+            if done and not para.get("audio_file_path"):
+                para["audio_file_path"] = done
+            yield para
+
+    try:
+        paragraphs, video_path = run_paragraph_pipeline(
+            resumed(parser.iter_items(chunks)), background_image_path=image_path, output_path=output_path,
+            on_audio=lambda index, para: checkpoint.record_audio(index, para["audio_script"], para["audio_file_path"]),
+            on_segment=checkpoint.record_segment,
+        )
+    except Exception:
+        try:
+            checkpoint.record_script(json.loads(parser.text))
+        except ValueError:  # response incomplete
+            pass
+        raise
+
+    script_data = _parse_script(parser.text, output_file, raw_text_file)
+    checkpoint.record_script(script_data)
+    checkpoint.record_video(video_path)
+    script_data["paragraphs"] = paragraphs
+    _save_text(output_file, json.dumps(script_data, ensure_ascii=False, indent=2))
+    debug_print(f"Script JSON ready: {output_file}")
     debug_print(f"Video generated at: {video_path}")
+    return script_data, video_path
+
+
+def job_output_files(suffix: str, today_date_folder: Optional[str] = None) -> Tuple[str, str]:
+    """Return ``(script_json_file, raw_text_file)`` for a job suffix."""
+    if today_date_folder is None:
+        today_date_folder = datetime.now().strftime("%Y-%m-%d")
+    output_dir = os.path.join(SCRIPT_OUTPUT_FOLDER, today_date_folder)
+    os.makedirs(output_dir, exist_ok=True)
+    return (
+        os.path.join(output_dir, f"script_json_output_{suffix}.json"),
+        os.path.join(output_dir, f"raw_text_{suffix}.txt"),
+    )
+
+
+def main(
+    image_path: str,
+    excel_path: Optional[str] = None,
+    sheet_name: Optional[str] = None,
+    language: str = "english",
+    pdf_path: Optional[str] = None,
+    use_cache: bool = True,
+    video_output_path: Optional[str] = None,
+) -> str:
+    """Generate per-paragraph audio and a simple video.
+
+    - If `excel_path` and `sheet_name` are provided, uses Excel+image prompt.
+    - If `pdf_path` is provided alongside an image, both are sent to the LLM.
+    - Otherwise, uses image-only transcription prompt.
+
+    LLM responses are served from the response cache when the prompt and
+    attachments are unchanged; set `use_cache=False` to force a fresh call.
+    With `PIPELINED` (the default) the LLM response is streamed and each
+    paragraph goes to TTS and rendering as soon as it is complete, instead
+    of waiting for the whole script and then for all audio.
+    Returns the path of the rendered video.
+    """
+    # Output locations
+    today_date_folder = datetime.now().strftime("%Y-%m-%d")
+
+    if image_path is not None and not os.path.exists(image_path):
+        raise FileNotFoundError(f"Image not found: {image_path}")
+    if pdf_path is not None and not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF not found: {pdf_path}")
+
+    prompt, suffix, pdf_path = build_prompt(
+        image_path,
+        excel_path=excel_path,
+        sheet_name=sheet_name,
+        language=language,
+        pdf_path=pdf_path,
+        today_date_folder=today_date_folder,
+    )
+    output_file, raw_text_file = job_output_files(suffix, today_date_folder)
+    if video_output_path is None:
+        # Stable per-input path so a rerun can reuse unchanged video segments
+        video_output_path = os.path.join(VIDEO_OUTPUT_FOLDER, f"video_{suffix}.mp4")
+
+    # A checkpointed script resumes stage by stage instead of streaming again
+    resume = Checkpoint(checkpoint_path(output_file), key=job_key(prompt, image_path, pdf_path)).script()
+    if PIPELINED and (resume is None or not use_cache):
+        _, video_path = stream_and_render(
+            prompt, image_path, pdf_path, output_file,
+            use_cache=use_cache, raw_text_file=raw_text_file, output_path=video_output_path,
+        )
+        return video_path
+
+    script_data = request_script(
+        prompt, image_path, pdf_path, output_file, use_cache=use_cache, raw_text_file=raw_text_file
+    )
+    script_data = synthesize_audio(script_data, output_file)
+    return render_video(
+        script_data, image_path, output_path=video_output_path, checkpoint_file=checkpoint_path(output_file)
+    )
+
+
+async def amain(
+    image_path: str,
+    excel_path: Optional[str] = None,
+    sheet_name: Optional[str] = None,
+    language: str = "english",
+    pdf_path: Optional[str] = None,
+    use_cache: bool = True,
+    video_output_path: Optional[str] = None,
+) -> str:
+    """Async :func:`main` for callers that run their own event loop.
+
+    LLM and TTS requests go through the loop's shared async clients and are
+    capped per backend (``ASYNC_LLM_CONCURRENCY``, ``ASYNC_TTS_CONCURRENCY``),
+    so one loop can drive many jobs at once. File work and rendering run in
+    worker threads, at most ``RENDER_CONCURRENCY`` renders per loop.
+    Cancelling the task stops pending network requests; a render that has
+    already started finishes in its thread. Returns the video path.
+    """
+    today_date_folder = datetime.now().strftime("%Y-%m-%d")
+
+    if image_path is not None and not os.path.exists(image_path):
+        raise FileNotFoundError(f"Image not found: {image_path}")
+    if pdf_path is not None and not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF not found: {pdf_path}")
+
+    prompt, suffix, pdf_path = await asyncio.to_thread(
+        build_prompt,
+        image_path,
+        excel_path=excel_path,
+        sheet_name=sheet_name,
+        language=language,
+        pdf_path=pdf_path,
+        today_date_folder=today_date_folder,
+    )
+    output_file, raw_text_file = job_output_files(suffix, today_date_folder)
+    if video_output_path is None:
+        video_output_path = os.path.join(VIDEO_OUTPUT_FOLDER, f"video_{suffix}.mp4")
+
+    checkpoint = await asyncio.to_thread(
+        Checkpoint, checkpoint_path(output_file), job_key(prompt, image_path, pdf_path)
+    )
+    script_data = checkpoint.script() if use_cache else None
+    if script_data is None:
+        script_json = await _ainvoke_llm(prompt, image_path, pdf_path, use_cache)
+        script_data = await asyncio.to_thread(_parse_script, script_json, output_file, raw_text_file)
+        await asyncio.to_thread(checkpoint.record_script, script_data)
+
+    pending = _pending_audio(script_data, checkpoint)
+
+    def on_result(i: int, audio_path: str) -> None:
+        index, para = pending[i]
+        checkpoint.record_audio(index, para["audio_script"], audio_path)
+
+    audio_paths = await agenerate_audio_for_scripts([p["audio_script"] for _, p in pending], on_result=on_result)
+    for (_, para), audio_path in zip(pending, audio_paths):
+        para["audio_file_path"] = audio_path
+    script_data = await asyncio.to_thread(synthesize_audio, script_data, output_file)
+
+    async with backend_semaphore("render", RENDER_CONCURRENCY):
+        return await asyncio.to_thread(
+            render_video, script_data, image_path, video_output_path, checkpoint_path(output_file)
+        )
+
+
+def main_languages(
+    image_path: Optional[str],
+    languages: List[str],
+    excel_path: Optional[str] = None,
+    sheet_name: Optional[str] = None,
+    pdf_path: Optional[str] = None,
+    use_cache: bool = True,
+) -> Dict[str, str]:
+    """Generate one video per language from a single set of inputs.
+
+    The Excel sheet is extracted and exported once, and the image is read
+    and encoded once (see ``core.generate_script_json``); the per-language
+    LLM and TTS work then runs in parallel (``LANGUAGE_CONCURRENCY``) while
+    renders are limited to ``RENDER_CONCURRENCY`` at a time.
+
+    Returns a mapping of language to video path.
+    """
+    today_date_folder = datetime.now().strftime("%Y-%m-%d")
+
+    if image_path is not None and not os.path.exists(image_path):
+        raise FileNotFoundError(f"Image not found: {image_path}")
+    if pdf_path is not None and not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF not found: {pdf_path}")
+
+    excel_context = None
+    if excel_path and sheet_name:
+        excel_context = prepare_excel_context(excel_path, sheet_name, today_date_folder)
+    render_slots = threading.BoundedSemaphore(max(1, RENDER_CONCURRENCY))
+
+    def _run_language(language: str) -> str:
+        with log_context(language=language):
+            prompt, suffix, attach_pdf = build_prompt(
+                image_path,
+                language=language,
+                pdf_path=pdf_path,
+                today_date_folder=today_date_folder,
+                excel_context=excel_context,
+            )
+            output_file, raw_text_file = job_output_files(suffix, today_date_folder)
+            script_data = request_script(
+                prompt, image_path, attach_pdf, output_file, use_cache=use_cache, raw_text_file=raw_text_file
+            )
+            script_data = synthesize_audio(script_data, output_file)
+            with render_slots:
+                return render_video(
+                    script_data,
+                    image_path,
+                    output_path=os.path.join(VIDEO_OUTPUT_FOLDER, f"video_{suffix}.mp4"),
+                    checkpoint_file=checkpoint_path(output_file),
+                )
+
+    workers = max(1, min(LANGUAGE_CONCURRENCY, len(languages)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="language") as executor:
+        videos = dict(zip(languages, executor.map(_run_language, languages)))
+    for language, video_path in videos.items():
+        debug_print(f"[{language}] {video_path}")
+    return videos
 
 
 if __name__ == "__main__":
@@ -303,13 +650,33 @@ if __name__ == "__main__":
     parser.add_argument("--excel_path", help="Path to the Excel file (.xls/.xlsx)", default=None)
     parser.add_argument("--sheet_name", help="Sheet name inside the Excel file", default=None)
     parser.add_argument("--language", help="Language for captions/voiceover", default="english")
+    parser.add_argument(
+        "--languages",
+        help="Comma-separated languages; produces one video per language from a single extraction",
+        default=None,
+    )
     parser.add_argument("--pdf_path", help="Path to a PDF file for additional context", default=None)
+    parser.add_argument("--no_cache", help="Bypass the LLM response cache", action="store_true")
     args = parser.parse_args()
 
-    main(
-        image_path=args.image_path,
-        excel_path=args.excel_path,
-        sheet_name=args.sheet_name,
-        language=args.language,
-        pdf_path=args.pdf_path,
-    )
+    with profiled("generate_from_image"):
+        if args.languages:
+            main_languages(
+                image_path=args.image_path,
+                languages=[lang.strip() for lang in args.languages.split(",") if lang.strip()],
+                excel_path=args.excel_path,
+                sheet_name=args.sheet_name,
+                pdf_path=args.pdf_path,
+                use_cache=not args.no_cache,
+            )
+        else:
+            main(
+                image_path=args.image_path,
+                excel_path=args.excel_path,
+                sheet_name=args.sheet_name,
+                language=args.language,
+                pdf_path=args.pdf_path,
+                use_cache=not args.no_cache,
+            )
+    if summary():
+        debug_print("Stage summary:\n" + format_summary())
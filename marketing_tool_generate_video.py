@@ -8,29 +8,29 @@ from core.common import (
     SCRIPT_OUTPUT_FOLDER,
     today_date_folder,
     BACKGROUND_IMAGE_FOLDER,
+    VIDEO_OUTPUT_FOLDER,
     debug_print,
 )
 from core.generate_script_json import invoke_openai
-from core.generate_audio import generate_audio_from_script
+from core.generate_audio import generate_audio_for_scripts
 from core.generate_video import generate_video_for_paragraphs
+from core.prompt_templates import load_template
+
+
+PROMPT_TEMPLATE = "prompt_template.txt"
 
 
 def read_prompt_template() -> str:
     """Load the base prompt template from the prompt library."""
-    path = os.path.join("prompt_library", "prompt_template.txt")
-    with open(path, "r", encoding="utf-8") as f:
-        prompt = f.read()
-    return prompt
+    return load_template(PROMPT_TEMPLATE).text
 
 
 def prepare_prompt(language="english", rule_data=None):
     """
     Prepare the prompt for generating a video script.
     """
-    prompt = read_prompt_template()
-    prompt = prompt.replace("<<LANGUAGE>>", language)
-    prompt = prompt.replace("<<RULE_DATA>>", rule_data)
-    return prompt
+    template = load_template(PROMPT_TEMPLATE, required=("LANGUAGE", "RULE_DATA"))
+    return template.render(LANGUAGE=language, RULE_DATA=rule_data)
 
 
 def generate_audio_for_paragraphs(script_json):
@@ -39,8 +39,9 @@ def generate_audio_for_paragraphs(script_json):
     Returns the updated JSON object.
     """
     data = json.loads(script_json)
-    for para in data.get("paragraphs", []):
-        audio_path = generate_audio_from_script(para["audio_script"])
+    paragraphs = data.get("paragraphs", [])
+    audio_paths = generate_audio_for_scripts([para["audio_script"] for para in paragraphs])
+    for para, audio_path in zip(paragraphs, audio_paths):
         para["audio_file_path"] = audio_path
     return data
 
@@ -65,28 +66,20 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
     output_file = os.path.join(output_dir, "script_json_output.json")
 
-    if os.path.exists(output_file):
-        with open(output_file, "r", encoding="utf-8") as f:
-            script_json = f.read()
-    else:
-        script_json = invoke_openai(prompt=prompt)
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(script_json)
-    # Check if audio_file_path already exists in script_json
-    script_data = json.loads(script_json)
-    audio_exists = any("audio_file_path" in para for para in script_data.get("paragraphs", []))
-    if audio_exists:
-        audios = script_data
-    else:
-        # Generate audio files
-        audios = generate_audio_for_paragraphs(script_json=script_json)
-        # Overwrite the script_json file with the updated audios variable
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(json.dumps(audios, ensure_ascii=False, indent=2))
-    debug_print(f"Script JSON loaded from: {output_file}")
+    # Unchanged prompts are served from the LLM response cache
+    script_json = invoke_openai(prompt=prompt)
+    # Generate audio files and save the script with their paths
+    audios = generate_audio_for_paragraphs(script_json=script_json)
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(json.dumps(audios, ensure_ascii=False, indent=2))
+    debug_print(f"Script JSON saved to: {output_file}")
     # Generate video
     background_image=os.path.join(BACKGROUND_IMAGE_FOLDER, "bgimage_choctaw.png")
-    video_path = generate_video_for_paragraphs(audios,background_image_path=background_image)
+    # A stable name lets reruns reuse the segments of unchanged paragraphs
+    video_output = os.path.join(VIDEO_OUTPUT_FOLDER, "video_marketing_tool.mp4")
+    video_path = generate_video_for_paragraphs(
+        audios, background_image_path=background_image, output_path=video_output
+    )
     debug_print(f"Video generated at: {video_path}")
 
 
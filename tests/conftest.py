@@ -0,0 +1,46 @@
+"""Shared fixtures: keep persistent caches and logs out of the repository tree."""
+
+from pathlib import Path
+import sys
+
+import pytest
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.cache import ContentCache
+from core import common, log_writer
+import core.generate_audio as generate_audio
+import core.generate_script_json as generate_script_json
+import core.pdf_export as pdf_export
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        generate_audio, "_tts_cache", ContentCache(str(tmp_path / "tts"), suffix=".mp3")
+    )
+    monkeypatch.setattr(
+        generate_script_json,
+        "_llm_cache",
+        ContentCache(str(tmp_path / "llm"), suffix=".txt"),
+    )
+    monkeypatch.setattr(pdf_export, "_pdf_cache", ContentCache(str(tmp_path / "pdf"), suffix=".pdf"))
+
+
+@pytest.fixture(autouse=True)
+def isolated_log_file(monkeypatch, tmp_path):
+    """Send ``debug_print`` lines to the test's own log file."""
+    path = str(tmp_path / "logs" / "debug_log.txt")
+    monkeypatch.setattr(common, "LOG_FILE_PATH", path)
+    yield
+    writer = log_writer._writers.pop(path, None)
+    if writer is not None:
+        writer.close()
+
+
+@pytest.fixture(autouse=True)
+def flush_log_writer():
+    """Write queued log lines while the test's output is still captured."""
+    yield
+    log_writer.flush()
@@ -0,0 +1,98 @@
+"""Tests for the content-addressed file cache."""
+
+from pathlib import Path
+import sys
+import os
+import time
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.cache import ContentCache, make_cache_key
+
+
+def test_cache_key_is_stable_and_separates_parts():
+    assert make_cache_key("a", "bc") == make_cache_key("a", "bc")
+    assert make_cache_key("a", "bc") != make_cache_key("ab", "c")
+
+
+def test_put_get_and_index_survives_reload(tmp_path):
+    cache = ContentCache(str(tmp_path), suffix=".bin")
+    assert cache.get("k1") is None
+
+    path = cache.put_bytes("k1", b"payload")
+    assert path.endswith("k1.bin")
+    assert cache.get_bytes("k1") == b"payload"
+
+    reloaded = ContentCache(str(tmp_path), suffix=".bin")
+    assert reloaded.get("k1") == path
+    assert reloaded.stats()["entries"] == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_size_limit_evicts_least_recently_used(tmp_path):
+    cache = ContentCache(str(tmp_path), max_bytes=10)
+    cache.put_bytes("old", b"12345")
+    time.sleep(0.01)
+    cache.put_bytes("recent", b"12345")
+    time.sleep(0.01)
+    cache.get("old")  # touch so "recent" becomes the LRU entry
+    time.sleep(0.01)
+    cache.put_bytes("new", b"12345")
+
+    assert cache.get("recent") is None
+    assert cache.get("old") is not None
+    assert cache.get("new") is not None
+    assert not os.path.exists(cache.path_for("recent"))
+
+
+def test_entries_expire_after_max_age(tmp_path):
+    cache = ContentCache(str(tmp_path), max_age_seconds=60)
+    cache.put_bytes("k", b"x")
+    cache._load_index()["k"]["created"] -= 120
+    cache._save_index()
+
+    assert cache.get("k") is None
+    assert not os.path.exists(cache.path_for("k"))
+
+
+def test_size_limit_holds_across_caches_sharing_a_folder(tmp_path):
+    # Two instances stand in for two processes writing the same folder
+    first = ContentCache(str(tmp_path), max_bytes=10)
+    second = ContentCache(str(tmp_path), max_bytes=10)
+    assert second.get("a") is None  # second now holds an index without "a"
+    first.put_bytes("a", b"12345678")
+    time.sleep(0.01)
+    second.put_bytes("b", b"12345678")
+
+    assert not os.path.exists(first.path_for("a"))
+    assert first.get("a") is None
+    assert first.get_bytes("b") == b"12345678"
+    assert ContentCache(str(tmp_path)).stats()["entries"] == 1
+
+
+def test_hits_touch_the_entry_without_rewriting_the_index(tmp_path):
+    cache = ContentCache(str(tmp_path))
+    path = cache.put_bytes("k", b"x")
+    os.utime(path, (1, 1))
+    index_before = os.stat(cache.index_path).st_mtime_ns
+
+    assert cache.get("k") == path
+    assert cache.get("k") == path
+
+    assert os.stat(cache.index_path).st_mtime_ns == index_before
+    assert os.path.getmtime(path) > 1
+    assert cache.stats()["hits"] == 2
+
+
+def test_put_file_moves_the_file_into_the_cache(tmp_path):
+    cache = ContentCache(str(tmp_path), suffix=".pdf", max_bytes=10)
+    source = tmp_path / "render.part"
+    source.write_bytes(b"%PDF-1")
+
+    path = cache.put_file("k", str(source))
+
+    assert not source.exists()
+    assert cache.get_bytes("k") == b"%PDF-1"
+    assert cache.stats()["bytes"] == 6
+    assert path == cache.path_for("k")
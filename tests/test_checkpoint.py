@@ -0,0 +1,144 @@
+"""Tests for per-job checkpoints and resuming the pipeline stages."""
+
+from pathlib import Path
+import json
+import os
+import sys
+
+import pytest
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import core.generate_audio as generate_audio
+import core.generate_video as generate_video
+import generate_from_image
+from core.checkpoint import Checkpoint, checkpoint_path, job_key
+
+
+# ---------------------------------------------------------------------------
+# Checkpoint file
+# ---------------------------------------------------------------------------
+
+
+def test_records_survive_reload_and_key_change_starts_over(tmp_path):
+    path = str(tmp_path / "job.checkpoint.json")
+    audio = tmp_path / "a.mp3"
+    audio.write_bytes(b"mp3")
+
+    checkpoint = Checkpoint(path, key="k1")
+    checkpoint.record_script({"paragraphs": [{"audio_script": "hello"}]})
+    checkpoint.record_audio(0, "hello", str(audio))
+    assert not list(tmp_path.glob("*.tmp"))
+
+    reloaded = Checkpoint(path, key="k1")
+    assert reloaded.script() == {"paragraphs": [{"audio_script": "hello"}]}
+    assert reloaded.audio(0, "hello") == str(audio)
+    assert reloaded.audio(0, "changed text") is None
+    assert Checkpoint(path).progress()["audio"] == 1
+
+    audio.unlink()
+    assert reloaded.audio(0, "hello") is None
+    assert Checkpoint(path, key="k2").script() is None
+
+
+def test_corrupt_checkpoint_is_ignored(tmp_path):
+    path = tmp_path / "job.checkpoint.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert Checkpoint(str(path)).script() is None
+
+
+def test_job_key_tracks_attachment_changes(tmp_path):
+    image = tmp_path / "slide.png"
+    image.write_bytes(b"one")
+    first = job_key("prompt", str(image), None)
+    assert job_key("prompt", str(image), None) == first
+    image.write_bytes(b"one")  # rewritten, same content
+    os.utime(image, ns=(1, 1))
+    assert job_key("prompt", str(image), None) == first
+    image.write_bytes(b"second")
+    assert job_key("prompt", str(image), None) != first
+    assert job_key("other", str(image), None) != job_key("prompt", str(image), None)
+
+
+# ---------------------------------------------------------------------------
+# Resuming stages
+# ---------------------------------------------------------------------------
+
+
+def test_request_script_resumes_without_calling_the_llm(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_llm(prompt, image_path, pdf_path, use_cache, stream=False):
+        calls.append(prompt)
+        return json.dumps({"paragraphs": [{"audio_script": "hi"}]})
+
+    monkeypatch.setattr(generate_from_image, "_invoke_llm", fake_llm)
+    output_file = str(tmp_path / "script.json")
+
+    first = generate_from_image.request_script("p", None, None, output_file)
+    second = generate_from_image.request_script("p", None, None, output_file)
+    assert first == second
+    assert calls == ["p"]
+
+    generate_from_image.request_script("p", None, None, output_file, use_cache=False)
+    generate_from_image.request_script("new prompt", None, None, output_file)
+    assert calls == ["p", "p", "new prompt"]
+
+
+def test_audio_resumes_at_the_first_missing_paragraph(monkeypatch, tmp_path):
+    synthesized = []
+    failing = {"two"}
+
+    def fake_tts(script, voice="alloy", model="gpt-4o-mini-tts"):
+        if script in failing:
+            raise ConnectionError("network blip")
+        synthesized.append(script)
+        path = tmp_path / f"{script}.mp3"
+        path.write_bytes(b"mp3")
+        return str(path)
+
+    monkeypatch.setattr(generate_audio, "generate_audio_from_script", fake_tts)
+    monkeypatch.setattr(generate_audio, "TTS_MAX_CONCURRENCY", 2)
+    output_file = str(tmp_path / "script.json")
+    script = {"paragraphs": [{"audio_script": s} for s in ("one", "two", "three")]}
+
+    with pytest.raises(ConnectionError):
+        generate_from_image.synthesize_audio(json.loads(json.dumps(script)), output_file)
+    assert sorted(synthesized) == ["one", "three"]
+    assert Checkpoint(checkpoint_path(output_file)).progress()["audio"] == 2
+
+    failing.clear()
+    result = generate_from_image.synthesize_audio(json.loads(json.dumps(script)), output_file)
+    assert synthesized[2:] == ["two"]
+    assert [Path(p["audio_file_path"]).name for p in result["paragraphs"]] == ["one.mp3", "two.mp3", "three.mp3"]
+
+
+def test_render_records_each_segment_and_the_video(monkeypatch, tmp_path):
+    def fake_encode(spec):
+        if spec["text"] == "bad":
+            raise RuntimeError("encoder crashed")
+        Path(spec["output_path"]).write_bytes(b"mp4")
+        return spec["output_path"]
+
+    monkeypatch.setattr(generate_video, "_encode_segment", fake_encode)
+    monkeypatch.setattr(generate_video, "concat_segments",
+                        lambda paths, output_path: Path(output_path).write_bytes(b"video") and output_path)
+    monkeypatch.setattr(generate_video, "VIDEO_SEGMENT_RETRIES", 0)
+    monkeypatch.setattr(generate_video, "VIDEO_INCREMENTAL", True)
+    paragraphs = []
+    for i, text in enumerate(["a", "bad", "c"]):
+        audio = tmp_path / f"{i}.mp3"
+        audio.write_bytes(f"audio {i}".encode())
+        paragraphs.append({"text_to_be_rendered": text, "audio_file_path": str(audio)})
+    checkpoint_file = str(tmp_path / "job.checkpoint.json")
+    output = str(tmp_path / "video.mp4")
+
+    with pytest.raises(RuntimeError, match="segments"):
+        generate_from_image.render_video({"paragraphs": paragraphs}, None, output, checkpoint_file)
+    assert sorted(Checkpoint(checkpoint_file).state["segments"]) == ["0", "2"]
+
+    paragraphs[1]["text_to_be_rendered"] = "b"
+    generate_from_image.render_video({"paragraphs": paragraphs}, None, output, checkpoint_file)
+    progress = Checkpoint(checkpoint_file).progress()
+    assert progress["segments"] == 3 and progress["video"] == output
@@ -0,0 +1,42 @@
+"""Tests for the shared HTTP session and LLM client cache."""
+
+from pathlib import Path
+import sys
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core import clients
+
+
+def test_openai_client_is_built_once_per_credentials():
+    calls = []
+
+    def factory(**kwargs):
+        calls.append(kwargs)
+        return object()
+
+    try:
+        first = clients.get_openai_client("key", "https://a", "v1", factory=factory)
+        again = clients.get_openai_client("key", "https://a", "v1", factory=factory)
+        other = clients.get_openai_client("key", "https://b", "v1", factory=factory)
+    finally:
+        clients.reset_clients()
+
+    assert first is again
+    assert other is not first
+    assert len(calls) == 2
+    assert calls[0]["timeout"] == clients.OPENAI_TIMEOUT
+    assert calls[0]["max_retries"] == clients.OPENAI_MAX_RETRIES
+
+
+def test_http_session_is_shared_and_pooled():
+    try:
+        session = clients.get_http_session()
+        assert clients.get_http_session() is session
+        adapter = session.get_adapter("https://example.org")
+        assert adapter._pool_maxsize == clients.HTTP_POOL_SIZE
+        # The TTS loop owns retries; the adapter must not add its own
+        assert adapter.max_retries.total == 0
+    finally:
+        clients.reset_clients()
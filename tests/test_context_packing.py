@@ -0,0 +1,86 @@
+"""Tests for the Excel context packer in ``core.context_packing``."""
+
+from pathlib import Path
+import json
+import sys
+
+import pandas as pd
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import core.context_packing as context_packing
+from core.context_packing import count_tokens, pack_excel_context
+from core.excel_utils import _frame_to_sheet_data
+
+
+def _sheet(n_rows=40):
+    df = pd.DataFrame({
+        0: [f"Symbol {i} pays on adjacent reels" for i in range(n_rows)],
+        1: [None] * n_rows,
+        2: [i * 5 for i in range(n_rows)],
+        3: [f"Symbol {i} pays on adjacent reels" for i in range(n_rows)],
+    })
+    return _frame_to_sheet_data(df, "Paytable")
+
+
+# ---------------------------------------------------------------------------
+# Token counting
+# ---------------------------------------------------------------------------
+
+def test_count_tokens_falls_back_to_character_estimate(monkeypatch):
+    monkeypatch.setattr(context_packing, "_encoding", lambda model: None)
+    assert count_tokens("x" * 9) == 3
+    assert context_packing.tokenizer_name() == "chars/4"
+
+
+# ---------------------------------------------------------------------------
+# Packing
+# ---------------------------------------------------------------------------
+
+def test_context_within_budget_is_unchanged():
+    sheet = _sheet(3)
+    packed = pack_excel_context(sheet, budget=100_000)
+
+    assert packed.markdown == sheet["markdown"]
+    assert json.loads(packed.excel_data_json)["flat_text"] == sheet["flat_text"]
+    assert packed.report["dropped_columns"] == []
+    assert packed.report["tokens"] == packed.report["original_tokens"]
+
+
+def test_empty_and_duplicate_columns_are_dropped_first():
+    sheet = _sheet()
+    full = pack_excel_context(sheet, budget=0).report["original_tokens"]
+    payload_tokens = count_tokens(pack_excel_context(sheet, budget=0).excel_data_json)
+
+    packed = pack_excel_context(sheet, budget=full - 1)
+
+    assert packed.report["dropped_columns"] == ["B", "D"]
+    assert packed.report["dropped_rows"] == 0
+    assert packed.markdown.splitlines()[2].count("|") == 3
+    assert packed.report["tokens"] <= full - 1
+    assert payload_tokens < packed.report["tokens"]
+
+
+def test_rows_and_flat_text_are_cut_together_to_fit():
+    sheet = _sheet(200)
+    packed = pack_excel_context(sheet, budget=600)
+    report = packed.report
+
+    assert report["compact_table"]
+    assert report["tokens"] <= 600
+    assert report["dropped_rows"] > 0
+    kept_rows = len(packed.markdown.splitlines()) - 2
+    assert kept_rows == 200 - report["dropped_rows"]
+    flat = json.loads(packed.excel_data_json)["flat_text"]
+    # flat_text covers exactly the rows kept in the table
+    assert flat == sheet["flat_text"][:2 * kept_rows]
+    assert report["dropped_flat_text"] == len(sheet["flat_text"]) - len(flat)
+
+
+def test_flat_text_only_payload_is_shortened():
+    sheet = {"sheet_name": "S", "flat_text": [f"entry {i}" for i in range(500)], "markdown": ""}
+    packed = pack_excel_context(sheet, budget=200)
+
+    assert packed.report["tokens"] <= 200
+    assert 0 < len(json.loads(packed.excel_data_json)["flat_text"]) < 500
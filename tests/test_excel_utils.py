@@ -0,0 +1,141 @@
+"""Tests for Excel sheet extraction."""
+
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.excel_utils import _frame_to_sheet_data, extract_sheet_text
+
+
+def test_frame_to_sheet_data_markdown_flat_text_and_rows():
+    df = pd.DataFrame(
+        {0: ["Pays", "A|B", "x\ny"], 1: [1.0, np.nan, 2.5], 2: [None, "Pays", " Pays "]}
+    )
+
+    data = _frame_to_sheet_data(df, "Paytable")
+
+    assert data["columns"] == ["A", "B", "C"]
+    assert data["markdown"].splitlines() == [
+        "|        |     |        |",
+        "| ------ | --: | ------ |",
+        "| Pays   |   1 |        |",
+        "| A\\|B   |     | Pays   |",
+        "| x<br>y | 2.5 |  Pays  |",
+    ]
+    # flat_text keeps the plain string form and drops duplicates after stripping
+    assert data["flat_text"] == ["Pays", "1.0", "A|B", "x\ny", "2.5"]
+    assert data["rows"][1] == {"A": "A|B", "B": None, "C": "Pays"}
+
+
+def test_extract_sheet_text_reads_xlsx(tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Rules"
+    ws.append(["Feature", 3])
+    ws.append(["Free Games", None])
+    path = tmp_path / "rules.xlsx"
+    wb.save(path)
+
+    data = extract_sheet_text(str(path), "Rules")
+
+    assert data["sheet_name"] == "Rules"
+    assert data["flat_text"] == ["Feature", "3.0", "Free Games"]
+    assert data["markdown"].splitlines()[2] == "| Feature    |   3 |"
+
+
+def test_workbook_is_parsed_once_until_it_changes(monkeypatch, tmp_path):
+    import core.excel_utils as excel_utils
+
+    wb = Workbook()
+    wb.active.title = "One"
+    wb.active.append(["first"])
+    wb.create_sheet("Two").append(["second"])
+    path = tmp_path / "book.xlsx"
+    wb.save(path)
+
+    parses = []
+    real_read_excel = pd.read_excel
+    monkeypatch.setattr(
+        pd, "read_excel", lambda *a, **k: parses.append(a) or real_read_excel(*a, **k)
+    )
+    excel_utils.clear_workbook_cache()
+
+    assert extract_sheet_text(str(path), "One")["flat_text"] == ["first"]
+    assert extract_sheet_text(str(path), "Two")["flat_text"] == ["second"]
+    assert list(excel_utils.extract_all_sheets(str(path))) == ["One", "Two"]
+    assert len(parses) == 1
+
+    wb["Two"].append(["added"])
+    wb.save(path)
+    assert extract_sheet_text(str(path), "Two")["flat_text"] == ["second", "added"]
+    assert len(parses) == 2
+
+
+def test_workbook_cache_is_bounded(monkeypatch, tmp_path):
+    import core.excel_utils as excel_utils
+
+    monkeypatch.setattr(excel_utils, "EXCEL_WORKBOOK_CACHE_SIZE", 2)
+    excel_utils.clear_workbook_cache()
+    for i in range(3):
+        wb = Workbook()
+        wb.active.append([f"book {i}"])
+        wb.save(tmp_path / f"book{i}.xlsx")
+        excel_utils.load_workbook_frames(str(tmp_path / f"book{i}.xlsx"))
+
+    cached = [Path(key[0]).name for key in excel_utils._workbooks]
+    assert cached == ["book1.xlsx", "book2.xlsx"]
+
+
+def test_streaming_extraction_stops_at_flat_text_budget(tmp_path):
+    from core.excel_utils import extract_sheet_text_streaming
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Big")
+    for i in range(5000):
+        ws.append([f"Line {i}", i])
+    path = tmp_path / "big.xlsx"
+    wb.save(path)
+
+    data = extract_sheet_text_streaming(str(path), "Big", flat_text_limit=10)
+
+    assert data["truncated"] is True
+    assert data["truncated_by"] == "flat_text_limit"
+    assert data["flat_text"] == ["Line 0", "0", "Line 1", "1", "Line 2", "2",
+                                 "Line 3", "3", "Line 4", "4"]
+    assert len(data["rows"]) == 5
+    assert data["markdown"].splitlines()[1] == "| ------ | --: |"
+
+
+def test_streaming_extraction_reports_row_cap(tmp_path):
+    from core.excel_utils import extract_sheet_text_streaming
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Big")
+    for i in range(50):
+        ws.append([f"Line {i}"])
+    path = tmp_path / "rows.xlsx"
+    wb.save(path)
+
+    data = extract_sheet_text_streaming(str(path), "Big", flat_text_limit=1000, max_rows=20)
+
+    assert data["truncated_by"] == "max_rows"
+    assert len(data["rows"]) == 20
+
+
+def test_streaming_matches_full_markdown_on_sample_xls():
+    from core.excel_utils import extract_sheet_text_streaming
+
+    path = Path(__file__).resolve().parents[1] / "ViusalAI_GamesTeam_AudioForHelp" / "AGR.xls"
+    streamed = extract_sheet_text_streaming(str(path), "Feature")
+    full = extract_sheet_text(str(path), "Feature")
+
+    assert streamed["truncated"] is False
+    assert streamed["truncated_by"] is None
+    assert streamed["markdown"] == full["markdown"]
+    assert streamed["flat_text"] == full["flat_text"]
@@ -0,0 +1,198 @@
+"""Tests for concurrent TTS synthesis against a local stub HTTP server."""
+
+from pathlib import Path
+import sys
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import core.clients as clients
+import core.generate_audio as generate_audio
+from core.cache import ContentCache
+
+
+# ---------------------------------------------------------------------------
+# Stub TTS server
+# ---------------------------------------------------------------------------
+
+class _StubState:
+    def __init__(self, throttle_first=0, always_fail_status=None, delay=0.05):
+        self.lock = threading.Lock()
+        self.throttle_first = throttle_first
+        self.always_fail_status = always_fail_status
+        self.delay = delay
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+
+def _start_stub_server(state):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+            with state.lock:
+                state.requests += 1
+                seq = state.requests
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            try:
+                time.sleep(state.delay)
+                if state.always_fail_status:
+                    status, body = state.always_fail_status, b"unavailable"
+                elif seq <= state.throttle_first:
+                    status, body = 429, b"slow down"
+                else:
+                    status, body = 200, payload["input"].encode("utf-8")
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def tts_env(monkeypatch, tmp_path):
+    def _setup(state):
+        server = _start_stub_server(state)
+        monkeypatch.setenv("OPENAI_TTS_API_KEY", "test")
+        monkeypatch.setenv(
+            "OPENAI_TTS_API_BASE", f"http://127.0.0.1:{server.server_address[1]}/tts"
+        )
+        monkeypatch.setattr(
+            generate_audio, "_tts_cache", ContentCache(str(tmp_path), suffix=".mp3")
+        )
+        monkeypatch.setattr(generate_audio, "TTS_RETRY_BACKOFF", 0.01)
+        servers.append(server)
+        return server
+
+    servers = []
+    yield _setup
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_concurrent_tts_keeps_paragraph_order(tts_env):
+    state = _StubState()
+    tts_env(state)
+
+    scripts = [f"paragraph {i}" for i in range(8)]
+    paths = generate_audio.generate_audio_for_scripts(scripts, max_workers=3)
+
+    assert len(set(paths)) == len(scripts)
+    assert [Path(p).read_text(encoding="utf-8") for p in paths] == scripts
+    assert 1 < state.max_in_flight <= 3
+
+
+def test_tts_retries_after_throttling(tts_env):
+    state = _StubState(throttle_first=2)
+    tts_env(state)
+
+    path = generate_audio.generate_audio_from_script("hello")
+
+    assert Path(path).read_text(encoding="utf-8") == "hello"
+    assert state.requests == 3
+
+
+def test_tts_gives_up_after_max_retries(tts_env, monkeypatch):
+    state = _StubState(always_fail_status=503, delay=0)
+    tts_env(state)
+    monkeypatch.setattr(generate_audio, "TTS_MAX_RETRIES", 2)
+
+    with pytest.raises(Exception, match="Error 503"):
+        generate_audio.generate_audio_from_script("hello")
+    assert state.requests == 3
+
+
+def test_repeated_text_is_served_from_cache(tts_env):
+    state = _StubState(delay=0)
+    tts_env(state)
+
+    first = generate_audio.generate_audio_from_script("same words")
+    second = generate_audio.generate_audio_from_script("same words")
+    other_voice = generate_audio.generate_audio_from_script("same words", voice="nova")
+
+    assert first == second
+    assert other_voice != first
+    assert state.requests == 2
+    stats = generate_audio.get_tts_cache().stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+
+# ---------------------------------------------------------------------------
+# Async API
+# ---------------------------------------------------------------------------
+
+def _run(coro):
+    """Run ``coro`` on a fresh loop and close that loop's shared clients."""
+    async def _main():
+        try:
+            return await coro
+        finally:
+            await clients.aclose_clients()
+
+    return asyncio.run(_main())
+
+
+def test_async_tts_keeps_order_and_respects_backend_limit(tts_env, monkeypatch):
+    state = _StubState()
+    tts_env(state)
+    monkeypatch.setattr(clients, "ASYNC_TTS_CONCURRENCY", 2)
+
+    scripts = [f"paragraph {i}" for i in range(6)]
+    paths = _run(generate_audio.agenerate_audio_for_scripts(scripts))
+
+    assert [Path(p).read_text(encoding="utf-8") for p in paths] == scripts
+    assert state.max_in_flight == 2
+
+
+def test_async_tts_retries_after_throttling(tts_env):
+    state = _StubState(throttle_first=1)
+    tts_env(state)
+
+    path = _run(generate_audio.agenerate_audio_from_script("hello"))
+
+    assert Path(path).read_text(encoding="utf-8") == "hello"
+    assert state.requests == 2
+
+
+def test_async_tts_can_be_cancelled(tts_env):
+    state = _StubState(delay=2.0)
+    tts_env(state)
+
+    async def _cancel_soon():
+        task = asyncio.ensure_future(generate_audio.agenerate_audio_for_scripts(["a", "b"]))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    started = time.perf_counter()
+    _run(_cancel_soon())
+
+    assert time.perf_counter() - started < 1.5
+    assert generate_audio.get_tts_cache().stats()["entries"] == 0
@@ -0,0 +1,134 @@
+"""Tests for the manifest-driven batch runner."""
+
+from pathlib import Path
+import sys
+import json
+import threading
+import time
+
+import pytest
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import generate_batch
+
+
+def test_read_manifest_csv_and_jsonl(tmp_path):
+    csv_path = tmp_path / "jobs.csv"
+    csv_path.write_text(
+        "image_path,excel_path,sheet_name,language\n"
+        "a.png,AGR.xls,Paytable,spanish\n"
+        "b.png,,,\n",
+        encoding="utf-8",
+    )
+    jsonl_path = tmp_path / "jobs.jsonl"
+    jsonl_path.write_text(
+        json.dumps({"job_id": "x", "image_path": "a.png"}) + "\n\n", encoding="utf-8"
+    )
+
+    csv_jobs = generate_batch.read_manifest(str(csv_path))
+    assert [j["job_id"] for j in csv_jobs] == ["1", "2"]
+    assert csv_jobs[0]["sheet_name"] == "Paytable"
+    assert csv_jobs[1]["excel_path"] is None
+    assert csv_jobs[1]["language"] == "english"
+
+    jsonl_jobs = generate_batch.read_manifest(str(jsonl_path))
+    assert jsonl_jobs == [
+        {"job_id": "x", "image_path": "a.png", "excel_path": None,
+         "sheet_name": None, "language": "english", "pdf_path": None}
+    ]
+
+
+def test_read_manifest_rejects_unknown_columns(tmp_path):
+    path = tmp_path / "jobs.jsonl"
+    path.write_text(json.dumps({"image": "a.png"}) + "\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Unknown manifest column"):
+        generate_batch.read_manifest(str(path))
+
+
+def test_run_batch_respects_stage_limits_and_reports(monkeypatch, tmp_path):
+    lock = threading.Lock()
+    active = {"render": 0}
+    peak = {"render": 0}
+
+    def fake_build_prompt(image_path, language="english", **kwargs):
+        if language == "broken":
+            raise RuntimeError("bad sheet")
+        return "prompt", f"img_{language}", None
+
+    def fake_render(script_data, image_path, output_path=None, checkpoint_file=None):
+        with lock:
+            active["render"] += 1
+            peak["render"] = max(peak["render"], active["render"])
+        time.sleep(0.05)
+        with lock:
+            active["render"] -= 1
+        return output_path
+
+    pipeline = generate_batch.pipeline
+    monkeypatch.setattr(pipeline, "build_prompt", fake_build_prompt)
+    monkeypatch.setattr(
+        pipeline, "job_output_files",
+        lambda suffix, date=None: (str(tmp_path / f"{suffix}.json"), str(tmp_path / f"{suffix}.txt")),
+    )
+    monkeypatch.setattr(pipeline, "request_script", lambda *a, **k: {"paragraphs": []})
+    monkeypatch.setattr(pipeline, "synthesize_audio", lambda data, output_file: data)
+    monkeypatch.setattr(pipeline, "render_video", fake_render)
+
+    manifest = tmp_path / "jobs.jsonl"
+    languages = ["english", "spanish", "broken", "chinese"]
+    manifest.write_text(
+        "".join(json.dumps({"language": lang}) + "\n" for lang in languages), encoding="utf-8"
+    )
+    report = tmp_path / "report.csv"
+
+    statuses = generate_batch.run_batch(
+        str(manifest), report_path=str(report),
+        llm_concurrency=4, tts_concurrency=4, render_concurrency=1,
+    )
+
+    assert [s["status"] for s in statuses] == ["ok", "ok", "failed", "ok"]
+    assert "bad sheet" in statuses[2]["error"]
+    assert statuses[1]["video_path"].endswith("video_2_img_spanish.mp4")
+    assert peak["render"] == 1
+    assert report.read_text(encoding="utf-8").splitlines()[0].startswith("job_id,status,error")
+
+
+def test_slow_renders_do_not_hold_up_llm_calls(monkeypatch, tmp_path):
+    languages = [f"lang{i}" for i in range(6)]
+    prompts_built = []
+    all_prompts_built = threading.Event()
+
+    def fake_build_prompt(image_path, language="english", **kwargs):
+        prompts_built.append(language)
+        if len(prompts_built) == len(languages):
+            all_prompts_built.set()
+        return "prompt", f"img_{language}", None
+
+    def fake_render(script_data, image_path, output_path=None, checkpoint_file=None):
+        # Renders wait for every LLM call, which needs LLM threads to stay free
+        assert all_prompts_built.wait(timeout=5)
+        return output_path
+
+    pipeline = generate_batch.pipeline
+    monkeypatch.setattr(pipeline, "build_prompt", fake_build_prompt)
+    monkeypatch.setattr(
+        pipeline, "job_output_files",
+        lambda suffix, date=None: (str(tmp_path / f"{suffix}.json"), str(tmp_path / f"{suffix}.txt")),
+    )
+    monkeypatch.setattr(pipeline, "request_script", lambda *a, **k: {"paragraphs": []})
+    monkeypatch.setattr(pipeline, "synthesize_audio", lambda data, output_file: data)
+    monkeypatch.setattr(pipeline, "render_video", fake_render)
+
+    manifest = tmp_path / "jobs.jsonl"
+    manifest.write_text(
+        "".join(json.dumps({"language": lang}) + "\n" for lang in languages), encoding="utf-8"
+    )
+
+    statuses = generate_batch.run_batch(
+        str(manifest), report_path=str(tmp_path / "report.jsonl"),
+        llm_concurrency=1, tts_concurrency=1, render_concurrency=1,
+    )
+
+    assert [s["status"] for s in statuses] == ["ok"] * len(languages)
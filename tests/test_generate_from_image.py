@@ -0,0 +1,128 @@
+"""Tests for the orchestration helpers in ``generate_from_image``."""
+
+from pathlib import Path
+import sys
+import asyncio
+import json
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import generate_from_image
+
+
+def test_languages_share_one_excel_extraction(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    image = tmp_path / "screen.png"
+    image.write_bytes(b"png")
+
+    extractions = []
+
+    def fake_extract(excel_path, sheet_name):
+        extractions.append((excel_path, sheet_name))
+        return {"sheet_name": sheet_name, "flat_text": ["Line"], "markdown": "| Line |"}
+
+    def fake_pdf(sheet_data, pdf_path):
+        Path(pdf_path).write_bytes(b"%PDF")
+        return pdf_path
+
+    prompts = {}
+
+    def fake_request(prompt, image_path, pdf_path, output_file, **kwargs):
+        prompts[output_file] = (prompt, pdf_path)
+        return {"paragraphs": []}
+
+    monkeypatch.setattr(generate_from_image, "extract_sheet_text", fake_extract)
+    monkeypatch.setattr(generate_from_image, "export_sheet_data_pdf", fake_pdf)
+    monkeypatch.setattr(
+        generate_from_image,
+        "prepare_prompt_excel_image",
+        lambda language, excel_data_json, excel_data_markdown="": f"{language}:{excel_data_markdown}",
+    )
+    monkeypatch.setattr(generate_from_image, "job_output_files",
+                        lambda suffix, date=None: (str(tmp_path / f"{suffix}.json"), None))
+    monkeypatch.setattr(generate_from_image, "request_script", fake_request)
+    monkeypatch.setattr(generate_from_image, "synthesize_audio", lambda data, output_file: data)
+    monkeypatch.setattr(generate_from_image, "render_video",
+                        lambda data, image_path, output_path=None, checkpoint_file=None: output_path)
+
+    videos = generate_from_image.main_languages(
+        str(image), ["en", "es", "zh"], excel_path="AGR.xls", sheet_name="Paytable"
+    )
+
+    assert extractions == [("AGR.xls", "Paytable")]
+    assert list(videos) == ["en", "es", "zh"]
+    assert all(videos[lang].endswith(f"video_AGR_Paytable_{lang}.mp4") for lang in videos)
+    assert sorted(p for p, _ in prompts.values()) == ["en:| Line |", "es:| Line |", "zh:| Line |"]
+    assert len({pdf for _, pdf in prompts.values()}) == 1
+
+
+def test_streamed_paragraphs_reach_the_pipeline_before_the_response_ends(monkeypatch, tmp_path):
+    response = json.dumps({"paragraphs": [{"audio_script": "One"}, {"audio_script": "Two"}], "raw_text": "raw"})
+    consumed = []
+
+    def fake_stream(prompt, image_path, pdf_path, use_cache, stream=False):
+        assert stream
+        for i in range(0, len(response), 5):
+            consumed.append(i)
+            yield response[i:i + 5]
+
+    arrivals = []
+
+    def fake_pipeline(paragraphs, background_image_path=None, output_path=None, **hooks):
+        done = []
+        for para in paragraphs:
+            arrivals.append((para["audio_script"], len(consumed)))
+            done.append(dict(para, audio_file_path=f"{para['audio_script']}.mp3"))
+        return done, output_path
+
+    monkeypatch.setattr(generate_from_image, "_invoke_llm", fake_stream)
+    monkeypatch.setattr(generate_from_image, "run_paragraph_pipeline", fake_pipeline)
+
+    output_file = tmp_path / "script.json"
+    raw_file = tmp_path / "raw.txt"
+    script, video = generate_from_image.stream_and_render(
+        "prompt", None, None, str(output_file), raw_text_file=str(raw_file), output_path="v.mp4"
+    )
+
+    assert video == "v.mp4"
+    assert [name for name, _ in arrivals] == ["One", "Two"]
+    assert arrivals[0][1] < len(response) // 5
+    saved = json.loads(output_file.read_text(encoding="utf-8"))
+    assert [p["audio_file_path"] for p in saved["paragraphs"]] == ["One.mp3", "Two.mp3"]
+    assert raw_file.read_text(encoding="utf-8") == "raw"
+
+
+def test_amain_runs_jobs_concurrently_on_one_loop(monkeypatch, tmp_path):
+    in_flight = {"now": 0, "max": 0}
+
+    async def fake_llm(prompt, image_path, pdf_path, use_cache):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.05)
+        in_flight["now"] -= 1
+        return json.dumps({"paragraphs": [{"audio_script": prompt}]})
+
+    async def fake_tts(scripts, on_result=None):
+        return [f"{s}.mp3" for s in scripts]
+
+    monkeypatch.setattr(generate_from_image, "build_prompt",
+                        lambda image_path, language="english", **kw: (language, language, None))
+    monkeypatch.setattr(generate_from_image, "job_output_files",
+                        lambda suffix, date=None: (str(tmp_path / f"{suffix}.json"), None))
+    monkeypatch.setattr(generate_from_image, "_ainvoke_llm", fake_llm)
+    monkeypatch.setattr(generate_from_image, "agenerate_audio_for_scripts", fake_tts)
+    monkeypatch.setattr(generate_from_image, "render_video",
+                        lambda data, image_path, output_path=None, checkpoint_file=None: output_path)
+
+    async def _main():
+        return await asyncio.gather(
+            *(generate_from_image.amain(None, language=lang) for lang in ("en", "es", "zh"))
+        )
+
+    videos = asyncio.run(_main())
+
+    assert [Path(v).name for v in videos] == ["video_en.mp4", "video_es.mp4", "video_zh.mp4"]
+    assert in_flight["max"] == 3
+    saved = json.loads((tmp_path / "es.json").read_text(encoding="utf-8"))
+    assert saved["paragraphs"][0]["audio_file_path"] == "es.mp3"
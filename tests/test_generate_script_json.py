@@ -0,0 +1,248 @@
+"""Tests for the LLM response cache and streaming in ``core.generate_script_json``."""
+
+from pathlib import Path
+import sys
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import core.generate_script_json as generate_script_json
+from core.clients import reset_clients
+from core.json_stream import ArrayItemParser
+
+
+class _Calls(list):
+    finish_reason = "stop"
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("OPENAI_API_BASE", "https://example.org")
+    monkeypatch.setenv("OPENAI_API_VERSION", "2024-05-01")
+    monkeypatch.setenv("OPENAI_DEPLOYMENT_NAME", "model")
+
+    calls = _Calls()
+    # finish_reason of the next responses; tests may change it
+    calls.finish_reason = "stop"
+
+    class DummyCompletions:
+        def create(self, *, model, messages):
+            calls.append(messages)
+
+            class Resp:
+                choices = [
+                    type("Obj", (), {
+                        "message": type("Obj", (), {"content": f"reply {len(calls)}"})(),
+                        "finish_reason": calls.finish_reason,
+                    })
+                ]
+
+            return Resp()
+
+    class DummyClient:
+        def __init__(self, **kwargs):
+            self.chat = type("Obj", (), {"completions": DummyCompletions()})()
+
+    monkeypatch.setattr(generate_script_json, "AzureOpenAI", lambda **kwargs: DummyClient())
+    return calls
+
+
+def test_image_response_is_cached_by_image_bytes(fake_llm, tmp_path):
+    first_image = tmp_path / "a.png"
+    first_image.write_bytes(b"image-a")
+    same_bytes = tmp_path / "copy.png"
+    same_bytes.write_bytes(b"image-a")
+    other_image = tmp_path / "b.png"
+    other_image.write_bytes(b"image-b")
+
+    assert generate_script_json.invoke_openai_with_image("p", str(first_image)) == "reply 1"
+    assert generate_script_json.invoke_openai_with_image("p", str(same_bytes)) == "reply 1"
+    assert generate_script_json.invoke_openai_with_image("p", str(other_image)) == "reply 2"
+    assert generate_script_json.invoke_openai_with_image("other", str(first_image)) == "reply 3"
+    assert len(fake_llm) == 3
+
+    stats = generate_script_json.llm_cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3
+
+
+def test_bypass_flag_forces_fresh_call(fake_llm):
+    assert generate_script_json.invoke_openai("hello") == "reply 1"
+    assert generate_script_json.invoke_openai("hello", use_cache=False) == "reply 2"
+    # The fresh response replaced the cached one
+    assert generate_script_json.invoke_openai("hello") == "reply 2"
+    assert len(fake_llm) == 2
+
+
+def test_truncated_response_is_not_cached(fake_llm):
+    fake_llm.finish_reason = "length"
+    assert generate_script_json.invoke_openai("hello") == "reply 1"
+    fake_llm.finish_reason = "stop"
+    assert generate_script_json.invoke_openai("hello") == "reply 2"
+    assert generate_script_json.invoke_openai("hello") == "reply 2"
+    assert len(fake_llm) == 2
+
+
+def test_image_is_encoded_once_for_many_prompts(fake_llm, tmp_path, monkeypatch):
+    image = tmp_path / "screen.png"
+    image.write_bytes(b"image-bytes")
+
+    encoded = []
+    real_b64encode = generate_script_json.base64.b64encode
+    monkeypatch.setattr(
+        generate_script_json.base64,
+        "b64encode",
+        lambda data: encoded.append(data) or real_b64encode(data),
+    )
+
+    for language in ("en", "es", "zh"):
+        generate_script_json.invoke_openai_with_image(f"prompt {language}", str(image))
+
+    assert encoded == [b"image-bytes"]
+    assert len(fake_llm) == 3
+
+
+# ---------------------------------------------------------------------------
+# Streaming against a local fake endpoint
+# ---------------------------------------------------------------------------
+
+SCRIPT = {
+    "title": "Free Games [bonus]",
+    "paragraphs": [
+        {"text_to_be_rendered": "Three scatters award {10} free games", "audio_script": "Ten free games."},
+        {"text_to_be_rendered": "Wilds \"stick\" ]", "audio_script": "Wilds stick."},
+        {"text_to_be_rendered": "Jackpot", "audio_script": "Jackpot!"},
+    ],
+    "raw_text": "…",
+}
+
+
+@pytest.fixture
+def streaming_endpoint(monkeypatch):
+    """Serve SSE chat-completion chunks of ``SCRIPT`` with a delay between them."""
+    text = "```json\n" + json.dumps(SCRIPT, ensure_ascii=False, indent=2) + "\n```"
+    pieces = [text[i:i + 9] for i in range(0, len(text), 9)]
+    requests_seen = _Calls()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            requests_seen.append(body)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            # Azure opens with a chunk that has no choices
+            events = [{"id": "c", "object": "chat.completion.chunk", "created": 0, "model": "m", "choices": []}]
+            events += [
+                {
+                    "id": "c", "object": "chat.completion.chunk", "created": 0, "model": "m",
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                for piece in pieces
+            ]
+            events.append({
+                "id": "c", "object": "chat.completion.chunk", "created": 0, "model": "m",
+                "choices": [{"index": 0, "delta": {}, "finish_reason": requests_seen.finish_reason}],
+            })
+            for event in events:
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                time.sleep(0.005)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("OPENAI_API_BASE", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setenv("OPENAI_API_VERSION", "2024-05-01")
+    monkeypatch.setenv("OPENAI_DEPLOYMENT_NAME", "model")
+    reset_clients()
+    yield requests_seen
+    reset_clients()
+    server.shutdown()
+    server.server_close()
+
+
+def test_stream_yields_paragraphs_before_response_completes(streaming_endpoint):
+    parser = ArrayItemParser("paragraphs")
+    arrivals = []
+    for para in parser.iter_items(generate_script_json.invoke_openai_stream("script please")):
+        arrivals.append((para, len(parser.text)))
+
+    assert [para for para, _ in arrivals] == SCRIPT["paragraphs"]
+    # The first paragraph was available well before the end of the response
+    assert arrivals[0][1] < len(parser.text) / 2
+    assert streaming_endpoint[0]["stream"] is True
+
+
+def test_streamed_response_is_cached_for_blocking_calls(streaming_endpoint):
+    streamed = "".join(generate_script_json.invoke_openai_stream("script please"))
+
+    assert generate_script_json.invoke_openai("script please") == streamed
+    assert "".join(generate_script_json.invoke_openai_stream("script please")) == streamed
+    assert len(streaming_endpoint) == 1
+
+
+def test_stream_cut_short_is_not_cached(streaming_endpoint):
+    streaming_endpoint.finish_reason = "length"
+    "".join(generate_script_json.invoke_openai_stream("script please"))
+    streaming_endpoint.finish_reason = "stop"
+    "".join(generate_script_json.invoke_openai_stream("script please"))
+    "".join(generate_script_json.invoke_openai_stream("script please"))
+
+    assert len(streaming_endpoint) == 2
+
+
+# ---------------------------------------------------------------------------
+# Async API
+# ---------------------------------------------------------------------------
+
+def test_async_calls_share_the_response_cache(fake_llm, tmp_path, monkeypatch):
+    async_calls = []
+
+    class DummyAsyncCompletions:
+        async def create(self, *, model, messages):
+            async_calls.append(messages)
+            content = f"async reply {len(async_calls)}"
+            await asyncio.sleep(0)
+            message = type("Obj", (), {"content": content})()
+            choice = type("Obj", (), {"message": message, "finish_reason": "stop"})()
+            return type("Resp", (), {"choices": [choice]})()
+
+    class DummyAsyncClient:
+        def __init__(self, **kwargs):
+            self.chat = type("Obj", (), {"completions": DummyAsyncCompletions()})()
+
+    monkeypatch.setattr(generate_script_json, "AsyncAzureOpenAI", DummyAsyncClient)
+    image = tmp_path / "screen.png"
+    image.write_bytes(b"image")
+
+    async def _main():
+        first = await generate_script_json.ainvoke_openai_with_image("p", str(image))
+        again = await generate_script_json.ainvoke_openai_with_image("p", str(image))
+        both = await asyncio.gather(
+            generate_script_json.ainvoke_openai("a"), generate_script_json.ainvoke_openai("b")
+        )
+        return first, again, both
+
+    first, again, both = asyncio.run(_main())
+
+    assert first == again == "async reply 1"
+    assert sorted(both) == ["async reply 2", "async reply 3"]
+    # The sync API sees the entry written by the async call
+    assert generate_script_json.invoke_openai_with_image("p", str(image)) == "async reply 1"
+    assert fake_llm == []
@@ -0,0 +1,319 @@
+"""Tests for slide rendering in ``core.generate_video``."""
+
+from pathlib import Path
+import json
+import os
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import core.generate_video as generate_video
+
+
+class FakeTextClip:
+    """Stand-in for ImageMagick-backed ``TextClip``: a solid white block."""
+
+    calls = []
+
+    def __init__(self, text, fontsize, color, method, size, align, **kwargs):
+        FakeTextClip.calls.append(text)
+        width = size[0]
+        self._rgb = np.full((20, width, 3), 255, dtype=np.uint8)
+        self.mask = type("Mask", (), {"get_frame": lambda _self, t: np.ones((20, width))})()
+
+    def get_frame(self, t):
+        return self._rgb
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_captions(monkeypatch):
+    FakeTextClip.calls = []
+    generate_video._render_caption.cache_clear()
+    monkeypatch.setattr(generate_video, "TextClip", FakeTextClip)
+    yield FakeTextClip.calls
+    generate_video._render_caption.cache_clear()
+
+
+def _write_silence(path, seconds=0.3, rate=22050):
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b"\x00\x00" * int(seconds * rate))
+    return str(path)
+
+
+def test_compose_still_centres_caption():
+    background = np.zeros((10, 10, 3), dtype=np.uint8)
+    caption = np.full((2, 4, 3), 200, dtype=np.uint8)
+    mask = np.array([[255, 255, 128, 0]] * 2, dtype=np.uint8)
+
+    frame = generate_video._compose_still(background, caption, mask)
+
+    assert frame.dtype == np.uint8 and frame.shape == (10, 10, 3)
+    assert frame[4, 3].tolist() == [200, 200, 200]
+    assert frame[4, 5].tolist() == [100, 100, 100]
+    assert frame[4, 6].tolist() == [0, 0, 0]
+    assert frame[0, 0].tolist() == [0, 0, 0]
+    assert background.max() == 0  # input untouched
+
+
+def test_repeated_captions_are_rasterized_once(fake_captions, tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_video, "VIDEO_OUTPUT_FOLDER", str(tmp_path))
+    audio = _write_silence(tmp_path / "a.wav")
+    script = {
+        "paragraphs": [
+            {"text_to_be_rendered": "Free Games", "audio_file_path": audio},
+            {"text_to_be_rendered": "Free Games", "audio_file_path": audio},
+            {"text_to_be_rendered": "Jackpot", "audio_file_path": audio},
+        ]
+    }
+
+    output = generate_video.generate_video_for_paragraphs(
+        script, output_path=str(tmp_path / "out.mp4")
+    )
+
+    assert Path(output).stat().st_size > 0
+    assert fake_captions == ["Free Games", "Jackpot"]
+
+
+# ---------------------------------------------------------------------------
+# Segmented rendering
+# ---------------------------------------------------------------------------
+
+def _probe_duration(path):
+    from moviepy.editor import VideoFileClip
+
+    clip = VideoFileClip(str(path))
+    try:
+        return clip.duration
+    finally:
+        clip.close()
+
+
+def _flaky_encode_segment(spec):
+    """Fail the first attempt of segment 1, then encode normally."""
+    marker = Path(spec["output_path"] + ".failed-once")
+    if spec["index"] == 1 and not marker.exists():
+        marker.write_text("x")
+        raise RuntimeError("simulated encoder crash")
+    return generate_video._real_encode_segment(spec)
+
+
+def _crashing_encode_segment(spec):
+    """Kill the pool worker on the first attempt of segment 1."""
+    marker = Path(spec["output_path"] + ".crashed-once")
+    if spec["index"] == 1 and not marker.exists():
+        marker.write_text("x")
+        os._exit(1)
+    return generate_video._real_encode_segment(spec)
+
+
+def test_segments_are_encoded_in_parallel_and_joined(fake_captions, tmp_path):
+    audio = _write_silence(tmp_path / "a.wav", seconds=0.5)
+    script = {
+        "paragraphs": [
+            {"text_to_be_rendered": f"Slide {i}", "audio_file_path": audio} for i in range(3)
+        ]
+    }
+    output = tmp_path / "segmented.mp4"
+
+    generate_video.generate_video_for_paragraphs(
+        script, output_path=str(output), workers=2, incremental=False
+    )
+
+    assert output.stat().st_size > 0
+    assert _probe_duration(output) == pytest.approx(1.5, abs=0.2)
+    assert not (tmp_path / "segmented_segments").exists()
+
+
+def test_failed_segment_is_retried_alone(fake_captions, tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_video, "_real_encode_segment", generate_video._encode_segment, raising=False)
+    monkeypatch.setattr(generate_video, "_encode_segment", _flaky_encode_segment)
+    audio = _write_silence(tmp_path / "a.wav")
+    script = {
+        "paragraphs": [
+            {"text_to_be_rendered": f"Slide {i}", "audio_file_path": audio} for i in range(3)
+        ]
+    }
+    output = tmp_path / "retried.mp4"
+
+    generate_video.generate_video_for_paragraphs(script, output_path=str(output), workers=2)
+
+    assert output.stat().st_size > 0
+
+
+def test_dead_pool_worker_is_retried_in_a_new_pool(fake_captions, tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_video, "_real_encode_segment", generate_video._encode_segment, raising=False)
+    monkeypatch.setattr(generate_video, "_encode_segment", _crashing_encode_segment)
+    audio = _write_silence(tmp_path / "a.wav")
+    script = {
+        "paragraphs": [
+            {"text_to_be_rendered": f"Slide {i}", "audio_file_path": audio} for i in range(3)
+        ]
+    }
+    output = tmp_path / "crashed.mp4"
+
+    generate_video.generate_video_for_paragraphs(script, output_path=str(output), workers=2)
+
+    assert output.stat().st_size > 0
+
+
+def test_segment_failure_is_reported_after_retries(fake_captions, tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_video, "VIDEO_SEGMENT_RETRIES", 0)
+    monkeypatch.setattr(generate_video, "_real_encode_segment", generate_video._encode_segment, raising=False)
+    monkeypatch.setattr(generate_video, "_encode_segment", _flaky_encode_segment)
+    audio = _write_silence(tmp_path / "a.wav")
+    script = {
+        "paragraphs": [
+            {"text_to_be_rendered": f"Slide {i}", "audio_file_path": audio} for i in range(2)
+        ]
+    }
+
+    with pytest.raises(RuntimeError, match=r"segments \[1\]"):
+        generate_video.generate_video_for_paragraphs(
+            script, output_path=str(tmp_path / "broken.mp4"), workers=2
+        )
+
+
+def test_rerun_only_encodes_changed_segments(fake_captions, tmp_path, monkeypatch):
+    encoded = []
+    real_encode = generate_video._encode_segment
+
+    def _counting_encode(spec):
+        encoded.append(spec["text"])
+        return real_encode(spec)
+
+    monkeypatch.setattr(generate_video, "_encode_segment", _counting_encode)
+    audio = _write_silence(tmp_path / "a.wav")
+    script = {
+        "paragraphs": [
+            {"text_to_be_rendered": f"Slide {i}", "audio_file_path": audio} for i in range(3)
+        ]
+    }
+    output = tmp_path / "incremental.mp4"
+
+    generate_video.generate_video_for_paragraphs(script, output_path=str(output), workers=0)
+    assert encoded == ["Slide 0", "Slide 1", "Slide 2"]
+
+    first_mtime = output.stat().st_mtime_ns
+    generate_video.generate_video_for_paragraphs(script, output_path=str(output), workers=0)
+    assert len(encoded) == 3
+    assert output.stat().st_mtime_ns == first_mtime
+
+    script["paragraphs"][1]["text_to_be_rendered"] = "Slide 1, edited"
+    generate_video.generate_video_for_paragraphs(script, output_path=str(output), workers=0)
+    assert encoded[3:] == ["Slide 1, edited"]
+    assert _probe_duration(output) == pytest.approx(0.9, abs=0.2)
+
+    manifest = json.loads(Path(generate_video.segment_manifest_path(str(output))).read_text())
+    assert len(manifest["segments"]) == 3
+    assert len(list((tmp_path / "incremental_segments").glob("*.mp4"))) == 3
+
+
+
+def test_generated_output_path_keeps_no_segments(fake_captions, tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_video, "VIDEO_OUTPUT_FOLDER", str(tmp_path))
+    audio = _write_silence(tmp_path / "a.wav")
+    script = {
+        "paragraphs": [
+            {"text_to_be_rendered": f"Slide {i}", "audio_file_path": audio} for i in range(2)
+        ]
+    }
+
+    output = generate_video.generate_video_for_paragraphs(script, workers=2, incremental=True)
+
+    assert Path(output).stat().st_size > 0
+    assert not list(tmp_path.glob("*_segments"))
+    assert not list(tmp_path.glob("*.segments.json"))
+
+# ---------------------------------------------------------------------------
+# Render profiles
+# ---------------------------------------------------------------------------
+
+def test_static_profile_encodes_low_frame_rate(fake_captions, tmp_path):
+    from moviepy.editor import VideoFileClip
+
+    audio = _write_silence(tmp_path / "a.wav", seconds=1.0)
+    script = {
+        "paragraphs": [
+            {"text_to_be_rendered": f"Slide {i}", "audio_file_path": audio} for i in range(2)
+        ]
+    }
+    output = tmp_path / "static.mp4"
+
+    generate_video.generate_video_for_paragraphs(script, output_path=str(output), profile="static")
+
+    clip = VideoFileClip(str(output))
+    try:
+        assert clip.fps == generate_video.VIDEO_STATIC_FPS
+        assert clip.duration == pytest.approx(2.0, abs=0.3)
+        assert clip.audio is not None
+    finally:
+        clip.close()
+
+
+def test_profile_change_invalidates_segments(fake_captions, tmp_path):
+    audio = _write_silence(tmp_path / "a.wav")
+    script = {"paragraphs": [{"text_to_be_rendered": "Slide", "audio_file_path": audio}]}
+    output = tmp_path / "profiles.mp4"
+
+    generate_video.generate_video_for_paragraphs(script, output_path=str(output), profile="standard")
+    standard = json.loads(Path(generate_video.segment_manifest_path(str(output))).read_text())
+    generate_video.generate_video_for_paragraphs(script, output_path=str(output), profile="static")
+    static = json.loads(Path(generate_video.segment_manifest_path(str(output))).read_text())
+
+    assert standard["segments"] != static["segments"]
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError, match="Unknown render profile"):
+        generate_video.encoding_profile("cinematic")
+
+
+@pytest.mark.parametrize("profile", ["standard", "static"])
+def test_odd_sized_background_is_padded_for_segments(fake_captions, tmp_path, profile):
+    from PIL import Image
+    from moviepy.editor import VideoFileClip
+
+    background = tmp_path / "odd.png"
+    Image.new("RGB", (101, 71), (30, 60, 90)).save(background)
+    audio = _write_silence(tmp_path / "a.wav")
+    script = {"paragraphs": [{"text_to_be_rendered": "Slide", "audio_file_path": audio}]}
+    output = tmp_path / f"odd_{profile}.mp4"
+
+    generate_video._read_background.cache_clear()
+    generate_video.generate_video_for_paragraphs(
+        script, background_image_path=str(background), output_path=str(output), profile=profile
+    )
+
+    clip = VideoFileClip(str(output))
+    try:
+        assert clip.size == [102, 72]
+    finally:
+        clip.close()
+
+
+def test_background_rewritten_in_place_is_reloaded(tmp_path):
+    from PIL import Image
+
+    background = tmp_path / "bg.png"
+    Image.new("RGB", (4, 2), (10, 10, 10)).save(background)
+    os.utime(background, ns=(1, 1))
+    assert generate_video._load_background(str(background))[0, 0].tolist() == [10, 10, 10]
+    Image.new("RGB", (4, 2), (200, 0, 0)).save(background)
+    os.utime(background, ns=(2, 2))
+    assert generate_video._load_background(str(background))[0, 0].tolist() == [200, 0, 0]
+
+
+def test_cached_caption_masks_are_uint8(fake_captions):
+    rgb, mask = generate_video._render_caption("Jackpot", 70, "white", 1920)
+    assert mask.dtype == np.uint8 and mask.shape == rgb.shape[:2] and mask.max() == 255
@@ -0,0 +1,89 @@
+"""Tests for upload image preparation in ``core.image_utils``."""
+
+from pathlib import Path
+import sys
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import core.image_utils as image_utils
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    image_utils.clear_image_cache()
+    yield
+    image_utils.clear_image_cache()
+
+
+def _image_bytes(size, fmt, mode="RGB"):
+    buf = io.BytesIO()
+    Image.new(mode, size, (200, 30, 30)).save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def _decode(prepared):
+    return Image.open(io.BytesIO(base64.b64decode(prepared.b64)))
+
+
+def test_large_screenshot_is_downscaled_keeping_format(monkeypatch):
+    monkeypatch.setattr(image_utils, "IMAGE_MAX_DIMENSION", 512)
+    prepared = image_utils.prepare_image(_image_bytes((2048, 1024), "PNG"))
+
+    img = _decode(prepared)
+    assert img.size == (512, 256)
+    assert img.format == "PNG" and prepared.mime == "image/png"
+    assert prepared.data_url.startswith("data:image/png;base64,")
+
+
+def test_small_image_is_sent_unchanged():
+    data = _image_bytes((64, 32), "JPEG")
+    prepared = image_utils.prepare_image(data, filename="mislabelled.png")
+
+    assert base64.b64decode(prepared.b64) == data
+    assert prepared.mime == "image/jpeg"
+
+
+def test_forced_jpeg_flattens_alpha(monkeypatch):
+    monkeypatch.setattr(image_utils, "IMAGE_UPLOAD_FORMAT", "jpeg")
+    prepared = image_utils.prepare_image(_image_bytes((64, 64), "PNG", mode="RGBA"))
+
+    assert prepared.mime == "image/jpeg"
+    assert _decode(prepared).mode == "RGB"
+
+
+def test_unsupported_format_is_converted_to_png():
+    prepared = image_utils.prepare_image(_image_bytes((32, 32), "BMP"), filename="screen.bmp")
+
+    assert prepared.mime == "image/png"
+    assert _decode(prepared).format == "PNG"
+
+
+def test_prepared_payload_is_cached_by_source_hash(monkeypatch):
+    calls = []
+    real_prepare = image_utils.prepare_image_bytes
+    monkeypatch.setattr(
+        image_utils, "prepare_image_bytes", lambda data, filename=None: calls.append(1) or real_prepare(data, filename)
+    )
+    data = _image_bytes((64, 64), "PNG")
+
+    first = image_utils.prepare_image(data, filename="a.png")
+    second = image_utils.prepare_image(data, filename="copy.png")
+    monkeypatch.setattr(image_utils, "IMAGE_UPLOAD_FORMAT", "webp")
+    third = image_utils.prepare_image(data, filename="a.png")
+
+    assert first == second
+    assert third.mime == "image/webp"
+    assert len(calls) == 2
+
+
+def test_unreadable_data_falls_back_to_raw_bytes():
+    prepared = image_utils.prepare_image(b"not an image", filename="shot.jpg")
+
+    assert base64.b64decode(prepared.b64) == b"not an image"
+    assert prepared.mime == "image/jpeg"
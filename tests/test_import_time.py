@@ -0,0 +1,67 @@
+"""Startup guard: the CLI entry points must import without the heavy SDKs."""
+
+from pathlib import Path
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import core.generate_script_json as generate_script_json
+import core.generate_video as generate_video
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Packages that belong to a stage (LLM call, TTS, rendering, Excel) and must
+# only be imported when that stage runs
+HEAVY_PACKAGES = ("openai", "moviepy", "numpy", "pandas", "requests", "openpyxl", "reportlab", "IPython")
+# Generous bound for a cold import on a slow CI box; a warm import takes ~0.1 s
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "750"))
+
+
+def _import_times(module: str):
+    """``{module: cumulative_us}`` from ``python -X importtime -c 'import <module>'``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+# ---------------------------------------------------------------------------
+# Import-time benchmark
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("entry_point", ["generate_from_image", "generate_batch"])
+def test_entry_point_defers_heavy_imports(entry_point):
+    times = _import_times(entry_point)
+    assert entry_point in times
+    loaded = sorted({name.split(".")[0] for name in times} & set(HEAVY_PACKAGES))
+    assert loaded == []
+    assert times[entry_point] / 1000 < IMPORT_TIME_BUDGET_MS
+
+
+# ---------------------------------------------------------------------------
+# Lazy attributes
+# ---------------------------------------------------------------------------
+
+
+def test_lazy_attributes_resolve_to_the_real_classes():
+    import openai
+    from moviepy.video.VideoClip import TextClip
+
+    assert generate_script_json.AzureOpenAI is openai.AzureOpenAI
+    assert generate_video.TextClip is TextClip
+    with pytest.raises(AttributeError):
+        generate_video.NotAClip
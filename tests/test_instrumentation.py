@@ -0,0 +1,107 @@
+"""Tests for stage spans and the trace in ``core.instrumentation``."""
+
+from pathlib import Path
+import json
+import sys
+
+import pytest
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import core.generate_script_json as generate_script_json
+import core.instrumentation as instrumentation
+from core.instrumentation import span, start_span
+
+
+@pytest.fixture
+def trace(monkeypatch, tmp_path):
+    path = tmp_path / "trace.jsonl"
+    monkeypatch.setattr(instrumentation, "TRACE_FILE", str(path))
+    instrumentation.reset()
+    yield lambda: [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    instrumentation.reset()
+
+
+# ---------------------------------------------------------------------------
+# Spans
+# ---------------------------------------------------------------------------
+
+def test_nested_spans_are_written_to_the_trace(trace):
+    with span("job", job_id="a") as job:
+        with span("tts") as tts:
+            tts.add_bytes(sent=10, received=2048)
+            tts.cache_result(False)
+        instrumentation.add_bytes(sent=5)
+
+    tts_record, job_record = trace()
+    assert tts_record["name"] == "tts"
+    assert tts_record["parent"] == job_record["id"] == job.id
+    assert tts_record["bytes_received"] == 2048
+    assert tts_record["cache"] == "miss"
+    assert job_record["job_id"] == "a"
+    assert job_record["bytes_sent"] == 5
+    assert job_record["wall_ms"] >= tts_record["wall_ms"]
+    assert job_record["peak_rss_kb"] is None or job_record["peak_rss_kb"] > 0
+
+
+def test_failed_span_records_the_error(trace):
+    with pytest.raises(ValueError):
+        with span("encode"):
+            raise ValueError("boom")
+
+    assert trace()[0]["error"] == "ValueError"
+    assert instrumentation.summary()["encode"]["errors"] == 1
+
+
+def test_detached_span_does_not_become_current(trace):
+    detached = start_span("llm")
+    with span("caption"):
+        pass
+    detached.finish()
+    detached.finish()
+
+    caption, llm = trace()
+    assert caption["parent"] is None
+    assert llm["name"] == "llm"
+
+
+def test_summary_table_lists_each_stage(trace):
+    for hit in (True, False, True):
+        with span("tts") as s:
+            s.cache_result(hit)
+    with span("concat"):
+        pass
+
+    stats = instrumentation.summary()
+    assert stats["tts"]["count"] == 3
+    assert (stats["tts"]["cache_hits"], stats["tts"]["cache_misses"]) == (2, 1)
+    table = instrumentation.format_summary().splitlines()
+    assert table[0].split()[0] == "stage"
+    assert {line.split()[0] for line in table[2:]} == {"tts", "concat"}
+    assert "2/1" in next(line for line in table if line.startswith("tts"))
+
+
+# ---------------------------------------------------------------------------
+# Instrumented stages
+# ---------------------------------------------------------------------------
+
+def test_llm_span_records_cache_and_bytes(trace):
+    message = type("Obj", (), {"content": "x" * 300})()
+    create = lambda: type("Obj", (), {"message": message, "finish_reason": "stop"})()
+    generate_script_json._cached_completion(["k"], create, use_cache=True, request_bytes=1000)
+    generate_script_json._cached_completion(["k"], create, use_cache=True, request_bytes=1000)
+
+    miss, hit = trace()
+    assert (miss["cache"], miss["bytes_sent"], miss["bytes_received"]) == ("miss", 1000, 300)
+    assert (hit["cache"], hit["bytes_sent"]) == ("hit", 0)
+
+
+def test_profiled_writes_a_cprofile_dump(monkeypatch, tmp_path):
+    monkeypatch.setattr(instrumentation, "PROFILE", "cprofile")
+    monkeypatch.setattr(instrumentation, "PROJECT_ROOT", str(tmp_path))
+
+    with instrumentation.profiled("unit"):
+        sum(range(1000))
+
+    assert list(tmp_path.glob("logs/*/profile_unit_*.prof"))
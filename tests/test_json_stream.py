@@ -0,0 +1,62 @@
+"""Tests for incremental array parsing in ``core.json_stream``."""
+
+from pathlib import Path
+import sys
+import json
+import random
+
+import pytest
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.json_stream import ArrayItemParser, iter_array_items
+
+
+DOCUMENT = {
+    "title": "Paytable [v2]",
+    "paragraphs": [
+        {"text_to_be_rendered": 'Brackets } ] { and "quotes"', "audio_script": "line\nbreak \\ slash"},
+        {"text_to_be_rendered": "Ünïcödé ✓", "nested": [1, {"deep": [2, 3]}]},
+        42,
+        "plain string",
+        None,
+        True,
+    ],
+    "raw_text": "after the array",
+}
+
+
+def _split(text, seed):
+    rng = random.Random(seed)
+    pieces, i = [], 0
+    while i < len(text):
+        step = rng.randint(1, 8)
+        pieces.append(text[i:i + step])
+        i += step
+    return pieces
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_items_match_full_parse_for_any_chunking(seed):
+    text = "Here is the script:\n```json\n" + json.dumps(DOCUMENT, ensure_ascii=False, indent=2) + "\n```"
+    parser = ArrayItemParser("paragraphs")
+
+    items = list(parser.iter_items(_split(text, seed)))
+
+    assert items == DOCUMENT["paragraphs"]
+    assert parser.finished
+    assert parser.text == text
+
+
+def test_each_item_is_emitted_by_the_chunk_that_completes_it():
+    parser = ArrayItemParser()
+
+    assert parser.feed('{"paragraphs": [{"a": 1}, {"b"') == [{"a": 1}]
+    assert parser.feed(': 2}') == [{"b": 2}]
+    assert parser.feed("]}") == []
+    assert parser.finished
+
+
+def test_missing_array_yields_nothing():
+    assert list(iter_array_items(['{"other": [1, 2]}'])) == []
@@ -0,0 +1,121 @@
+"""Tests for the background log writer behind ``debug_print``."""
+
+from pathlib import Path
+import multiprocessing
+import os
+import sys
+import threading
+
+import pytest
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import core.common as common
+import core.log_writer as log_writer
+
+
+@pytest.fixture
+def log_file(monkeypatch, tmp_path):
+    path = tmp_path / "logs" / "debug_log.txt"
+    monkeypatch.setattr(common, "LOG_FILE_PATH", str(path))
+    monkeypatch.setattr(log_writer, "LOG_CONSOLE", False)
+    yield path
+    writer = log_writer._writers.pop(str(path), None)
+    if writer is not None:
+        writer.close()
+
+
+def _lines(path):
+    log_writer.flush()
+    return path.read_text(encoding="utf-8").splitlines()
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_debug_print_writes_timestamped_lines(log_file):
+    common.debug_print("Invoking model:", "gpt")
+
+    (line,) = _lines(log_file)
+    assert line.endswith("] Invoking model: gpt")
+    assert line.startswith("[20")
+
+
+def test_debug_print_honours_sep_and_end(log_file):
+    common.debug_print("a", "b", sep="-", end="!\n")
+    common.debug_print("no newline", end="")
+
+    lines = _lines(log_file)
+    assert lines[0].endswith("] a-b!")
+    assert lines[1].endswith("] no newline")
+
+
+def test_debug_print_rejects_unsupported_print_arguments(log_file):
+    with pytest.raises(TypeError):
+        common.debug_print("to stderr", file=sys.stderr)
+
+
+def test_console_output_is_kept(monkeypatch, log_file, capsys):
+    monkeypatch.setattr(log_writer, "LOG_CONSOLE", True)
+    common.debug_print("to console")
+    log_writer.flush()
+    assert "to console" in capsys.readouterr().out
+
+
+def test_levels_below_log_level_are_dropped(monkeypatch, log_file):
+    monkeypatch.setattr(log_writer, "LOG_LEVEL", "WARNING")
+    common.debug_print("noise")
+    common.debug_print("disk almost full", level="warning")
+
+    (line,) = _lines(log_file)
+    assert line.endswith("] WARNING: disk almost full")
+
+
+def test_context_fields_tag_lines_per_thread(log_file):
+    def job(job_id):
+        with log_writer.log_context(job=job_id):
+            for i in range(50):
+                common.debug_print(f"step {i}")
+
+    threads = [threading.Thread(target=job, args=(f"j{n}",)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    common.debug_print("outside")
+
+    lines = _lines(log_file)
+    assert len(lines) == 201
+    for n in range(4):
+        steps = [l.split("] ")[-1] for l in lines if f"[job=j{n}]" in l]
+        assert steps == [f"step {i}" for i in range(50)]
+    assert "job=" not in lines[-1]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_child_logs_through_its_own_writer(log_file):
+    common.debug_print("parent before")
+    log_writer.flush()
+    pid = os.fork()
+    if pid == 0:
+        common.debug_print("from child")
+        log_writer.flush()
+        os._exit(0)
+    os.waitpid(pid, 0)
+    common.debug_print("parent after")
+
+    lines = [l.split("] ")[-1] for l in _lines(log_file)]
+    assert lines == ["parent before", "from child", "parent after"]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_multiprocessing_child_lines_are_flushed_at_exit(log_file):
+    # Process children exit through os._exit, which skips atexit
+    child = multiprocessing.get_context("fork").Process(target=common.debug_print, args=("from worker",))
+    child.start()
+    child.join()
+
+    assert child.exitcode == 0
+    assert [l.split("] ")[-1] for l in _lines(log_file)] == ["from worker"]
@@ -0,0 +1,109 @@
+"""Tests for the in-process sheet PDF export in ``core.pdf_export``."""
+
+from pathlib import Path
+import sys
+
+import pandas as pd
+import pytest
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import core.pdf_export as pdf_export
+from core.cache import ContentCache
+from core.excel_utils import _frame_to_sheet_data
+
+
+@pytest.fixture
+def pdf_cache(monkeypatch, tmp_path):
+    cache = tmp_path / "cache"
+    monkeypatch.setattr(pdf_export, "_pdf_cache", ContentCache(str(cache), suffix=".pdf"))
+    return cache
+
+
+def _page_count(path):
+    return Path(path).read_bytes().count(b"/Type /Page\n")
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_sheet_table_shows_cells_as_excel_does():
+    df = pd.DataFrame({0: ["Pays", None], 1: [1.0, 2.5], 2: ["x\r\ny", "z"]})
+    header, rows = pdf_export.sheet_table(_frame_to_sheet_data(df, "S"))
+
+    assert header == ["A", "B", "C"]
+    assert rows == [["Pays", "1", "x\ny"], ["", "2.5", "z"]]
+
+
+def test_wide_sheet_is_split_into_column_bands(pdf_cache, tmp_path):
+    narrow = [["v"] * 2]
+    wide = [["a fairly wide cell value"] * 30]
+
+    pdf_export.render_table_pdf(["A", "B"], narrow, str(tmp_path / "narrow.pdf"))
+    pdf_export.render_table_pdf([f"C{i}" for i in range(30)], wide, str(tmp_path / "wide.pdf"))
+
+    assert Path(tmp_path / "narrow.pdf").read_bytes().startswith(b"%PDF")
+    assert _page_count(tmp_path / "narrow.pdf") == 1
+    assert _page_count(tmp_path / "wide.pdf") > 1
+
+
+def test_long_sheet_continues_on_new_pages(pdf_cache, tmp_path):
+    rows = [[f"Row {i}", "multi\nline\ncell"] for i in range(200)]
+    pdf_export.render_table_pdf(["A", "B"], rows, str(tmp_path / "long.pdf"), title="Long")
+    assert _page_count(tmp_path / "long.pdf") > 1
+
+
+def test_unchanged_sheet_is_rendered_once(monkeypatch, pdf_cache, tmp_path):
+    renders = []
+    real_render = pdf_export.render_table_pdf
+
+    def counting_render(*args, **kwargs):
+        renders.append(args[2])
+        return real_render(*args, **kwargs)
+
+    monkeypatch.setattr(pdf_export, "render_table_pdf", counting_render)
+    sheet = {"sheet_name": "S", "columns": ["A"], "rows": [{"A": "one"}]}
+
+    first = pdf_export.export_sheet_data_pdf(sheet, str(tmp_path / "a" / "first.pdf"))
+    second = pdf_export.export_sheet_data_pdf(sheet, str(tmp_path / "b" / "second.pdf"))
+    pdf_export.export_sheet_data_pdf(dict(sheet, rows=[{"A": "two"}]), str(tmp_path / "third.pdf"))
+
+    assert len(renders) == 2
+    assert Path(first).read_bytes() == Path(second).read_bytes()
+    assert len(list(pdf_cache.glob("*.pdf"))) == 2
+    assert pdf_export.get_pdf_cache().stats()["hits"] == 1
+
+
+def test_concurrent_exports_of_one_sheet_all_succeed(monkeypatch, pdf_cache, tmp_path):
+    import threading
+
+    barrier = threading.Barrier(4)
+    real_render = pdf_export.render_table_pdf
+
+    def synchronized_render(*args, **kwargs):
+        result = real_render(*args, **kwargs)
+        barrier.wait(timeout=5)  # every thread has rendered before any rename
+        return result
+
+    monkeypatch.setattr(pdf_export, "render_table_pdf", synchronized_render)
+    sheet = {"sheet_name": "S", "columns": ["A"], "rows": [{"A": "one"}]}
+    errors = []
+
+    def export(i):
+        try:
+            pdf_export.export_sheet_data_pdf(sheet, str(tmp_path / f"out{i}.pdf"))
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=export, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert all((tmp_path / f"out{i}.pdf").exists() for i in range(4))
+    assert len(list(pdf_cache.glob("*.pdf"))) == 1
+    assert not list(pdf_cache.glob("*.part"))
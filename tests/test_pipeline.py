@@ -0,0 +1,117 @@
+"""Tests for the pipelined TTS/render path in ``core.pipeline``."""
+
+from pathlib import Path
+import sys
+import threading
+import time
+import wave
+
+import pytest
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import core.generate_video as generate_video
+import core.pipeline as pipeline
+from test_generate_video import FakeTextClip
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def fake_stages(monkeypatch, tmp_path):
+    """Fake TTS writing short WAVs, real encoding with stubbed captions."""
+    events = []
+    lock = threading.Lock()
+
+    def _log(event):
+        with lock:
+            events.append((event, time.perf_counter()))
+
+    def fake_tts(script, voice="alloy", model="gpt-4o-mini-tts"):
+        time.sleep(0.05)
+        path = tmp_path / f"{abs(hash(script))}.wav"
+        with wave.open(str(path), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(22050)
+            wav.writeframes(b"\x00\x00" * 6615)
+        _log(f"tts:{script}")
+        return str(path)
+
+    real_encode = generate_video._encode_segment
+
+    def logged_encode(spec):
+        _log(f"render:{spec['text']}")
+        return real_encode(spec)
+
+    FakeTextClip.calls = []
+    generate_video._render_caption.cache_clear()
+    monkeypatch.setattr(generate_video, "TextClip", FakeTextClip)
+    monkeypatch.setattr(pipeline, "generate_audio_from_script", fake_tts)
+    monkeypatch.setattr(pipeline, "_encode_segment", logged_encode)
+    yield events
+    generate_video._render_caption.cache_clear()
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+def test_segments_render_while_paragraphs_are_still_arriving(fake_stages, tmp_path):
+    def slow_stream():
+        for i in range(3):
+            yield {"text_to_be_rendered": f"Slide {i}", "audio_script": f"Narration {i}"}
+            time.sleep(0.4)
+        fake_stages.append(("stream-end", time.perf_counter()))
+
+    paragraphs, video = pipeline.run_paragraph_pipeline(
+        slow_stream(), output_path=str(tmp_path / "piped.mp4"), render_workers=0
+    )
+
+    assert Path(video).stat().st_size > 0
+    assert all(Path(p["audio_file_path"]).exists() for p in paragraphs)
+    times = dict(fake_stages)
+    assert times["render:Slide 0"] < times["stream-end"]
+    assert times["render:Slide 1"] < times["stream-end"]
+
+
+def test_existing_audio_is_not_resynthesized(fake_stages, tmp_path):
+    first, _ = pipeline.run_paragraph_pipeline(
+        [{"text_to_be_rendered": "Slide", "audio_script": "Narration"}],
+        output_path=str(tmp_path / "a.mp4"), render_workers=0,
+    )
+    fake_stages.clear()
+
+    pipeline.run_paragraph_pipeline(first, output_path=str(tmp_path / "a.mp4"), render_workers=0)
+
+    assert not [e for e, _ in fake_stages if e.startswith("tts:")]
+    assert not [e for e, _ in fake_stages if e.startswith("render:")]
+
+
+def test_paragraph_without_script_fails_the_run(fake_stages, tmp_path):
+    with pytest.raises(RuntimeError, match="no audio_script"):
+        pipeline.run_paragraph_pipeline(
+            [{"text_to_be_rendered": "Slide"}], output_path=str(tmp_path / "b.mp4"), render_workers=0
+        )
+
+
+def test_progress_hooks_fire_per_paragraph_before_a_failure(fake_stages, tmp_path):
+    audio, segments = [], []
+    paragraphs = [
+        {"text_to_be_rendered": "Slide 0", "audio_script": "Narration 0"},
+        {"text_to_be_rendered": "Slide 1", "audio_script": "Narration 1"},
+        {"text_to_be_rendered": "Slide 2"},
+    ]
+
+    with pytest.raises(RuntimeError, match="no audio_script"):
+        pipeline.run_paragraph_pipeline(
+            paragraphs, output_path=str(tmp_path / "c.mp4"), render_workers=0,
+            on_audio=lambda index, para: audio.append(index),
+            on_segment=lambda spec: segments.append(spec["index"]),
+        )
+
+    assert sorted(audio) == [0, 1]
+    assert sorted(segments) == [0, 1]
@@ -0,0 +1,101 @@
+"""Tests for the precompiled prompt templates in ``core.prompt_templates``."""
+
+from pathlib import Path
+import os
+import sys
+
+import pytest
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import core.prompt_templates as prompt_templates
+import generate_from_image
+import marketing_tool_generate_video
+from core.common import TEMPLATE_LIBRARY_FOLDER
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    prompt_templates.clear_template_cache()
+    yield
+    prompt_templates.clear_template_cache()
+
+
+def _library(name):
+    return (Path(TEMPLATE_LIBRARY_FOLDER) / name).read_text(encoding="utf-8")
+
+
+# ---------------------------------------------------------------------------
+# Parsing and rendering
+# ---------------------------------------------------------------------------
+
+def test_render_matches_chained_replace_for_library_prompts():
+    expected = _library("EGM_Help_image_to_audio.txt").replace("<<LANGUAGE>>", "spanish")
+    assert generate_from_image.prepare_prompt("spanish") == expected
+
+    expected = (
+        _library("EGM_Help_excel_image_to_audio.txt")
+        .replace("<<LANGUAGE>>", "english")
+        .replace("<<EXCEL_DATA_JSON>>", '{"a": 1}')
+        .replace("<<EXCEL_DATA_MARKDOWN>>", "| a |")
+    )
+    assert generate_from_image.prepare_prompt_excel_image("english", '{"a": 1}', "| a |") == expected
+
+    expected = _library("prompt_template.txt").replace("<<LANGUAGE>>", "english").replace("<<RULE_DATA>>", "rules")
+    assert marketing_tool_generate_video.prepare_prompt("english", "rules") == expected
+
+
+def test_unfilled_placeholders_stay_literal():
+    template = prompt_templates.PromptTemplate("Say <<GREETING>> to <<NAME>>.")
+    assert template.placeholders == {"GREETING", "NAME"}
+    assert template.render(GREETING="hello") == "Say hello to <<NAME>>."
+
+
+def test_values_are_not_rescanned_for_placeholders():
+    template = prompt_templates.PromptTemplate("<<A>>/<<B>>")
+    assert template.render(A="<<B>>", B="x") == "<<B>>/x"
+
+
+def test_missing_markdown_placeholder_appends_section(tmp_path, monkeypatch):
+    (tmp_path / "EGM_Help_excel_image_to_audio.txt").write_text(
+        "Lang <<LANGUAGE>> data <<EXCEL_DATA_JSON>>", encoding="utf-8"
+    )
+    monkeypatch.setattr(prompt_templates, "TEMPLATE_LIBRARY_FOLDER", str(tmp_path))
+
+    prompt = generate_from_image.prepare_prompt_excel_image("english", "{}", "| a |")
+
+    assert prompt.startswith("Lang english data {}")
+    assert "```markdown\n| a |\n```" in prompt
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+def test_required_placeholders_are_checked_on_load(tmp_path):
+    (tmp_path / "t.txt").write_text("No language here", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="<<LANGUAGE>>"):
+        prompt_templates.load_template("t.txt", required=("LANGUAGE",), folder=str(tmp_path))
+
+
+def test_template_is_parsed_once_until_file_changes(tmp_path):
+    path = tmp_path / "t.txt"
+    path.write_text("v1 <<X>>", encoding="utf-8")
+
+    first = prompt_templates.load_template("t.txt", folder=str(tmp_path))
+    assert prompt_templates.load_template("t.txt", folder=str(tmp_path)) is first
+
+    path.write_text("v2 <<X>>", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    second = prompt_templates.load_template("t.txt", folder=str(tmp_path))
+
+    assert second is not first
+    assert second.render(X="!") == "v2 !"
+
+
+def test_templates_load_independent_of_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert "<<LANGUAGE>>" in generate_from_image.read_prompt_template()
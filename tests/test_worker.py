@@ -0,0 +1,139 @@
+"""Tests for the SQLite job queue and resident worker loop."""
+
+from pathlib import Path
+import os
+import socket
+import sys
+import threading
+
+import pytest
+
+# Ensure repository root on path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import worker
+from worker import JobQueue
+
+
+def _job(job_id, language="english"):
+    return {"job_id": job_id, "image_path": None, "excel_path": None,
+            "sheet_name": None, "language": language, "pdf_path": None}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "queue.sqlite3"))
+
+
+# ---------------------------------------------------------------------------
+# Queue
+# ---------------------------------------------------------------------------
+
+
+def test_claim_is_fifo_and_finish_stores_result(queue):
+    assert queue.enqueue([_job("a"), _job("b")]) == 2
+    assert queue.claim("w1")["job_id"] == "a"
+    assert queue.claim("w2")["job_id"] == "b"
+    assert queue.claim("w3") is None
+
+    queue.finish("a", {"job_id": "a", "status": "ok", "error": None, "video_path": "a.mp4"})
+    queue.finish("b", {"job_id": "b", "status": "failed", "error": "RuntimeError: boom"})
+
+    assert queue.counts() == {"queued": 0, "running": 0, "ok": 1, "failed": 1}
+    rows = {row["job_id"]: row for row in queue.jobs()}
+    assert rows["a"]["result"]["video_path"] == "a.mp4"
+    assert rows["a"]["worker"] == "w1" and rows["a"]["attempts"] == 1
+    assert rows["b"]["error"] == "RuntimeError: boom"
+    assert "a.mp4" in worker.format_status(queue)
+
+
+def test_enqueue_rejects_pending_ids_and_requeues_finished(queue):
+    queue.enqueue([_job("a")])
+    with pytest.raises(ValueError, match="already queued"):
+        queue.enqueue([_job("b"), _job("a")])
+    assert [row["job_id"] for row in queue.jobs()] == ["a"]
+    with pytest.raises(ValueError, match="Duplicate"):
+        queue.enqueue([_job("c"), _job("c")])
+
+    queue.claim()
+    queue.finish("a", {"status": "failed", "error": "x"})
+    queue.enqueue([_job("a", language="spanish")])
+    job = queue.claim()
+    assert job["language"] == "spanish"
+    assert queue.jobs()[0]["attempts"] == 1
+
+
+def test_recover_requeues_jobs_of_dead_workers(queue, monkeypatch):
+    host = socket.gethostname()
+    queue.enqueue([_job("live"), _job("dead"), _job("remote")])
+    queue.claim(f"{host}:{os.getpid()}")
+    queue.claim(f"{host}:999999")
+    queue.claim("elsewhere:1")
+    monkeypatch.setattr(worker, "_pid_alive", lambda pid: pid == os.getpid())
+
+    assert queue.recover() == 1
+    assert {row["job_id"]: row["status"] for row in queue.jobs()} == {
+        "live": "running", "dead": "queued", "remote": "running",
+    }
+
+
+# ---------------------------------------------------------------------------
+# Worker loop
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def fake_stages(monkeypatch, tmp_path):
+    """Stub the pipeline stages; renders wait until every job's LLM call ran."""
+    prompts = []
+    prompts_lock = threading.Lock()
+    all_prompts = threading.Event()
+    expected = {"jobs": 0}
+
+    def fake_build_prompt(image_path, language="english", **kwargs):
+        with prompts_lock:
+            prompts.append(language)
+            if len(prompts) >= expected["jobs"]:
+                all_prompts.set()
+        if language == "broken":
+            raise RuntimeError("bad sheet")
+        return "prompt", f"img_{language}", None
+
+    def fake_render(script_data, image_path, output_path=None, checkpoint_file=None):
+        assert all_prompts.wait(timeout=5)
+        return output_path
+
+    pipeline = worker.generate_batch.pipeline
+    monkeypatch.setattr(pipeline, "build_prompt", fake_build_prompt)
+    monkeypatch.setattr(
+        pipeline, "job_output_files",
+        lambda suffix, date=None: (str(tmp_path / f"{suffix}.json"), str(tmp_path / f"{suffix}.txt")),
+    )
+    monkeypatch.setattr(pipeline, "request_script", lambda *a, **k: {"paragraphs": []})
+    monkeypatch.setattr(pipeline, "synthesize_audio", lambda data, output_file: data)
+    monkeypatch.setattr(pipeline, "render_video", fake_render)
+    for name in ("BATCH_LLM_CONCURRENCY", "BATCH_TTS_CONCURRENCY", "BATCH_RENDER_CONCURRENCY"):
+        monkeypatch.setattr(worker.generate_batch, name, 1)
+    return expected
+
+
+def test_worker_loop_drains_queue(queue, fake_stages):
+    queue.enqueue([_job("1"), _job("2", "broken"), _job("3"), _job("4")])
+    fake_stages["jobs"] = 4
+
+    # One thread per stage: renders block until all four LLM calls have run
+    ran = worker.worker_loop(queue.path, max_jobs=4, exit_when_empty=True)
+
+    assert ran == 4
+    assert queue.counts() == {"queued": 0, "running": 0, "ok": 3, "failed": 1}
+    results = {row["job_id"]: row for row in queue.jobs()}
+    assert results["2"]["error"] == "RuntimeError: bad sheet"
+    assert results["1"]["result"]["video_path"].endswith("video_1_img_english.mp4")
+
+
+def test_worker_loop_stops_on_event(queue, monkeypatch):
+    stop = threading.Event()
+    stop.set()
+    queue.enqueue([_job("1")])
+    assert worker.worker_loop(queue.path, max_jobs=1, stop=stop) == 0
+    assert queue.counts()["queued"] == 1
@@ -0,0 +1,173 @@
+"""Benchmark the column-wise ``extract_sheet_text`` against the old iterrows path.
+
+Runs both implementations on every sheet of the sample workbook and on a
+synthetic 100k-cell sheet, checks that they produce identical ``flat_text``
+and Markdown, and prints the timings.
+
+Usage::
+
+    python tools/bench_extract_sheet_text.py [--repeat 5] [--rows 5000 --cols 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from core.excel_utils import _engine_for_excel, _frame_to_sheet_data
+
+
+SAMPLE_WORKBOOK = os.path.join(ROOT, "ViusalAI_GamesTeam_AudioForHelp", "AGR.xls")
+
+
+def legacy_frame_to_sheet_data(df: pd.DataFrame, sheet_name: str) -> Dict[str, Any]:
+    """The previous row-by-row implementation, kept as the reference."""
+
+    def _stringify(value: Any) -> str:
+        if value is None:
+            return ""
+        try:
+            import math
+            if isinstance(value, float) and math.isnan(value):
+                return ""
+        except Exception:
+            pass
+        try:
+            import math
+            if isinstance(value, float) and math.isfinite(value):
+                if value.is_integer():
+                    return str(int(value))
+        except Exception:
+            pass
+        s = str(value)
+        s = s.replace("\r\n", "\n").replace("\r", "\n").replace("\n", "<br>")
+        return s.replace("|", "\\|")
+
+    def _col_letter(idx: int) -> str:
+        s = ""
+        n = idx
+        while True:
+            n, r = divmod(n, 26)
+            s = chr(ord('A') + r) + s
+            if n == 0:
+                break
+            n -= 1
+        return s
+
+    column_labels = [_col_letter(i) for i in range(len(df.columns))]
+    rows: List[Dict[str, Any]] = []
+    flat: List[str] = []
+    seen = set()
+    for _, row in df.iterrows():
+        row_dict: Dict[str, Any] = {}
+        for i, col in enumerate(df.columns):
+            val = row[col]
+            row_dict[column_labels[i]] = val if (pd.notna(val)) else None
+            if pd.notna(val):
+                text = val.strip() if isinstance(val, str) else str(val).strip()
+                if text and text not in seen:
+                    flat.append(text)
+                    seen.add(text)
+        rows.append(row_dict)
+
+    aligns = [("right" if is_numeric_dtype(df[col]) else "left") for col in df.columns]
+    widths: List[int] = []
+    for col in df.columns:
+        max_cell_len = 0
+        if not df.empty:
+            for v in df[col].tolist():
+                max_cell_len = max(max_cell_len, len(_stringify(v)))
+        widths.append(max(3, max_cell_len))
+    header_row = "| " + " | ".join("".ljust(w) for w in widths) + " |"
+    sep_cells = []
+    for i, align in enumerate(aligns):
+        if align == "right":
+            sep_cells.append("-" * (max(3, widths[i]) - 1) + ":")
+        else:
+            sep_cells.append("-" * max(3, widths[i]))
+    sep_row = "| " + " | ".join(sep_cells) + " |"
+    body_rows: List[str] = []
+    for _, row in df.iterrows():
+        cells = []
+        for i, col in enumerate(df.columns):
+            s = _stringify(row[col])
+            cells.append(s.rjust(widths[i]) if aligns[i] == "right" else s.ljust(widths[i]))
+        body_rows.append("| " + " | ".join(cells) + " |")
+
+    return {
+        "sheet_name": sheet_name,
+        "columns": column_labels,
+        "rows": rows,
+        "flat_text": flat,
+        "markdown": "\n".join([header_row, sep_row] + body_rows),
+    }
+
+
+def synthetic_sheet(rows: int, cols: int, seed: int = 0) -> pd.DataFrame:
+    """Mixed-type sheet resembling a paytable: text, integers, floats and blanks."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for c in range(cols):
+        kind = c % 4
+        if kind == 0:
+            data[c] = [f"Symbol {i % 37} pays|line\n{i}" for i in range(rows)]
+        elif kind == 1:
+            data[c] = rng.integers(0, 10_000, rows)
+        elif kind == 2:
+            values = rng.random(rows) * 1000
+            values[rng.random(rows) < 0.2] = np.nan
+            data[c] = values
+        else:
+            data[c] = [None if i % 3 else f"Note {i}" for i in range(rows)]
+    return pd.DataFrame(data)
+
+
+def _best_of(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _compare(label: str, df: pd.DataFrame, repeat: int) -> None:
+    legacy = legacy_frame_to_sheet_data(df, label)
+    current = _frame_to_sheet_data(df, label)
+    assert legacy["markdown"] == current["markdown"], f"markdown differs for {label}"
+    assert legacy["flat_text"] == current["flat_text"], f"flat_text differs for {label}"
+
+    old = _best_of(lambda: legacy_frame_to_sheet_data(df, label), repeat)
+    new = _best_of(lambda: _frame_to_sheet_data(df, label), repeat)
+    cells = df.shape[0] * df.shape[1]
+    print(f"{label[:34]:<34} {cells:>8} {old * 1000:>11.1f} {new * 1000:>11.1f} {old / new:>8.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--cols", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'sheet':<34} {'cells':>8} {'legacy ms':>11} {'column ms':>11} {'speedup':>9}")
+    if os.path.exists(SAMPLE_WORKBOOK):
+        frames = pd.read_excel(
+            SAMPLE_WORKBOOK, sheet_name=None, header=None, engine=_engine_for_excel(SAMPLE_WORKBOOK)
+        )
+        for name, df in frames.items():
+            _compare(name, df, args.repeat)
+    _compare(f"synthetic {args.rows}x{args.cols}", synthetic_sheet(args.rows, args.cols), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
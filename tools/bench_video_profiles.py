@@ -0,0 +1,87 @@
+"""Benchmark the "standard" and "static" render profiles on synthetic slides.
+
+Renders the same slides (a gradient background with narration-length tone
+audio) with each profile and prints encode time, file size and frame rate.
+Captions are left empty by default because ``TextClip`` needs ImageMagick;
+pass ``--captions`` to include them.
+
+Usage::
+
+    python tools/bench_video_profiles.py [--slides 6] [--seconds 8] [--workers 0]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import numpy as np
+from PIL import Image
+
+import core.generate_video as generate_video
+
+
+def _write_background(path: str) -> str:
+    x = np.linspace(0, 255, 1280, dtype=np.float32)
+    y = np.linspace(0, 255, 720, dtype=np.float32)[:, None]
+    rgb = np.stack([np.broadcast_to(x, (720, 1280)), np.broadcast_to(y, (720, 1280)),
+                    np.full((720, 1280), 96, dtype=np.float32)], axis=-1)
+    Image.fromarray(rgb.astype(np.uint8)).save(path)
+    return path
+
+
+def _write_tone(path: str, seconds: float, pitch: float = 220.0, rate: int = 24000) -> str:
+    t = np.arange(int(seconds * rate)) / rate
+    samples = (0.2 * np.sin(2 * np.pi * pitch * t) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slides", type=int, default=6)
+    parser.add_argument("--seconds", type=float, default=8.0)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--captions", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work:
+        background = _write_background(os.path.join(work, "background.png"))
+        script = {
+            "paragraphs": [
+                {
+                    "text_to_be_rendered": f"Slide {i}" if args.captions else "",
+                    "audio_file_path": _write_tone(
+                        os.path.join(work, f"audio_{i}.wav"), args.seconds, pitch=220.0 + 20 * i
+                    ),
+                }
+                for i in range(args.slides)
+            ]
+        }
+
+        print(f"{args.slides} slides x {args.seconds:.0f}s, workers={args.workers}")
+        print(f"{'profile':<10} {'fps':>4} {'seconds':>9} {'size KB':>9}")
+        for profile in ("standard", "static"):
+            output = os.path.join(work, f"{profile}.mp4")
+            started = time.perf_counter()
+            generate_video.generate_video_for_paragraphs(
+                script, background_image_path=background, output_path=output,
+                workers=args.workers, profile=profile,
+            )
+            elapsed = time.perf_counter() - started
+            fps = generate_video.encoding_profile(profile)["fps"]
+            print(f"{profile:<10} {fps:>4} {elapsed:>9.2f} {os.path.getsize(output) / 1024:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
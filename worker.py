@@ -0,0 +1,369 @@
+"""Resident workers that run batch jobs from a local SQLite queue.
+
+``generate_batch.py`` and ``generate_from_image.py`` start cold on every
+run: imports, client construction, prompt templates, parsed workbooks and
+the ffmpeg lookup are all paid again. A worker process pays them once and
+then keeps pulling jobs, so the HTTP session, OpenAI clients, template
+cache and workbook cache stay warm across jobs.
+
+Jobs use the manifest format of ``generate_batch.py`` and run through
+:class:`generate_batch.StagePipeline`. The queue is one SQLite file
+(``WORKER_QUEUE_DB``). Its ``jobs`` table is also the status table: a job
+goes ``queued`` -> ``running`` -> ``ok`` or ``failed``, and finished rows keep
+the job's report row (script JSON, video path, stage timings) as
+``result``. Commands::
+
+    python worker.py enqueue jobs.csv
+    python worker.py run --workers 4
+    python worker.py status
+"""
+
+import json
+import os
+import signal
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from core.common import PROJECT_ROOT, debug_print
+import generate_batch
+
+WORKER_QUEUE_DB = os.getenv("WORKER_QUEUE_DB", os.path.join(PROJECT_ROOT, "output", "worker", "queue.sqlite3"))
+# Seconds an idle worker waits before looking for new jobs
+WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "2"))
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "1"))
+
+JOB_STATUSES = ("queued", "running", "ok", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, seq);
+"""
+
+
+def _worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # exists, owned by another user
+        return True
+    return True
+
+
+class JobQueue:
+    """Durable FIFO of manifest jobs backed by one SQLite file.
+
+    Every call opens its own connection, so one instance can be shared by
+    threads and each worker process opens the file independently.
+    """
+
+    def __init__(self, path: str = WORKER_QUEUE_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE takes the write lock up front, so two workers never claim the same job
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def enqueue(self, jobs: Iterable[Dict[str, Any]]) -> int:
+        """Queue ``jobs`` and return how many were added.
+
+        A job whose ``job_id`` already finished is queued again; one that is
+        still queued or running raises ``ValueError`` and nothing is added.
+        """
+        jobs = list(jobs)
+        now = time.time()
+        with self._transaction() as conn:
+            ids = [job["job_id"] for job in jobs]
+            if len(set(ids)) != len(ids):
+                raise ValueError("Duplicate job_id values in the jobs to enqueue")
+            pending = [
+                job_id for job_id in ids
+                if conn.execute(
+                    "SELECT 1 FROM jobs WHERE job_id = ? AND status IN ('queued', 'running')", (job_id,)
+                ).fetchone()
+            ]
+            if pending:
+                raise ValueError(f"Job(s) already queued or running: {pending}")
+            for job in jobs:
+                # Re-queued ids move to the back of the queue
+                conn.execute("DELETE FROM jobs WHERE job_id = ?", (job["job_id"],))
+                conn.execute(
+                    "INSERT INTO jobs (job_id, payload, status, enqueued_at) VALUES (?, ?, 'queued', ?)",
+                    (job["job_id"], json.dumps(job, ensure_ascii=False), now),
+                )
+        return len(jobs)
+
+    def claim(self, worker: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Mark the oldest queued job as running and return it (``None`` if the queue is empty)."""
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT seq, payload FROM jobs WHERE status = 'queued' ORDER BY seq LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, finished_at = NULL, "
+                "error = NULL, result = NULL, attempts = attempts + 1 WHERE seq = ?",
+                (worker or _worker_name(), time.time(), row["seq"]),
+            )
+        return json.loads(row["payload"])
+
+    def finish(self, job_id: str, result: Dict[str, Any]) -> None:
+        """Store a batch status row; its ``status`` becomes the job's status."""
+        status = "ok" if result.get("status") == "ok" else "failed"
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ?, result = ? WHERE job_id = ?",
+                (status, time.time(), result.get("error"), json.dumps(result, ensure_ascii=False), job_id),
+            )
+
+    def recover(self) -> int:
+        """Re-queue jobs left running by workers on this host that no longer exist."""
+        host = socket.gethostname()
+        requeued = 0
+        with self._transaction() as conn:
+            for row in conn.execute("SELECT seq, worker FROM jobs WHERE status = 'running'").fetchall():
+                worker_host, _, pid = (row["worker"] or "").rpartition(":")
+                if worker_host == host and pid.isdigit() and not _pid_alive(int(pid)):
+                    conn.execute(
+                        "UPDATE jobs SET status = 'queued', worker = NULL, started_at = NULL WHERE seq = ?",
+                        (row["seq"],),
+                    )
+                    requeued += 1
+        return requeued
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        with self._connect() as conn:
+            for row in conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+                counts[row["status"]] = row["n"]
+        return counts
+
+    def jobs(self, status: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Status rows, newest first, with ``result`` decoded."""
+        query = "SELECT * FROM jobs"
+        params: List[Any] = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY seq DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._connect() as conn:
+            rows = [dict(row) for row in conn.execute(query, params)]
+        for row in rows:
+            row["payload"] = json.loads(row["payload"])
+            row["result"] = json.loads(row["result"]) if row["result"] else None
+        return rows
+
+
+def warm_up() -> None:
+    """Load what every job needs once: stage libraries, templates, ffmpeg, HTTP session."""
+    from core import generate_script_json, generate_video
+    from core.clients import get_http_session
+
+    started = time.perf_counter()
+    generate_script_json._openai_class("AzureOpenAI")
+    for name in generate_video._MOVIEPY_NAMES:
+        generate_video._moviepy(name)
+    get_http_session()
+    for step in (generate_video._ffmpeg_binary, generate_batch.pipeline.read_prompt_template,
+                 generate_batch.pipeline.read_prompt_template_excel_image):
+        try:
+            step()
+        except Exception as exc:  # the job that needs it reports the error
+            debug_print(f"Warm-up step {step.__name__} failed: {exc}", level="WARNING")
+    debug_print(f"Worker warmed up in {time.perf_counter() - started:.2f}s")
+
+
+def worker_loop(
+    queue_path: str = WORKER_QUEUE_DB,
+    max_jobs: Optional[int] = None,
+    exit_when_empty: bool = False,
+    poll_interval: float = WORKER_POLL_SECONDS,
+    use_cache: bool = True,
+    stop: Optional[threading.Event] = None,
+) -> int:
+    """Run queued jobs in this process until ``stop`` is set; returns how many ran.
+
+    Claimed jobs go through a :class:`generate_batch.StagePipeline` with the
+    ``BATCH_*_CONCURRENCY`` stage limits, so a job waiting for a render
+    never keeps LLM work for the next job from starting. At most
+    ``max_jobs`` jobs (default: the sum of the stage limits) are claimed at
+    once. With ``exit_when_empty`` the loop returns once the queue is
+    drained and the jobs in hand are done.
+    """
+    queue = JobQueue(queue_path)
+    if max_jobs is None:
+        max_jobs = (generate_batch.BATCH_LLM_CONCURRENCY + generate_batch.BATCH_TTS_CONCURRENCY
+                    + generate_batch.BATCH_RENDER_CONCURRENCY)
+    stop = stop or threading.Event()
+    worker = _worker_name()
+    done = [0]
+    done_lock = threading.Lock()
+
+    def finish(job: Dict[str, Any], result: Dict[str, Any]) -> None:
+        queue.finish(job["job_id"], result)
+        with done_lock:
+            done[0] += 1
+
+    with generate_batch.StagePipeline(
+        generate_batch.BATCH_LLM_CONCURRENCY,
+        generate_batch.BATCH_TTS_CONCURRENCY,
+        generate_batch.BATCH_RENDER_CONCURRENCY,
+        use_cache=use_cache,
+        on_done=finish,
+    ) as stages:
+        while not stop.is_set():
+            stages.wait(below=max(1, max_jobs))
+            if stop.is_set():
+                break
+            job = queue.claim(worker)
+            if job is None:
+                if exit_when_empty:
+                    break
+                stop.wait(poll_interval)
+                continue
+            stages.submit(job)
+    return done[0]
+
+
+def _worker_process(queue_path: str, max_jobs: Optional[int], exit_when_empty: bool, use_cache: bool) -> None:
+    stop = threading.Event()
+    # Finish the jobs in hand, then exit
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    warm_up()
+    count = worker_loop(queue_path, max_jobs=max_jobs, exit_when_empty=exit_when_empty,
+                        use_cache=use_cache, stop=stop)
+    debug_print(f"Worker {_worker_name()} stopped after {count} jobs")
+
+
+def run_workers(
+    queue_path: str = WORKER_QUEUE_DB,
+    workers: int = WORKER_PROCESSES,
+    max_jobs: Optional[int] = None,
+    exit_when_empty: bool = False,
+    use_cache: bool = True,
+) -> None:
+    """Start ``workers`` worker processes and wait for them to exit."""
+    import multiprocessing
+
+    requeued = JobQueue(queue_path).recover()
+    if requeued:
+        debug_print(f"Re-queued {requeued} job(s) left running by stopped workers", level="WARNING")
+    processes = [
+        multiprocessing.Process(
+            target=_worker_process, args=(queue_path, max_jobs, exit_when_empty, use_cache),
+            name=f"worker-{i}",
+        )
+        for i in range(max(1, workers))
+    ]
+    for process in processes:
+        process.start()
+    debug_print(f"Started {len(processes)} worker(s) on {queue_path}")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        debug_print("Stopping workers after their current jobs")
+        for process in processes:
+            process.join()
+
+
+def format_status(queue: JobQueue, limit: int = 20) -> str:
+    """Job counts plus a table of the most recent jobs."""
+    counts = queue.counts()
+    lines = ["  ".join(f"{status}={counts[status]}" for status in JOB_STATUSES)]
+    rows = [("job_id", "status", "tries", "worker", "seconds", "finished", "video / error")]
+    for job in queue.jobs(limit=limit):
+        seconds = ""
+        if job["started_at"]:
+            seconds = f"{(job['finished_at'] or time.time()) - job['started_at']:.1f}"
+        finished = datetime.fromtimestamp(job["finished_at"]).strftime("%H:%M:%S") if job["finished_at"] else ""
+        outcome = job["error"] or (job["result"] or {}).get("video_path") or ""
+        rows.append((job["job_id"], job["status"], str(job["attempts"]), job["worker"] or "",
+                     seconds, finished, outcome))
+    if len(rows) > 1:
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]) - 1)]
+        lines.append("")
+        lines += ["  ".join(cell.ljust(w) for cell, w in zip(row, widths)) + "  " + row[-1] for row in rows]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run batch jobs from a local queue with resident workers.")
+    parser.add_argument("--queue", help="SQLite queue file", default=WORKER_QUEUE_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Add the jobs of a CSV/JSONL manifest to the queue")
+    enqueue.add_argument("manifest", help="Path to the CSV or JSONL manifest")
+
+    run = commands.add_parser("run", help="Start worker processes")
+    run.add_argument("--workers", type=int, default=WORKER_PROCESSES, help="Worker processes")
+    run.add_argument("--max_jobs", type=int, default=None, help="Jobs each worker claims at once")
+    run.add_argument("--exit_when_empty", action="store_true", help="Stop once the queue is drained")
+    run.add_argument("--no_cache", help="Bypass the LLM response cache", action="store_true")
+
+    status = commands.add_parser("status", help="Show job counts and recent jobs")
+    status.add_argument("--limit", type=int, default=20)
+    status.add_argument("--json", action="store_true", help="Print every job as JSON lines")
+
+    args = parser.parse_args()
+    if args.command == "enqueue":
+        added = JobQueue(args.queue).enqueue(generate_batch.read_manifest(args.manifest))
+        debug_print(f"Queued {added} job(s) in {args.queue}")
+    elif args.command == "run":
+        run_workers(args.queue, workers=args.workers, max_jobs=args.max_jobs,
+                    exit_when_empty=args.exit_when_empty, use_cache=not args.no_cache)
+    elif args.json:
+        for job in reversed(JobQueue(args.queue).jobs()):
+            print(json.dumps(job, ensure_ascii=False))
+    else:
+        print(format_status(JobQueue(args.queue), limit=args.limit))